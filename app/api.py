@@ -1,16 +1,85 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from app.models import RecommendationResponse
-from app import service
+from typing import Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Response
+from app.models import RecommendationResponse, SimilarBooksResponse
+from app.config import settings
+from app import catalog, content, service, metrics, profiler
 
 router = APIRouter()
 
+def _book_filter(books, subject, year_from, year_to, min_rating):
+    if all(f is None for f in (subject, year_from, year_to, min_rating)):
+        return None
+    if books is None:
+        raise HTTPException(status_code=400, detail="filters require BOOKS_METADATA_PATH")
+    return catalog.BookFilter(books, subject, year_from, year_to, min_rating)
+
 @router.get("/recommendations/{user_id}", response_model=RecommendationResponse)
-async def get_recommendations(user_id: str, limit: int = 10):
-    recs = await service.get_recommendations(user_id, limit)
-    return RecommendationResponse(user_id=user_id, recommendations=recs)
+async def get_recommendations(
+    user_id: str,
+    limit: int = 10,
+    offset: int = 0,
+    subject: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_rating: Optional[float] = None,
+):
+    if limit < 1 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be >= 1 and offset >= 0")
+    books = catalog.get_catalog()
+    item_filter = _book_filter(books, subject, year_from, year_to, min_rating)
+    recs, scores, has_more = await service.get_recommendations(user_id, limit, item_filter, offset)
+    details = [books.describe(w) for w in recs] if books is not None else None
+    return RecommendationResponse(
+        user_id=user_id,
+        recommendations=recs,
+        books=details,
+        scores=scores,
+        offset=offset,
+        next_offset=offset + len(recs) if has_more else None,
+    )
+
+@router.get("/books/{work_id}/similar", response_model=SimilarBooksResponse)
+async def get_similar_books(
+    work_id: str,
+    limit: int = 10,
+    subject: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_rating: Optional[float] = None,
+):
+    # Content-based neighbors of a seed book; a couple of array lookups, no executor needed
+    index = content.get_content_index()
+    if index is None or work_id not in index:
+        raise HTTPException(status_code=404, detail="Not Found")
+    books = catalog.get_catalog()
+    item_filter = _book_filter(books, subject, year_from, year_to, min_rating)
+    recs = index.similar(work_id, limit, item_filter)
+    details = [books.describe(w) for w in recs] if books is not None else None
+    return SimilarBooksResponse(work_id=work_id, recommendations=recs, books=details)
 
 @router.post("/recommendations/refresh")
 async def refresh_recommendations(background_tasks: BackgroundTasks):
     # Kick off background recompute
     background_tasks.add_task(service.refresh_all_recommendations)
     return {"status": "started"}
+
+@router.get("/metrics")
+async def get_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@router.post("/admin/profile")
+async def capture_profile(seconds: float = 10.0):
+    # Opt-in sampling profiler: returns collapsed stacks for all worker threads
+    if not settings.profiler_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if seconds <= 0 or seconds > settings.profiler_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be in (0, {settings.profiler_max_seconds}]",
+        )
+    try:
+        stacks = await service.run_in_executor(profiler.sample_stacks, seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(content=stacks, media_type="text/plain")
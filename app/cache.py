@@ -1,29 +1,74 @@
 import asyncio
 import aioredis
 import json
+import time
 from app.config import settings
+from app import metrics, tracing
 
 redis = None
 
 async def get_redis():
     global redis
+    if not settings.redis_url:
+        # Redis is optional: without it every lookup is a miss and sets are dropped
+        return None
     if redis is None:
         redis = await aioredis.from_url(settings.redis_url, decode_responses=True)
     return redis
 
-async def get_cached_recommendations(user_id: str):
+def _filtered_key(user_id: str) -> str:
+    # Filtered lists of a user: one hash, a field per filter, so they expire
+    # and are invalidated together
+    return f"reco-filtered:{user_id}"
+
+def _invalidated_key(user_id: str) -> str:
+    # When the user's recommendations were last invalidated (epoch seconds);
+    # snapshots built from older ratings are not served to them
+    return f"reco-invalidated:{user_id}"
+
+async def get_cached_recommendations(user_id: str, filter_key=None):
     r = await get_redis()
-    key = f"reco:{user_id}"
-    data = await r.get(key)
+    if r is None:
+        return None
+    with tracing.span("cache_get", metrics.CACHE_OP_SECONDS.labels(op="get")):
+        if filter_key is None:
+            data = await r.get(f"reco:{user_id}")
+        else:
+            data = await r.hget(_filtered_key(user_id), filter_key)
     if data:
+        metrics.CACHE_LOOKUPS.labels(result="hit").inc()
         return json.loads(data)
+    metrics.CACHE_LOOKUPS.labels(result="miss").inc()
     return None
 
-async def set_cached_recommendations(user_id: str, recs, ttl=None):
+async def set_cached_recommendations(user_id: str, recs, ttl=None, filter_key=None):
     r = await get_redis()
-    key = f"reco:{user_id}"
-    await r.set(key, json.dumps(recs), ex=ttl or settings.cache_ttl_seconds)
+    if r is None:
+        return
+    ttl = ttl or settings.cache_ttl_seconds
+    with tracing.span("cache_set", metrics.CACHE_OP_SECONDS.labels(op="set")):
+        if filter_key is None:
+            await r.set(f"reco:{user_id}", json.dumps(recs), ex=ttl)
+        else:
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.hset(_filtered_key(user_id), filter_key, json.dumps(recs))
+                pipe.expire(_filtered_key(user_id), ttl)
+                await pipe.execute()
 
 async def invalidate_user_cache(user_id: str):
     r = await get_redis()
-    await r.delete(f"reco:{user_id}")
+    if r is None:
+        return
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.delete(f"reco:{user_id}", _filtered_key(user_id))
+        pipe.set(_invalidated_key(user_id), repr(time.time()), ex=settings.invalidation_ttl_seconds)
+        await pipe.execute()
+
+async def invalidated_since(user_id: str, as_of: float) -> bool:
+    # Whether the user was invalidated at or after `as_of` (epoch seconds)
+    r = await get_redis()
+    if r is None:
+        return False
+    with tracing.span("cache_get", metrics.CACHE_OP_SECONDS.labels(op="get")):
+        marker = await r.get(_invalidated_key(user_id))
+    return marker is not None and float(marker) >= as_of
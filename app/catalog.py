@@ -0,0 +1,172 @@
+import json
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from app.config import settings
+
+class BookCatalog:
+    """
+    Read-only book metadata loaded from the pipeline's JSONL output, kept in
+    flat arrays rather than one dict per book:
+
+      titles            one UTF-8 buffer + int64 offsets
+      authors/subjects  int32 codes into interned name tables, one CSR row
+                        (int64 offsets) per book
+      numeric fields    avg_rating float32, rating_count int32,
+                        first_publish_year int32 / cover_id int64 (-1 = none)
+
+    Rows follow the file order; `rows(work_ids)` maps ids to rows (-1 for
+    unknown ids) so filters are evaluated as boolean masks over a whole
+    candidate list at once.
+    """
+
+    def __init__(self, work_ids, title_data, title_offsets, author_names, author_offsets,
+                 author_codes, subject_names, subject_offsets, subject_codes,
+                 years, cover_ids, avg_ratings, rating_counts):
+        self.work_ids = work_ids
+        self.index = {w: i for i, w in enumerate(work_ids)}
+        self._title_data = title_data
+        self._title_offsets = title_offsets
+        self.author_names = author_names
+        self._author_offsets = author_offsets
+        self._author_codes = author_codes
+        self.subject_names = subject_names
+        self.subject_index = {s: i for i, s in enumerate(subject_names)}
+        self._subject_offsets = subject_offsets
+        self._subject_codes = subject_codes
+        # Book row of every subject code entry, for vectorized subject masks
+        self._subject_rows = np.repeat(
+            np.arange(len(work_ids), dtype=np.int32), np.diff(subject_offsets)
+        )
+        self.years = years
+        self.cover_ids = cover_ids
+        self.avg_ratings = avg_ratings
+        self.rating_counts = rating_counts
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "BookCatalog":
+        work_ids: List[str] = []
+        titles = bytearray()
+        title_offsets = [0]
+        authors: Dict[str, int] = {}
+        author_offsets = [0]
+        author_codes: List[int] = []
+        subjects: Dict[str, int] = {}
+        subject_offsets = [0]
+        subject_codes: List[int] = []
+        years: List[int] = []
+        cover_ids: List[int] = []
+        avg_ratings: List[float] = []
+        rating_counts: List[int] = []
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    book = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                work_id = book.get("book_id") or book.get("key")
+                if not work_id:
+                    continue
+                work_ids.append(work_id)
+                titles += str(book.get("title") or "").encode("utf-8")
+                title_offsets.append(len(titles))
+                for a in book.get("authors") or []:
+                    name = a.get("author_name") if isinstance(a, dict) else None
+                    if name:
+                        author_codes.append(authors.setdefault(name, len(authors)))
+                author_offsets.append(len(author_codes))
+                for s in book.get("subjects") or []:
+                    subject_codes.append(subjects.setdefault(str(s), len(subjects)))
+                subject_offsets.append(len(subject_codes))
+                year = book.get("first_publish_year")
+                years.append(year if isinstance(year, int) else -1)
+                cover_id = book.get("cover_id")
+                cover_ids.append(cover_id if isinstance(cover_id, int) else -1)
+                avg_ratings.append(float(book.get("avg_rating") or 0.0))
+                rating_counts.append(int(book.get("rating_count") or 0))
+
+        return cls(
+            work_ids,
+            bytes(titles), np.array(title_offsets, dtype=np.int64),
+            list(authors), np.array(author_offsets, dtype=np.int64), np.array(author_codes, dtype=np.int32),
+            list(subjects), np.array(subject_offsets, dtype=np.int64), np.array(subject_codes, dtype=np.int32),
+            np.array(years, dtype=np.int32), np.array(cover_ids, dtype=np.int64),
+            np.array(avg_ratings, dtype=np.float32), np.array(rating_counts, dtype=np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.work_ids)
+
+    def rows(self, work_ids: Iterable[str]) -> np.ndarray:
+        """Catalog row of each work_id, -1 if it is not in the catalog."""
+        get = self.index.get
+        return np.fromiter((get(w, -1) for w in work_ids), dtype=np.int64)
+
+    def mask(self, subject: Optional[str] = None, year_from: Optional[int] = None,
+             year_to: Optional[int] = None, min_rating: Optional[float] = None) -> np.ndarray:
+        """Boolean mask over catalog rows of the books matching every given filter."""
+        keep = np.ones(len(self), dtype=bool)
+        if subject is not None:
+            code = self.subject_index.get(subject)
+            has_subject = np.zeros(len(self), dtype=bool)
+            if code is not None:
+                has_subject[self._subject_rows[self._subject_codes == code]] = True
+            keep &= has_subject
+        if year_from is not None:
+            keep &= self.years >= year_from
+        if year_to is not None:
+            # -1 (unknown year) never matches a year range
+            keep &= (self.years <= year_to) & (self.years >= 0)
+        if min_rating is not None:
+            keep &= self.avg_ratings >= min_rating
+        return keep
+
+    def describe(self, work_id: str) -> Dict:
+        """Metadata of one book; only work_id for ids outside the catalog."""
+        i = self.index.get(work_id)
+        if i is None:
+            return {"work_id": work_id}
+        a0, a1 = self._author_offsets[i], self._author_offsets[i + 1]
+        s0, s1 = self._subject_offsets[i], self._subject_offsets[i + 1]
+        return {
+            "work_id": work_id,
+            "title": self._title_data[self._title_offsets[i]:self._title_offsets[i + 1]].decode("utf-8"),
+            "authors": [self.author_names[c] for c in self._author_codes[a0:a1].tolist()],
+            "subjects": [self.subject_names[c] for c in self._subject_codes[s0:s1].tolist()],
+            "first_publish_year": int(self.years[i]) if self.years[i] >= 0 else None,
+            "cover_id": int(self.cover_ids[i]) if self.cover_ids[i] >= 0 else None,
+            "avg_rating": round(float(self.avg_ratings[i]), 3),
+            "rating_count": int(self.rating_counts[i]),
+        }
+
+class BookFilter:
+    """Request filters, applied to candidate work_ids as one vectorized mask."""
+
+    def __init__(self, catalog: BookCatalog, subject: Optional[str] = None,
+                 year_from: Optional[int] = None, year_to: Optional[int] = None,
+                 min_rating: Optional[float] = None):
+        self.catalog = catalog
+        # Names the filtered recommendation list in the cache
+        self.key = json.dumps([subject, year_from, year_to, min_rating])
+        self._row_mask = catalog.mask(subject, year_from, year_to, min_rating)
+
+    def __call__(self, work_ids: List[str]) -> np.ndarray:
+        """Mask over `work_ids`; books outside the catalog never match."""
+        rows = self.catalog.rows(work_ids)
+        if not len(self.catalog):
+            return np.zeros(len(rows), dtype=bool)
+        return (rows >= 0) & self._row_mask[rows]
+
+@lru_cache(maxsize=1)
+def _load(path: str) -> BookCatalog:
+    return BookCatalog.from_jsonl(path)
+
+def get_catalog() -> Optional[BookCatalog]:
+    """The configured catalog (loaded once), or None without books_metadata_path."""
+    if not settings.books_metadata_path:
+        return None
+    return _load(settings.books_metadata_path)
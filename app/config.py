@@ -1,11 +1,30 @@
+from typing import Optional
 from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     aws_region: str = "us-west-2"
     dynamodb_table: str = "book_ratings"
-    redis_url: str = "redis://redis:6379/0"   # docker-compose service name
+    dynamodb_endpoint_url: Optional[str] = None  # e.g. http://dynamodb:8000 for dynamodb-local
+    ratings_triplets_path: Optional[str] = None  # serve ratings from a triplet file instead of DynamoDB
+    ratings_scan_seconds: float = 0.0  # reuse a DynamoDB ratings scan (and its index) this long; 0 scans per request
+    books_metadata_path: Optional[str] = None  # pipeline JSONL; enables book details and filters
+    content_index_path: Optional[str] = None  # neighbor table from build_content_index.py
+    # hybrid ranking: blend weights of the candidate sources and their bounds
+    rank_weight_cf: float = 1.0
+    rank_weight_content: float = 0.5
+    rank_weight_popularity: float = 0.1
+    candidates_per_source: int = 200
+    cf_neighbors: int = 100  # most similar users that contribute CF scores
+    recommendation_depth: int = 100  # ranked recommendations computed and stored per user (pages are served from these)
+    snapshot_dir: Optional[str] = None  # versioned recommendation snapshots written by refresh
+    snapshot_check_seconds: float = 1.0  # how often workers look for a new snapshot version
+    redis_url: Optional[str] = "redis://redis:6379/0"   # docker-compose service name; empty disables the cache
     cache_ttl_seconds: int = 600  # default TTL 10 minutes
+    invalidation_ttl_seconds: int = 86400  # how long an invalidated user bypasses older snapshots; cover the refresh interval
     debug: bool = True
+    trace_log_requests: bool = True  # structured per-request timing log line
+    profiler_enabled: bool = False  # expose POST /admin/profile
+    profiler_max_seconds: int = 60
 
     class Config:
         env_file = ".env"
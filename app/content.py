@@ -0,0 +1,69 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+class ContentIndex:
+    """
+    Precomputed content-based neighbors (subjects + description TF-IDF),
+    written by data-processing/build_content_index.py: for every book row
+    the top-N most similar rows and their cosine similarity. Recommending
+    is a few array lookups over those rows.
+    """
+
+    def __init__(self, work_ids: List[str], neighbors: np.ndarray, scores: np.ndarray):
+        self.work_ids = work_ids
+        self.index = {w: i for i, w in enumerate(work_ids)}
+        self.neighbors = neighbors
+        self.scores = scores
+
+    @classmethod
+    def load(cls, path: str) -> "ContentIndex":
+        with np.load(path) as data:
+            return cls(data["work_ids"].tolist(), data["neighbors"], data["scores"])
+
+    def __contains__(self, work_id: str) -> bool:
+        return work_id in self.index
+
+    def candidates(self, rated: Dict[str, float], n=200, item_filter=None) -> Tuple[List[str], np.ndarray]:
+        """
+        (work_ids, scores) of at most `n` books similar to the rated ones:
+        each neighbor scores similarity * rating, summed over the rated
+        books. Rated books are excluded; `item_filter` (see
+        recommender.ItemFilter) narrows the candidates first. Best first,
+        ties by row so results are deterministic.
+        """
+        rows = np.array([self.index[w] for w in rated if w in self.index], dtype=np.int64)
+        if len(rows) == 0:
+            return [], np.zeros(0)
+        weights = np.array([rated[self.work_ids[r]] for r in rows], dtype=np.float32)
+        cand = self.neighbors[rows].ravel()
+        cand_scores = (self.scores[rows] * weights[:, None]).ravel()
+        valid = cand >= 0
+        cand, inverse = np.unique(cand[valid], return_inverse=True)
+        totals = np.bincount(inverse, weights=cand_scores[valid], minlength=len(cand))
+
+        keep = ~np.isin(cand, rows)
+        if item_filter is not None:
+            keep &= item_filter([self.work_ids[c] for c in cand.tolist()])
+        cand, totals = cand[keep], totals[keep]
+        order = np.lexsort((cand, -totals))[:n]
+        return [self.work_ids[c] for c in cand[order].tolist()], totals[order]
+
+    def recommend(self, rated: Dict[str, float], top_k=10, item_filter=None) -> List[str]:
+        """Books most similar to the rated ones (see candidates)."""
+        return self.candidates(rated, top_k, item_filter)[0]
+
+    def similar(self, work_id: str, top_k=10, item_filter=None) -> List[str]:
+        """Books most similar to one seed book."""
+        return self.recommend({work_id: 1.0}, top_k, item_filter)
+
+@lru_cache(maxsize=1)
+def _load(path: str) -> ContentIndex:
+    return ContentIndex.load(path)
+
+def get_content_index() -> Optional[ContentIndex]:
+    """The configured neighbor table (loaded once), or None without content_index_path."""
+    if not settings.content_index_path:
+        return None
+    return _load(settings.content_index_path)
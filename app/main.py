@@ -1,16 +1,32 @@
+import logging
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from app.api import router
 from app.config import settings
-from app import cache
+from app import cache, catalog, content, service, tracing
+
+logging.basicConfig(level=logging.INFO)
 
 app = FastAPI(title="Recommendation Service")
 app.include_router(router)
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Per-request stage timings -> Server-Timing header + one structured log line
+    trace = tracing.start_trace(request.url.path)
+    response = await call_next(request)
+    response.headers["Server-Timing"] = trace.server_timing()
+    if settings.trace_log_requests:
+        trace.log(method=request.method, status=response.status_code)
+    return response
+
 @app.on_event("startup")
 async def startup_event():
     # establish Redis connection early
     await cache.get_redis()
+    # load the book catalog and content index (if configured) before the first request needs them
+    await service.run_in_executor(catalog.get_catalog)
+    await service.run_in_executor(content.get_content_index)
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=settings.debug)
@@ -0,0 +1,63 @@
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+# Buckets tuned for the request path: sub-millisecond cache hits up to
+# multi-second full-table scans / matrix builds.
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+ITEM_BUCKETS = (0, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+CACHE_OP_SECONDS = Histogram(
+    "reco_cache_op_seconds", "Redis cache operation latency", ["op"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "reco_cache_lookups_total", "Recommendation cache lookups by result", ["result"],
+)
+
+DYNAMODB_OP_SECONDS = Histogram(
+    "reco_dynamodb_op_seconds", "DynamoDB scan/query duration (all pages)", ["op"],
+    buckets=LATENCY_BUCKETS,
+)
+DYNAMODB_ITEMS_READ = Histogram(
+    "reco_dynamodb_items_read", "Items returned per DynamoDB scan/query", ["op"],
+    buckets=ITEM_BUCKETS,
+)
+
+MATRIX_BUILD_SECONDS = Histogram(
+    "reco_matrix_build_seconds", "Time to build the user x item matrix",
+    buckets=LATENCY_BUCKETS,
+)
+SCORING_SECONDS = Histogram(
+    "reco_scoring_seconds", "Time to compute similarities and item scores",
+    buckets=LATENCY_BUCKETS,
+)
+TOPK_SECONDS = Histogram(
+    "reco_topk_seconds", "Time to select the top-k items",
+    buckets=LATENCY_BUCKETS,
+)
+
+REFRESH_SECONDS = Histogram(
+    "reco_refresh_seconds", "Duration of a full recommendation refresh",
+    buckets=LATENCY_BUCKETS,
+)
+REFRESH_USERS = Counter(
+    "reco_refresh_users_total", "Users recomputed by background refreshes",
+)
+
+SNAPSHOT_LOOKUPS = Counter(
+    "reco_snapshot_lookups_total", "Recommendation snapshot lookups by result", ["result"],
+)
+SNAPSHOT_VERSION = Gauge(
+    "reco_snapshot_created_timestamp_seconds", "Creation time of the snapshot version being served",
+)
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "reco_executor_queue_depth", "Tasks submitted to the thread pool and not yet finished",
+)
+
+
+def render():
+    """Return (body, content_type) for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
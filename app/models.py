@@ -6,6 +6,25 @@ class Rating(BaseModel):
     work_id: str
     rating: float  # 1-5
 
+class BookDetails(BaseModel):
+    work_id: str
+    title: Optional[str] = None
+    authors: List[str] = []
+    subjects: List[str] = []
+    first_publish_year: Optional[int] = None
+    cover_id: Optional[int] = None
+    avg_rating: Optional[float] = None
+    rating_count: Optional[int] = None
+
 class RecommendationResponse(BaseModel):
     user_id: str
     recommendations: List[str]  # list of work_ids
+    books: Optional[List[BookDetails]] = None  # same order; only with a book catalog configured
+    scores: Optional[List[float]] = None  # ranking score of each work_id
+    offset: int = 0
+    next_offset: Optional[int] = None  # offset of the next page, if there is one
+
+class SimilarBooksResponse(BaseModel):
+    work_id: str
+    recommendations: List[str]  # list of work_ids, most similar first
+    books: Optional[List[BookDetails]] = None
@@ -0,0 +1,39 @@
+import collections
+import sys
+import threading
+import time
+
+_capture_lock = threading.Lock()
+
+def _collapse(frame) -> str:
+    # root-first "file:function;file:function" (flamegraph collapsed format)
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """
+    Sample the Python stacks of every other thread for `seconds` and return
+    them in collapsed-stack format ("stack count" per line), sorted by count.
+
+    Pure stdlib, so it works in the production image without py-spy. Raises
+    RuntimeError if another capture is already running.
+    """
+    if not _capture_lock.acquire(blocking=False):
+        raise RuntimeError("a profile capture is already running")
+    try:
+        own_id = threading.get_ident()
+        counts = collections.Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    counts[_collapse(frame)] += 1
+            time.sleep(interval)
+    finally:
+        _capture_lock.release()
+
+    return "\n".join(f"{stack} {count}" for stack, count in counts.most_common()) + "\n"
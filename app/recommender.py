@@ -1,6 +1,9 @@
-from typing import Dict, List
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
 import numpy as np
 from collections import defaultdict
+from scipy import sparse
+from app import metrics, tracing
 
 def build_matrix(ratings: List[Dict]):
     """
@@ -25,6 +28,21 @@ def build_matrix(ratings: List[Dict]):
         mat[users[r['user_id']], items[r['work_id']]] = float(r['rating'])
     return mat, users, items
 
+def load_rating_triplets(path: str) -> List[Dict]:
+    """
+    Load ratings from a triplet file written by
+    data-processing/update_book_ratings.py --triplets-out, in the same
+    {user_id, work_id, rating} form as storage.fetch_all_ratings.
+    Editions ("OL{n}M") stand in for users.
+    """
+    with np.load(path) as data:
+        user_ids = [f"OL{n}M" for n in data["user_nums"].tolist()]
+        work_ids = [f"OL{n}W" for n in data["work_nums"].tolist()]
+        return [
+            {'user_id': user_ids[u], 'work_id': work_ids[w], 'rating': r}
+            for u, w, r in zip(data["user_codes"].tolist(), data["work_codes"].tolist(), data["ratings"].tolist())
+        ]
+
 def cosine_similarity_matrix(mat: np.ndarray):
     """Compute pairwise user-user cosine similarity."""
     norms = np.linalg.norm(mat, axis=1)
@@ -33,38 +51,218 @@ def cosine_similarity_matrix(mat: np.ndarray):
     sim = (mat @ mat.T) / (norms[:, None] * norms[None, :])
     return sim
 
-def recommend_for_user(target_user: str, ratings: List[Dict], top_k=10) -> List[str]:
-    """Return list of work_ids recommended for target_user."""
-    if not ratings:
-        return []
-
-    mat, users_map, items_map = build_matrix(ratings)
-    if target_user not in users_map:
-        # cold user: fallback to most popular books
-        return most_popular_items(ratings, top_k)
-
-    sim = cosine_similarity_matrix(mat)
-    u_idx = users_map[target_user]
-    user_sims = sim[u_idx]
-
-    # weighted sum of other users' ratings
-    weighted = user_sims @ mat  # shape: (n_items,)
-    # zero out items already rated by user
-    user_rated = mat[u_idx] > 0
-    weighted[user_rated] = -np.inf
-
-    # get top indices
-    top_indices = np.argsort(-weighted)[:top_k]
-    # invert items_map to get work_ids
-    inv_items = {v: k for k, v in items_map.items()}
-    recs = []
-    for idx in top_indices:
-        if weighted[idx] == -np.inf:
+# Maps a list of work_ids to a boolean mask of the ones to keep (see catalog.BookFilter)
+ItemFilter = Callable[[List[str]], np.ndarray]
+
+# Blend weights of the candidate sources (see rank_candidates)
+DEFAULT_WEIGHTS = {"cf": 1.0, "content": 0.5, "popularity": 0.1}
+
+def top_candidates(scores: np.ndarray, n: int):
+    """Indices and scores of the (at most) n best finite scores, unordered."""
+    idx = np.flatnonzero(np.isfinite(scores))
+    if len(idx) > n:
+        idx = idx[np.argpartition(-scores[idx], n - 1)[:n]]
+    return idx, scores[idx]
+
+class RatingsIndex:
+    """
+    Sparse view of one ratings list, shared by every request ranked over
+    the same list (see ratings_index): the user x item matrix by user rows
+    (CSR) and by item columns (CSC), user norms and the popularity order of
+    all items. Scoring a user then touches only the rows of its co-raters
+    and nearest neighbors instead of the whole users x items matrix.
+    """
+
+    def __init__(self, ratings: List[Dict]):
+        users: Dict[str, int] = {}
+        items: Dict[str, int] = {}
+        rows, cols, vals = [], [], []
+        for r in ratings:
+            rows.append(users.setdefault(r['user_id'], len(users)))
+            cols.append(items.setdefault(r['work_id'], len(items)))
+            vals.append(float(r['rating']))
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        # A repeated (user, item) pair keeps its last rating, like build_matrix
+        _, last = np.unique((rows * len(items) + cols)[::-1], return_index=True)
+        keep = len(rows) - 1 - last
+
+        self.users_map = users
+        # items preserves insertion order, i.e. column order
+        self.item_ids = np.array(list(items))
+        self.by_user = sparse.csr_matrix(
+            (np.array(vals, dtype=float)[keep], (rows[keep], cols[keep])), shape=(len(users), len(items))
+        )
+        self.by_user.eliminate_zeros()
+        self.by_item = self.by_user.tocsc()
+        self.norms = np.sqrt(np.asarray(self.by_user.multiply(self.by_user).sum(axis=1)).ravel())
+
+        # Most rated first, ties by average rating (at most 5), then by column
+        counts = np.diff(self.by_item.indptr)
+        sums = np.asarray(self.by_item.sum(axis=0)).ravel()
+        self.popularity = counts + sums / np.maximum(counts, 1) / 10
+        self.popular_order = np.lexsort((np.arange(len(items)), -self.popularity))
+
+    def user_row(self, u_idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(item columns, ratings) of one user."""
+        a, b = self.by_user.indptr[u_idx], self.by_user.indptr[u_idx + 1]
+        return self.by_user.indices[a:b], self.by_user.data[a:b]
+
+_prepared: Optional[Tuple[List[Dict], RatingsIndex]] = None
+_prepare_lock = threading.Lock()
+
+def ratings_index(ratings: List[Dict]) -> RatingsIndex:
+    """
+    RatingsIndex of `ratings`, rebuilt only when a different list is passed
+    (a new ratings scan); requests over the same list share it. Concurrent
+    callers wait for one build instead of each building their own.
+    """
+    global _prepared
+    prepared = _prepared
+    if prepared is None or prepared[0] is not ratings:
+        with _prepare_lock:
+            prepared = _prepared
+            if prepared is None or prepared[0] is not ratings:
+                prepared = (ratings, RatingsIndex(ratings))
+                _prepared = prepared
+    return prepared[1]
+
+def _gather(m, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenated (indices, data) of some rows of a CSR (columns of a CSC) matrix, and each one's length."""
+    starts = m.indptr[rows]
+    lengths = m.indptr[rows + 1] - starts
+    pos = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+    return m.indices[pos], m.data[pos], lengths
+
+def cf_candidates(index: RatingsIndex, u_idx: int, item_filter: Optional[ItemFilter], n: int,
+                  neighbors: int):
+    """
+    User-based CF: scores from the `neighbors` most similar users only.
+    Only users sharing a rated item can be similar and only items those
+    neighbors rated can score, so the cost follows the co-raters' ratings,
+    not the size of the catalog. Returns (item columns, scores).
+    """
+    rated_cols, rated_vals = index.user_row(u_idx)
+    users, user_vals, lengths = _gather(index.by_item, rated_cols)
+    co_users, inverse = np.unique(users, return_inverse=True)
+    dots = np.bincount(inverse, weights=user_vals * np.repeat(rated_vals, lengths), minlength=len(co_users))
+    others = co_users != u_idx
+    co_users, dots = co_users[others], dots[others]
+    sims = dots / (index.norms[co_users] * index.norms[u_idx])
+    if len(sims) > neighbors:
+        # Ties at the cut go to the earlier user, so the neighbors are deterministic
+        nearest = np.lexsort((co_users, -sims))[:neighbors]
+        co_users, sims = co_users[nearest], sims[nearest]
+
+    items, item_vals, lengths = _gather(index.by_user, co_users)
+    cand, inverse = np.unique(items, return_inverse=True)
+    scores = np.bincount(inverse, weights=item_vals * np.repeat(sims, lengths), minlength=len(cand))
+    keep = ~np.isin(cand, rated_cols)
+    if item_filter is not None:
+        keep &= item_filter(index.item_ids[cand].tolist())
+    cand, scores = cand[keep], scores[keep]
+    idx, scores = top_candidates(scores, n)
+    return cand[idx], scores
+
+def popularity_candidates(index: RatingsIndex, rated_cols: np.ndarray,
+                          item_filter: Optional[ItemFilter], n: int):
+    """
+    Most popular items (see RatingsIndex): a walk down the precomputed
+    order that skips rated and filtered-out items and stops once `n` are
+    found. Returns (item columns, scores).
+    """
+    order = index.popular_order
+    picked = []
+    found = 0
+    start = 0
+    step = max(2 * n, 64)
+    while found < n and start < len(order):
+        block = order[start:start + step]
+        start += step
+        block = block[~np.isin(block, rated_cols)]
+        if item_filter is not None and len(block):
+            block = block[item_filter(index.item_ids[block].tolist())]
+        picked.append(block[:n - found])
+        found += len(picked[-1])
+        # Selective filters reject most items: look further each round
+        step *= 2
+    idx = np.concatenate(picked) if picked else np.zeros(0, dtype=np.int64)
+    return idx, index.popularity[idx]
+
+def rank_candidates(sources, weights: Dict[str, float], top_k: int) -> Tuple[List[str], List[float]]:
+    """
+    Blend candidate sets: each source's scores are scaled to [0, 1] by its
+    best score, multiplied by the source weight and summed per work_id.
+    sources: {name: (work_ids, scores)}. Returns (work_ids, blended scores).
+    """
+    ids, blended = [], []
+    for name, (work_ids, scores) in sources.items():
+        if not len(work_ids):
             continue
-        recs.append(inv_items[idx])
-    return recs
+        top = np.max(np.abs(scores))
+        ids.extend(work_ids)
+        blended.append(weights.get(name, 0.0) * (scores / top if top > 0 else scores))
+    if not ids:
+        return [], []
+    unique_ids, inverse = np.unique(np.array(ids), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.concatenate(blended), minlength=len(unique_ids))
+    # Best first; ties by work_id so results are deterministic
+    order = np.lexsort((unique_ids, -totals))[:top_k]
+    return unique_ids[order].tolist(), totals[order].tolist()
+
+def recommend_for_user(target_user: str, ratings: List[Dict], top_k=10, **kwargs) -> List[str]:
+    """Return list of work_ids recommended for target_user (see rank_for_user)."""
+    return rank_for_user(target_user, ratings, top_k, **kwargs)[0]
+
+def rank_for_user(target_user: str, ratings: List[Dict], top_k=10,
+                  item_filter: Optional[ItemFilter] = None, content_index=None,
+                  weights: Optional[Dict[str, float]] = None,
+                  candidates: int = 200, cf_neighbors: int = 100) -> Tuple[List[str], List[float]]:
+    """
+    Return (work_ids, scores) recommended for target_user, best first.
+
+    Candidate generation + ranking: each source (user CF, content neighbors
+    of the rated books when a content_index is given, popularity) returns at
+    most `candidates` items, and rank_candidates blends them with `weights`
+    (DEFAULT_WEIGHTS). Cold users only get the popularity source. The
+    ratings are indexed once per list (ratings_index), so a request costs
+    the target's neighborhood, not the size of the catalog.
+    """
+    if not ratings:
+        return [], []
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    with tracing.span("build", metrics.MATRIX_BUILD_SECONDS):
+        index = ratings_index(ratings)
+    item_ids = index.item_ids
+
+    sources = {}
+    with tracing.span("score", metrics.SCORING_SECONDS):
+        u_idx = index.users_map.get(target_user)
+        if u_idx is not None:
+            rated_cols, rated_vals = index.user_row(u_idx)
+        else:
+            rated_cols, rated_vals = np.zeros(0, dtype=np.int64), np.zeros(0)
+        if u_idx is not None and weights["cf"] > 0:
+            idx, scores = cf_candidates(index, u_idx, item_filter, candidates, cf_neighbors)
+            sources["cf"] = (item_ids[idx].tolist(), scores)
+        if u_idx is not None and content_index is not None and weights["content"] > 0:
+            sources["content"] = content_index.candidates(
+                {item_ids[j]: float(v) for j, v in zip(rated_cols.tolist(), rated_vals.tolist())},
+                candidates, item_filter,
+            )
+        if u_idx is None or weights["popularity"] > 0:
+            idx, scores = popularity_candidates(index, rated_cols, item_filter, candidates)
+            sources["popularity"] = (item_ids[idx].tolist(), scores)
+
+    with tracing.span("topk", metrics.TOPK_SECONDS):
+        if u_idx is None:
+            # cold user: popularity is the only source, whatever its weight
+            weights = {"popularity": 1.0}
+        return rank_candidates(sources, weights, top_k)
 
-def most_popular_items(ratings: List[Dict], top_k=10) -> List[str]:
+def most_popular_items(ratings: List[Dict], top_k=10,
+                       item_filter: Optional[ItemFilter] = None) -> List[str]:
     counts = {}
     sum_r = {}
     for r in ratings:
@@ -72,5 +270,8 @@ def most_popular_items(ratings: List[Dict], top_k=10) -> List[str]:
         counts[w] = counts.get(w, 0) + 1
         sum_r[w] = sum_r.get(w, 0) + float(r['rating'])
     # sort by count then avg rating
-    items = sorted(counts.keys(), key=lambda w: (-counts[w], -sum_r[w]/counts[w]))
+    items = list(counts)
+    if item_filter is not None:
+        items = [w for w, keep in zip(items, item_filter(items)) if keep]
+    items.sort(key=lambda w: (-counts[w], -sum_r[w]/counts[w]))
     return items[:top_k]
@@ -1,36 +1,123 @@
 import asyncio
-from app import storage, recommender, cache
+import contextvars
+import time
+from app import storage, recommender, cache, content, metrics, snapshots
+from app.config import settings
 
-def compute_recommendations_for_user_sync(user_id: str, limit: int = 10):
-    # Synchronous wrapper: fetch ratings and compute
+def _ranking_options():
+    return dict(
+        content_index=content.get_content_index(),
+        weights={
+            "cf": settings.rank_weight_cf,
+            "content": settings.rank_weight_content,
+            "popularity": settings.rank_weight_popularity,
+        },
+        candidates=settings.candidates_per_source,
+        cf_neighbors=settings.cf_neighbors,
+    )
+
+def compute_recommendations_for_user_sync(user_id: str, depth: int = 10, item_filter=None):
+    # Synchronous wrapper: fetch ratings and rank the top `depth` as a cache entry
     ratings = storage.fetch_all_ratings()
-    recs = recommender.recommend_for_user(user_id, ratings, top_k=limit)
-    return recs
+    work_ids, scores = recommender.rank_for_user(
+        user_id, ratings, top_k=depth, item_filter=item_filter, **_ranking_options()
+    )
+    return _entry(work_ids, scores, depth)
 
-async def get_recommendations(user_id: str, limit: int = 10):
-    # Try cache first
-    cached = await cache.get_cached_recommendations(user_id)
-    if cached:
-        return cached[:limit]
+def rank_user_sync(user_id: str, ratings, depth: int):
+    # (work_ids, scores) for one user over already fetched ratings (batch refresh)
+    return recommender.rank_for_user(user_id, ratings, top_k=depth, **_ranking_options())
 
-    # Compute (run sync in threadpool)
+async def run_in_executor(func, *args):
+    # Track how many tasks are waiting on / running in the default threadpool.
+    # Run inside a copy of the current context so tracing spans recorded in
+    # the worker thread land on the calling request's trace.
     loop = asyncio.get_event_loop()
-    recs = await loop.run_in_executor(None, compute_recommendations_for_user_sync, user_id, limit)
-    await cache.set_cached_recommendations(user_id, recs)
-    return recs
+    ctx = contextvars.copy_context()
+    with metrics.EXECUTOR_QUEUE_DEPTH.track_inprogress():
+        return await loop.run_in_executor(None, ctx.run, func, *args)
+
+def _entry(work_ids, scores, depth: int):
+    # Cache / snapshot entry: a ranked list and whether it holds every
+    # recommendation there is (fewer than `depth` were found)
+    return {"work_ids": work_ids, "scores": scores, "complete": len(work_ids) < depth}
+
+def _page(entry, offset: int, limit: int):
+    # (work_ids, scores, has_more) for one page of a ranked entry, or None if
+    # the entry is too shallow for it and must be recomputed deeper
+    if isinstance(entry, list):
+        # Entry cached before scores were stored
+        entry = {"work_ids": entry, "scores": None, "complete": False}
+    work_ids, scores = entry["work_ids"], entry["scores"]
+    end = offset + limit
+    if len(work_ids) < end and not entry["complete"]:
+        return None
+    return (
+        work_ids[offset:end],
+        scores[offset:end] if scores is not None else None,
+        len(work_ids) > end or not entry["complete"],
+    )
+
+async def get_recommendations(user_id: str, limit: int = 10, item_filter=None, offset: int = 0):
+    """
+    One page of user_id's ranked recommendations: (work_ids, scores,
+    has_more). Pages come from a ranked list of RECOMMENDATION_DEPTH items
+    (snapshot, then cache); only a page beyond that depth is recomputed,
+    with a list twice as deep as needed.
+
+    A filtered request (item_filter, a catalog.BookFilter) is ranked with the
+    filter applied and cached under the filter's key, so all of its pages
+    come from that one ranking rather than from the unfiltered list.
+    """
+    filter_key = item_filter.key if item_filter is not None else None
+
+    # Precomputed snapshot first: a hash lookup and a slice of a mapped file,
+    # skipped for a user invalidated since the snapshot's ratings were read
+    store = snapshots.get_store()
+    snapshot = store.current() if store is not None and item_filter is None else None
+    if snapshot is not None:
+        found = store.lookup(user_id, snapshot)
+        if found and not await cache.invalidated_since(user_id, snapshot.as_of):
+            page = _page(found, offset, limit)
+            if page is not None:
+                return page
+
+    # Then the cache
+    cached = await cache.get_cached_recommendations(user_id, filter_key)
+    if cached:
+        page = _page(cached, offset, limit)
+        if page is not None:
+            return page
+
+    # Compute (run sync in threadpool); going past the depth doubles it, so
+    # scrolling deeper costs a logarithmic number of recomputations
+    depth = max(settings.recommendation_depth, 2 * (offset + limit))
+    entry = await run_in_executor(compute_recommendations_for_user_sync, user_id, depth, item_filter)
+    await cache.set_cached_recommendations(user_id, entry, filter_key=filter_key)
+    return _page(entry, offset, limit)
 
 async def refresh_all_recommendations():
-    # Compute and pre-warm cache for all users (example: compute top for each distinct user in ratings)
-    ratings = storage.fetch_all_ratings()
-    users = set([r['user_id'] for r in ratings])
-    loop = asyncio.get_event_loop()
+    # Compute recommendations for each distinct user in ratings, publish them
+    # as a new snapshot version (if configured) and pre-warm the cache
+    start = time.perf_counter()
+    # A reused scan (ratings_scan_seconds) may be that much older
+    as_of = time.time() - settings.ratings_scan_seconds
+    ratings = await run_in_executor(storage.fetch_all_ratings)
+    # Index once up front; every user below is ranked over this index
+    await run_in_executor(recommender.ratings_index, ratings)
+    users = sorted(set([r['user_id'] for r in ratings]))
+    depth = settings.recommendation_depth
     tasks = []
     for u in users:
-        tasks.append(loop.run_in_executor(None, compute_recommendations_for_user_sync, u, 10))
+        tasks.append(run_in_executor(rank_user_sync, u, ratings, depth))
     results = await asyncio.gather(*tasks)
+    if settings.snapshot_dir:
+        await run_in_executor(
+            snapshots.write_snapshot, settings.snapshot_dir, dict(zip(users, results)), depth, 2, as_of
+        )
     # set into cache
-    i = 0
-    for u in users:
-        await cache.set_cached_recommendations(u, results[i])
-        i += 1
+    for u, (recs, scores) in zip(users, results):
+        await cache.set_cached_recommendations(u, _entry(recs, scores, depth))
+    metrics.REFRESH_USERS.inc(len(users))
+    metrics.REFRESH_SECONDS.observe(time.perf_counter() - start)
     return len(users)
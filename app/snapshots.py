@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app import metrics
+
+# Snapshot layout under settings.snapshot_dir:
+#
+#   CURRENT            name of the live version directory (replaced atomically)
+#   v<ns>/manifest.json   version, depth, user count, time the ratings were read
+#   v<ns>/user_hashes.npy uint64, sorted: 64-bit hash of each user_id
+#   v<ns>/items.npy       int32 (users x depth) item codes, -1 = padding
+#   v<ns>/scores.npy      float32 (users x depth) ranking scores
+#   v<ns>/item_ids.npy    str: work_id of each item code
+#
+# The .npy arrays are memory-mapped read-only, so opening a version is cheap
+# and every worker process shares the same pages. A lookup is one hash, a
+# binary search and a row slice.
+
+CURRENT = "CURRENT"
+
+def user_hash(user_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+class Snapshot:
+    """One read-only, memory-mapped snapshot version."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest["version"]
+        self.depth = self.manifest["depth"]
+        self.as_of = self.manifest.get("as_of", self.manifest["created"])
+        self._hashes = np.load(os.path.join(path, "user_hashes.npy"), mmap_mode="r")
+        self._items = np.load(os.path.join(path, "items.npy"), mmap_mode="r")
+        self._scores = np.load(os.path.join(path, "scores.npy"), mmap_mode="r")
+        self._item_ids = np.load(os.path.join(path, "item_ids.npy")).tolist()
+
+    def lookup(self, user_id: str) -> Optional[Dict]:
+        """
+        Ranked list of user_id in the service's cache format ({work_ids,
+        scores, complete}), or None if the user is not in the snapshot.
+        A row shorter than the depth holds every recommendation there is.
+        """
+        h = np.uint64(user_hash(user_id))
+        i = int(np.searchsorted(self._hashes, h))
+        if i >= len(self._hashes) or self._hashes[i] != h:
+            return None
+        codes = self._items[i]
+        n = int(np.count_nonzero(codes >= 0))
+        return {
+            "work_ids": [self._item_ids[c] for c in codes[:n].tolist()],
+            "scores": self._scores[i, :n].tolist(),
+            "complete": n < self.depth,
+        }
+
+class SnapshotStore:
+    """
+    Serves the live snapshot of a directory. The CURRENT pointer is checked
+    at most every `check_seconds`; when it names a new version, that version
+    is opened and swapped in with one reference assignment, so concurrent
+    lookups see either the old or the new version, never a mix.
+    """
+
+    def __init__(self, root: str, check_seconds: float = 1.0):
+        self.root = root
+        self.check_seconds = check_seconds
+        self._snapshot: Optional[Snapshot] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[Snapshot]:
+        now = time.monotonic()
+        if now - self._checked >= self.check_seconds:
+            with self._lock:
+                if now - self._checked >= self.check_seconds:
+                    self._checked = now
+                    self._refresh()
+        return self._snapshot
+
+    def _refresh(self):
+        try:
+            with open(os.path.join(self.root, CURRENT), "r", encoding="utf-8") as f:
+                name = f.read().strip()
+        except OSError:
+            return
+        if self._snapshot is not None and self._snapshot.version == name:
+            return
+        try:
+            self._snapshot = Snapshot(os.path.join(self.root, name))
+        except (OSError, ValueError, KeyError):
+            # A half-pruned or unreadable version: keep serving the old one
+            return
+        metrics.SNAPSHOT_VERSION.set(self._snapshot.manifest["created"])
+
+    def lookup(self, user_id: str, snapshot: Optional[Snapshot] = None) -> Optional[Dict]:
+        # `snapshot` pins the version a caller already fetched with current()
+        if snapshot is None:
+            snapshot = self.current()
+        result = snapshot.lookup(user_id) if snapshot is not None else None
+        metrics.SNAPSHOT_LOOKUPS.labels(result="hit" if result is not None else "miss").inc()
+        return result
+
+def write_snapshot(root: str, recs: Dict[str, Tuple[List[str], List[float]]], depth: int,
+                   keep: int = 2, as_of: Optional[float] = None) -> str:
+    """
+    Write recs ({user_id: (work_ids, scores)}, best first) as a new version
+    and make it live by replacing CURRENT. `as_of` is when the ratings
+    behind recs were read (default: now). Older versions beyond the newest
+    `keep` are removed; processes that still map them keep working, as
+    unlinked files stay readable. Returns the version name.
+    """
+    os.makedirs(root, exist_ok=True)
+    created = time.time()
+    if as_of is None:
+        as_of = created
+    version = f"v{time.time_ns()}"
+
+    item_codes: Dict[str, int] = {}
+    entries = sorted((user_hash(u), u) for u in recs)
+    hashes = np.array([h for h, _ in entries], dtype=np.uint64)
+    items = np.full((len(entries), depth), -1, dtype=np.int32)
+    scores = np.zeros((len(entries), depth), dtype=np.float32)
+    for row, (_, user_id) in enumerate(entries):
+        work_ids, user_scores = recs[user_id]
+        work_ids, user_scores = work_ids[:depth], user_scores[:depth]
+        items[row, :len(work_ids)] = [item_codes.setdefault(w, len(item_codes)) for w in work_ids]
+        scores[row, :len(user_scores)] = user_scores
+
+    tmp_dir = os.path.join(root, version + ".tmp")
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "user_hashes.npy"), hashes)
+    np.save(os.path.join(tmp_dir, "items.npy"), items)
+    np.save(os.path.join(tmp_dir, "scores.npy"), scores)
+    np.save(os.path.join(tmp_dir, "item_ids.npy"), np.array(list(item_codes), dtype=str))
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": version, "depth": depth, "users": len(entries), "created": created,
+                   "as_of": as_of}, f)
+    os.replace(tmp_dir, os.path.join(root, version))
+
+    pointer_tmp = os.path.join(root, CURRENT + ".tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(root, CURRENT))
+
+    versions = sorted(d for d in os.listdir(root) if d.startswith("v") and not d.endswith(".tmp"))
+    for old in versions[:-keep]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return version
+
+_store: Optional[SnapshotStore] = None
+
+def get_store() -> Optional[SnapshotStore]:
+    """The configured snapshot store, or None without snapshot_dir."""
+    global _store
+    if not settings.snapshot_dir:
+        return None
+    if _store is None or _store.root != settings.snapshot_dir:
+        _store = SnapshotStore(settings.snapshot_dir, settings.snapshot_check_seconds)
+    return _store
@@ -1,28 +1,65 @@
 import os
+import threading
+import time
 import boto3
-from typing import List, Dict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from app.config import settings
+from app import metrics, recommender, tracing
 
 # Use boto3 client/resource (sync). We can call it from async endpoints via threadpool.
 session = boto3.Session(region_name=settings.aws_region)
-dynamodb = session.resource('dynamodb')
+dynamodb = session.resource('dynamodb', endpoint_url=settings.dynamodb_endpoint_url)
 table = dynamodb.Table(settings.dynamodb_table)
 
-def fetch_all_ratings() -> List[Dict]:
-    """Scan DynamoDB table and return all items (simple for demo)."""
+@lru_cache(maxsize=1)
+def _triplet_ratings(path: str) -> List[Dict]:
+    return recommender.load_rating_triplets(path)
+
+# Last DynamoDB scan and when it was taken (see settings.ratings_scan_seconds)
+_last_scan: Tuple[float, Optional[List[Dict]]] = (0.0, None)
+_scan_lock = threading.Lock()
+
+def _scan_all_ratings() -> List[Dict]:
     items = []
-    response = table.scan()
-    items.extend(response.get('Items', []))
-    while 'LastEvaluatedKey' in response:
-        response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
+    with tracing.span("storage", metrics.DYNAMODB_OP_SECONDS.labels(op="scan_all")):
+        response = table.scan()
         items.extend(response.get('Items', []))
+        while 'LastEvaluatedKey' in response:
+            response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
+            items.extend(response.get('Items', []))
+    metrics.DYNAMODB_ITEMS_READ.labels(op="scan_all").observe(len(items))
     return items
 
+def fetch_all_ratings() -> List[Dict]:
+    """
+    Scan DynamoDB table and return all items (simple for demo). With
+    ratings_scan_seconds, one scan is shared by every call in that window,
+    so the recommender indexes it once (recommender.ratings_index).
+    """
+    global _last_scan
+    if settings.ratings_triplets_path:
+        # Bootstrap mode: ratings come from an Open Library triplet file
+        return _triplet_ratings(settings.ratings_triplets_path)
+    if settings.ratings_scan_seconds <= 0:
+        return _scan_all_ratings()
+    with _scan_lock:
+        taken, items = _last_scan
+        if items is None or time.monotonic() - taken >= settings.ratings_scan_seconds:
+            items = _scan_all_ratings()
+            _last_scan = (time.monotonic(), items)
+        return items
+
 def fetch_user_ratings(user_id: str) -> List[Dict]:
     """Query or scan for ratings by a user. Adjust if you have a GSI."""
+    if settings.ratings_triplets_path:
+        return [r for r in _triplet_ratings(settings.ratings_triplets_path) if r['user_id'] == user_id]
     # Simple scan filter for demo; for prod use GSI keyed on user_id.
-    response = table.scan(
-        FilterExpression="user_id = :uid",
-        ExpressionAttributeValues={':uid': user_id}
-    )
-    return response.get('Items', [])
+    with tracing.span("storage", metrics.DYNAMODB_OP_SECONDS.labels(op="scan_user")):
+        response = table.scan(
+            FilterExpression="user_id = :uid",
+            ExpressionAttributeValues={':uid': user_id}
+        )
+    items = response.get('Items', [])
+    metrics.DYNAMODB_ITEMS_READ.labels(op="scan_user").observe(len(items))
+    return items
@@ -0,0 +1,60 @@
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("app.tracing")
+
+_current_trace = contextvars.ContextVar("reco_trace", default=None)
+
+class Trace:
+    """Collects per-request stage timings (spans) in the order they finish."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.spans = []  # (span name, seconds)
+
+    def add(self, name: str, seconds: float):
+        self.spans.append((name, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """Render spans as a Server-Timing header value (durations in ms)."""
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+    def log(self, **fields):
+        record = {"trace": self.name, "total_ms": round(self.elapsed() * 1000, 2)}
+        record.update(fields)
+        record["spans_ms"] = [[name, round(seconds * 1000, 2)] for name, seconds in self.spans]
+        logger.info(json.dumps(record))
+
+def start_trace(name: str) -> Trace:
+    trace = Trace(name)
+    _current_trace.set(trace)
+    return trace
+
+def current_trace():
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, histogram=None):
+    """
+    Time a stage of the current request. Also observes `histogram` (a
+    Prometheus Histogram) when given, so call sites only time things once.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(seconds)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, seconds)
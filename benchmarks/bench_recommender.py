@@ -0,0 +1,226 @@
+"""
+Benchmark the recommender hot path on synthetic datasets.
+
+Times build_matrix, cosine_similarity_matrix, RatingsIndex,
+recommend_for_user, most_popular_items and refresh_all_recommendations at
+several scales, records peak traced memory for each, and writes a JSON
+report that can be diffed between commits with benchmarks/compare.py.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_recommender --scales 10k,100k --output bench.json
+    python -m benchmarks.bench_recommender --scales 10m --max-dense-gb 64
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app import recommender
+from benchmarks.synthetic import SCALES, generate_scale
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(fn: Callable, repeats: int) -> Dict:
+    """
+    Time `fn` `repeats` times, then run it once more under tracemalloc for the
+    peak. Timing runs are kept separate because tracing slows Python code.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": "ok",
+        "seconds_min": round(min(timings), 6),
+        "seconds_median": round(statistics.median(timings), 6),
+        "repeats": repeats,
+        "peak_bytes": peak,
+    }
+
+
+@contextlib.contextmanager
+def in_memory_backends(ratings: List[Dict]):
+    """Point service at an in-memory ratings list and a dict cache."""
+    from app import cache, service, storage
+
+    store: Dict[str, list] = {}
+
+    async def set_cached(user_id, recs, ttl=None, filter_key=None):
+        store[user_id if filter_key is None else (user_id, filter_key)] = recs
+
+    saved = (storage.fetch_all_ratings, cache.set_cached_recommendations)
+    storage.fetch_all_ratings = lambda: ratings
+    cache.set_cached_recommendations = set_cached
+    try:
+        yield service
+    finally:
+        storage.fetch_all_ratings, cache.set_cached_recommendations = saved
+
+
+def pick_users(ratings: List[Dict]) -> Dict[str, str]:
+    """Heaviest, median and lightest user by rating count, plus a cold user."""
+    counts: Dict[str, int] = {}
+    for r in ratings:
+        counts[r["user_id"]] = counts.get(r["user_id"], 0) + 1
+    ordered = sorted(counts, key=lambda u: (-counts[u], u))
+    return {
+        "heavy": ordered[0],
+        "median": ordered[len(ordered) // 2],
+        "light": ordered[-1],
+        "cold": "__cold_user__",
+    }
+
+
+def bench_scale(name: str, ratings: List[Dict], args) -> List[Dict]:
+    actual_users = len({r["user_id"] for r in ratings})
+    actual_items = len({r["work_id"] for r in ratings})
+
+    base = {
+        "scale": name,
+        "n_ratings": len(ratings),
+        "n_users": actual_users,
+        "n_items": actual_items,
+    }
+    results: List[Dict] = []
+
+    def record(op: str, fn: Callable, skip_reason: str = ""):
+        row = dict(base, op=op)
+        if skip_reason:
+            row.update(status="skipped", reason=skip_reason)
+        else:
+            try:
+                row.update(measure(fn, args.repeats))
+            except MemoryError:
+                row.update(status="error", reason="MemoryError")
+        results.append(row)
+        detail = row.get("seconds_median", row.get("reason"))
+        print(f"[{name}] {op:<32} {row['status']:<8} {detail}")
+
+    # Dense float64 matrices: user x item for build, user x user for similarity
+    limit_bytes = args.max_dense_gb * 1024 ** 3
+    matrix_bytes = actual_users * actual_items * 8
+    sim_bytes = actual_users * actual_users * 8
+    too_big = ""
+    if matrix_bytes > limit_bytes:
+        too_big = f"user x item matrix needs {matrix_bytes / 1024 ** 3:.1f} GiB"
+    elif sim_bytes > limit_bytes:
+        too_big = f"user x user similarity needs {sim_bytes / 1024 ** 3:.1f} GiB"
+
+    record("most_popular_items", lambda: recommender.most_popular_items(ratings, 10))
+
+    record(
+        "build_matrix",
+        lambda: recommender.build_matrix(ratings),
+        too_big if matrix_bytes > limit_bytes else "",
+    )
+
+    if too_big:
+        record("cosine_similarity_matrix", None, too_big)
+    else:
+        mat, _, _ = recommender.build_matrix(ratings)
+        record("cosine_similarity_matrix", lambda: recommender.cosine_similarity_matrix(mat))
+        del mat
+
+    # Scoring uses the sparse RatingsIndex, built once per ratings list; the
+    # per-user timings below are for requests over an already indexed list
+    record("ratings_index", lambda: recommender.RatingsIndex(ratings))
+    recommender.ratings_index(ratings)
+    for label, user_id in pick_users(ratings).items():
+        record(
+            f"recommend_for_user[{label}]",
+            lambda u=user_id: recommender.recommend_for_user(u, ratings, top_k=10),
+        )
+
+    refresh_reason = ""
+    if actual_users > args.max_refresh_users:
+        refresh_reason = f"{actual_users:,} users > --max-refresh-users"
+    with in_memory_backends(ratings) as service:
+        record(
+            "refresh_all_recommendations",
+            lambda: asyncio.run(service.refresh_all_recommendations()),
+            refresh_reason,
+        )
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the recommender on synthetic data.")
+    parser.add_argument("--scales", default="10k,100k,1m",
+                        help=f"Comma-separated scales from {', '.join(SCALES)} (default: 10k,100k,1m)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per operation (default: 3)")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset seed (default: 42)")
+    parser.add_argument("--max-dense-gb", type=float, default=4.0,
+                        help="Skip ops whose dense matrices would exceed this size (default: 4)")
+    parser.add_argument("--max-refresh-users", type=int, default=2_000,
+                        help="Skip refresh_all_recommendations above this many users (default: 2000)")
+    parser.add_argument("--triplets",
+                        help="Also benchmark Open Library ratings from an update_book_ratings.py "
+                             "--triplets-out file (reported as scale 'ol')")
+    parser.add_argument("--output", default="bench_recommender.json", help="JSON report path")
+    args = parser.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scales: {', '.join(unknown)}")
+
+    results: List[Dict] = []
+    for name in scales:
+        n_ratings, n_users, n_items = SCALES[name]
+        print(f"[{name}] generating {n_ratings:,} ratings ({n_users:,} users x {n_items:,} items)...")
+        results.extend(bench_scale(name, generate_scale(name, seed=args.seed), args))
+    if args.triplets:
+        print(f"[ol] loading rating triplets from {args.triplets}...")
+        results.extend(bench_scale("ol", recommender.load_rating_triplets(args.triplets), args))
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "triplets": args.triplets,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
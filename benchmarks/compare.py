@@ -0,0 +1,49 @@
+"""
+Compare two benchmark reports produced by bench_recommender.py.
+
+Usage:
+
+    python -m benchmarks.compare before.json after.json
+"""
+
+import json
+import sys
+
+
+def load_rows(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return {(r["scale"], r["op"]): r for r in report["results"]}
+
+
+def fmt_bytes(n: int) -> str:
+    return f"{n / 1024 ** 2:,.1f}M"
+
+
+def main() -> None:
+    if len(sys.argv) != 3:
+        print("Usage: python -m benchmarks.compare <before.json> <after.json>")
+        sys.exit(1)
+
+    before = load_rows(sys.argv[1])
+    after = load_rows(sys.argv[2])
+
+    print(f"{'scale':<6} {'op':<34} {'before':>10} {'after':>10} {'speedup':>8} {'peak before':>12} {'peak after':>12}")
+    for key in sorted(set(before) | set(after)):
+        b, a = before.get(key), after.get(key)
+        scale, op = key
+        if not (b and a and b["status"] == "ok" and a["status"] == "ok"):
+            status_b = b["status"] if b else "-"
+            status_a = a["status"] if a else "-"
+            print(f"{scale:<6} {op:<34} {status_b:>10} {status_a:>10}")
+            continue
+        tb, ta = b["seconds_median"], a["seconds_median"]
+        speedup = tb / ta if ta > 0 else float("inf")
+        print(
+            f"{scale:<6} {op:<34} {tb:>10.4f} {ta:>10.4f} {speedup:>7.2f}x "
+            f"{fmt_bytes(b['peak_bytes']):>12} {fmt_bytes(a['peak_bytes']):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
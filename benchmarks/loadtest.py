@@ -0,0 +1,326 @@
+"""
+End-to-end load test for GET /recommendations/{user_id}.
+
+Ratings are synthesized over the book ids of a pipeline JSONL output (more
+ratings for books with a higher rating_count), then requests are driven at a
+fixed concurrency with a configurable cache hit ratio.
+
+Backends:
+
+  fake   The app runs in-process with in-memory storage and cache stand-ins.
+         Measures application cost only; needs no containers.
+
+  local  Ratings are seeded into dynamodb-local and the app talks to a real
+         Redis. The app is booted with uvicorn unless --url points at an
+         already running instance.
+
+Usage (from the repository root):
+
+    python -m benchmarks.loadtest --books books_english_top50k_with_ratings.jsonl \\
+        --backend fake --requests 2000 --concurrency 32 --hit-ratio 0.9
+
+    docker compose up -d redis dynamodb
+    python -m benchmarks.loadtest --books books.jsonl --backend local \\
+        --dynamodb-endpoint http://localhost:8001 --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.synthetic import generate_ratings
+
+
+def load_book_ids(path: str, max_books: int) -> List[str]:
+    """Book ids from a pipeline JSONL file, most-rated first."""
+    books = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                book = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            book_id = book.get("book_id") or book.get("key")
+            if book_id:
+                books.append((book.get("rating_count", 0), book_id))
+    books.sort(key=lambda b: b[0], reverse=True)
+    return [book_id for _, book_id in books[:max_books]]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def summarize(latencies: List[float]) -> Dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class FakeBackend:
+    """In-process app with storage and cache replaced by in-memory stand-ins."""
+
+    def __init__(self, ratings: List[Dict]):
+        from app import cache, storage
+        from app.config import settings
+
+        settings.trace_log_requests = False
+        self.store: Dict[str, list] = {}
+
+        async def get_cached(user_id, filter_key=None):
+            return self.store.get(user_id if filter_key is None else (user_id, filter_key))
+
+        async def set_cached(user_id, recs, ttl=None, filter_key=None):
+            self.store[user_id if filter_key is None else (user_id, filter_key)] = recs
+
+        storage.fetch_all_ratings = lambda: ratings
+        cache.get_cached_recommendations = get_cached
+        cache.set_cached_recommendations = set_cached
+
+    @contextlib.asynccontextmanager
+    async def client(self):
+        from app.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            yield client
+
+    async def evict(self, user_id: str):
+        self.store.pop(user_id, None)
+
+
+class LocalBackend:
+    """dynamodb-local + Redis, with the app booted via uvicorn or given by --url."""
+
+    def __init__(self, args, ratings: List[Dict]):
+        self.args = args
+        self.ratings = ratings
+        self.proc: Optional[subprocess.Popen] = None
+        self.url = args.url
+        self.redis = None
+
+    def seed(self):
+        import boto3
+
+        dynamodb = boto3.resource(
+            "dynamodb",
+            endpoint_url=self.args.dynamodb_endpoint,
+            region_name="us-west-2",
+            aws_access_key_id="local",
+            aws_secret_access_key="local",
+        )
+        existing = [t.name for t in dynamodb.tables.all()]
+        if self.args.table in existing:
+            dynamodb.Table(self.args.table).delete()
+            dynamodb.meta.client.get_waiter("table_not_exists").wait(TableName=self.args.table)
+        table = dynamodb.create_table(
+            TableName=self.args.table,
+            KeySchema=[
+                {"AttributeName": "user_id", "KeyType": "HASH"},
+                {"AttributeName": "work_id", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "user_id", "AttributeType": "S"},
+                {"AttributeName": "work_id", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        table.wait_until_exists()
+
+        print(f"Seeding {len(self.ratings):,} ratings into {self.args.table} ...")
+        with table.batch_writer() as batch:
+            for r in self.ratings:
+                batch.put_item(Item=r)
+
+    def boot(self):
+        port = self.args.port
+        env = dict(
+            os.environ,
+            DYNAMODB_ENDPOINT_URL=self.args.dynamodb_endpoint,
+            DYNAMODB_TABLE=self.args.table,
+            REDIS_URL=self.args.redis_url,
+            AWS_ACCESS_KEY_ID=os.environ.get("AWS_ACCESS_KEY_ID", "local"),
+            AWS_SECRET_ACCESS_KEY=os.environ.get("AWS_SECRET_ACCESS_KEY", "local"),
+            DEBUG="false",
+            TRACE_LOG_REQUESTS="false",
+        )
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--port", str(port), "--workers", str(self.args.workers), "--log-level", "warning"],
+            env=env,
+        )
+        self.url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.url}/metrics", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.25)
+        raise RuntimeError("app did not become ready within 30s")
+
+    @contextlib.asynccontextmanager
+    async def client(self):
+        import aioredis
+
+        self.redis = await aioredis.from_url(self.args.redis_url, decode_responses=True)
+        limits = httpx.Limits(max_connections=self.args.concurrency)
+        async with httpx.AsyncClient(base_url=self.url, limits=limits, timeout=60) as client:
+            yield client
+        await self.redis.close()
+
+    async def evict(self, user_id: str):
+        await self.redis.delete(f"reco:{user_id}")
+
+    def close(self):
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+async def drive(backend, user_ids: List[str], args) -> Dict:
+    rng = random.Random(args.seed)
+    rng.shuffle(user_ids)
+    n_warm = max(1, int(len(user_ids) * args.warm_fraction))
+    warm_users = user_ids[:n_warm]
+
+    latencies: Dict[str, List[float]] = {"all": [], "hit": [], "miss": []}
+    errors = 0
+    next_request = 0
+
+    async with backend.client() as client:
+        print(f"Warming cache for {len(warm_users):,} users ...")
+        for u in warm_users:
+            await client.get(f"/recommendations/{u}", params={"limit": args.limit})
+
+        async def worker():
+            nonlocal next_request, errors
+            while next_request < args.requests:
+                next_request += 1
+                user_id = rng.choice(warm_users)
+                want_hit = rng.random() < args.hit_ratio
+                if not want_hit:
+                    await backend.evict(user_id)
+
+                start = time.perf_counter()
+                resp = await client.get(f"/recommendations/{user_id}", params={"limit": args.limit})
+                elapsed = time.perf_counter() - start
+
+                if resp.status_code != 200:
+                    errors += 1
+                    continue
+                latencies["all"].append(elapsed)
+                # Server-Timing carries a "build" span only when recommendations were computed
+                computed = "build;" in resp.headers.get("server-timing", "")
+                latencies["miss" if computed else "hit"].append(elapsed)
+
+        print(f"Driving {args.requests:,} requests at concurrency {args.concurrency} "
+              f"(target hit ratio {args.hit_ratio:.0%}) ...")
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        wall = time.perf_counter() - start
+
+    completed = len(latencies["all"])
+    return {
+        "backend": args.backend,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "target_hit_ratio": args.hit_ratio,
+        "observed_hit_ratio": round(len(latencies["hit"]) / completed, 4) if completed else 0.0,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(completed / wall, 2) if wall > 0 else 0.0,
+        "latency": {name: summarize(values) for name, values in latencies.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test GET /recommendations/{user_id}.")
+    parser.add_argument("--books", required=True, help="Pipeline JSONL output providing book ids")
+    parser.add_argument("--backend", choices=["fake", "local"], default="fake")
+    parser.add_argument("--max-books", type=int, default=5_000, help="Books to rate (default: 5000)")
+    parser.add_argument("--ratings", type=int, default=50_000, help="Synthetic ratings (default: 50000)")
+    parser.add_argument("--users", type=int, default=2_000, help="Synthetic users (default: 2000)")
+    parser.add_argument("--requests", type=int, default=2_000, help="Measured requests (default: 2000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (default: 16)")
+    parser.add_argument("--hit-ratio", type=float, default=0.9, help="Target cache hit ratio (default: 0.9)")
+    parser.add_argument("--warm-fraction", type=float, default=0.2,
+                        help="Fraction of users requested during the run (default: 0.2)")
+    parser.add_argument("--limit", type=int, default=10, help="Recommendations per request")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="Running app to target (local backend); booted if omitted")
+    parser.add_argument("--port", type=int, default=8100, help="Port when booting the app (default: 8100)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when booting the app")
+    parser.add_argument("--dynamodb-endpoint", default="http://localhost:8001")
+    parser.add_argument("--table", default="book_ratings_loadtest")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--output", help="Optional JSON report path")
+    args = parser.parse_args()
+
+    # app.main configures INFO logging; keep per-request client logs out of the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    book_ids = load_book_ids(args.books, args.max_books)
+    if not book_ids:
+        parser.error(f"no book ids found in {args.books}")
+    print(f"Loaded {len(book_ids):,} book ids from {args.books}")
+
+    ratings = generate_ratings(args.ratings, args.users, len(book_ids), seed=args.seed, item_ids=book_ids)
+    user_ids = sorted({r["user_id"] for r in ratings})
+    print(f"Generated {len(ratings):,} ratings for {len(user_ids):,} users")
+
+    if args.backend == "fake":
+        backend = FakeBackend(ratings)
+    else:
+        backend = LocalBackend(args, ratings)
+        backend.seed()
+        if not args.url:
+            backend.boot()
+
+    try:
+        report = asyncio.run(drive(backend, user_ids, args))
+    finally:
+        if args.backend == "local":
+            backend.close()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Synthetic rating datasets with power-law user activity and item popularity.
+
+Real rating data is heavily skewed: a few users rate a lot and a few books
+receive most of the ratings. Both sides are drawn from Zipf-like
+distributions so that matrix shapes and sparsity resemble production.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# name -> (n_ratings, n_users, n_items)
+SCALES = {
+    "10k": (10_000, 500, 1_000),
+    "100k": (100_000, 5_000, 5_000),
+    "1m": (1_000_000, 50_000, 20_000),
+    "10m": (10_000_000, 500_000, 50_000),
+}
+
+
+def zipf_weights(n: int, exponent: float) -> np.ndarray:
+    """Normalized rank-frequency weights 1 / rank**exponent."""
+    ranks = np.arange(1, n + 1, dtype=np.float64)
+    w = ranks ** -exponent
+    return w / w.sum()
+
+
+def generate_ratings(
+    n_ratings: int,
+    n_users: int,
+    n_items: int,
+    user_exponent: float = 0.9,
+    item_exponent: float = 1.1,
+    seed: int = 42,
+    item_ids: Optional[List[str]] = None,
+) -> List[Dict]:
+    """
+    Generate up to `n_ratings` unique (user, work, rating) records in the
+    shape returned by `storage.fetch_all_ratings`.
+
+    `item_ids`, if given, names the items in popularity order (most popular
+    first) instead of the synthetic "OL<rank>W" ids.
+
+    Duplicate (user, item) draws are dropped, so the result can be slightly
+    smaller than requested for very dense configurations.
+    """
+    rng = np.random.default_rng(seed)
+
+    users = rng.choice(n_users, size=n_ratings, p=zipf_weights(n_users, user_exponent))
+    items = rng.choice(n_items, size=n_ratings, p=zipf_weights(n_items, item_exponent))
+
+    pair_codes = np.unique(users.astype(np.int64) * n_items + items)
+    users = pair_codes // n_items
+    items = pair_codes % n_items
+    # Shuffle so ids do not arrive grouped by user
+    order = rng.permutation(len(pair_codes))
+    users = users[order]
+    items = items[order]
+
+    # Ratings skew positive, like most review datasets
+    stars = rng.choice(5, size=len(pair_codes), p=[0.05, 0.08, 0.2, 0.35, 0.32]) + 1
+
+    if item_ids is None:
+        item_ids = [f"OL{i}W" for i in range(n_items)]
+
+    return [
+        {"user_id": f"U{u}", "work_id": item_ids[i], "rating": int(r)}
+        for u, i, r in zip(users.tolist(), items.tolist(), stars.tolist())
+    ]
+
+
+def generate_scale(name: str, seed: int = 42) -> List[Dict]:
+    n_ratings, n_users, n_items = SCALES[name]
+    return generate_ratings(n_ratings, n_users, n_items, seed=seed)
@@ -1,16 +1,334 @@
 """
 Analyze book data and generate statistics.
 
+Statistics are built by streaming accumulators that can be merged, so a
+file is read once, memory stays bounded however many records it holds, and
+with --workers > 1 line-aligned chunks of a JSONL file are analyzed in a
+process pool and merged in file order:
+
+  counters     languages, title prefixes, decades, rating_count buckets
+  summaries    min / max / sum style statistics (years, authors, ratings)
+  TopK         bounded heaps for the most rated / best rated books
+  BoundedCounter  top subjects, keeping the heaviest entries only
+  DistinctCounter approximate distinct authors and subjects (HyperLogLog)
+
 Usage:
     python3 analyze_data.py books_english_50k.jsonl
+    python3 analyze_data.py books_english_top2m.jsonl --workers 0
+    python3 analyze_data.py books_english_50k.npz    # columnar copy (--columnar)
 """
 
-import json
+import argparse
+import hashlib
+import heapq
+import os
 import sys
 from collections import Counter
+from typing import Any, Iterable, List, Tuple
+
+import numpy as np
+
+from book_columns import is_columnar, iter_books
+from dump_io import JSONDecodeError, chunk_lines, iter_line_chunks, loads, map_chunks
+
+# Fields the analysis reads; a columnar input only loads these columns.
+ANALYSIS_COLUMNS = (
+    "book_id", "title", "title_prefix", "authors", "isbn_13",
+    "first_publish_year", "subjects", "language", "avg_rating", "rating_count",
+)
+
+# Distinct subjects tracked exactly before the rarest are dropped
+SUBJECT_CAPACITY = 50_000
+
+# rating_count buckets: (name, upper bound inclusive)
+RATING_COUNT_BUCKETS = (("1-5", 5), ("6-20", 20), ("21-100", 100), ("100+", None))
+
+
+# ---------------------------------------------------------------------------
+# Mergeable accumulators
+# ---------------------------------------------------------------------------
+
+class TopK:
+    """
+    The k largest (key, position) entries with a payload, in a min-heap.
+    Positions break ties in favour of earlier records, like a stable sort.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap: List[Tuple[Any, int, Any]] = []
+
+    def add(self, key, position: int, payload) -> None:
+        entry = (key, -position, payload)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def merge(self, other: "TopK") -> None:
+        for key, neg_position, payload in other.heap:
+            self.add(key, -neg_position, payload)
+
+    def items(self) -> list:
+        """Payloads, largest key first."""
+        return [payload for _, _, payload in sorted(self.heap, key=lambda e: e[:2], reverse=True)]
+
+
+class BoundedCounter:
+    """
+    Counter that keeps at most about 2 * `capacity` keys: when it grows past
+    that, only the `capacity` most common survive. Counts of frequent keys
+    stay exact unless they were once pruned, so top-N lists with N far below
+    the capacity are reliable while memory stays bounded.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = Counter()
+
+    def _prune(self) -> None:
+        if len(self.counts) > 2 * self.capacity:
+            self.counts = Counter(dict(self.counts.most_common(self.capacity)))
+
+    def update(self, items: Iterable) -> None:
+        self.counts.update(items)
+        self._prune()
+
+    def merge(self, other: "BoundedCounter") -> None:
+        self.counts.update(other.counts)
+        self._prune()
+
+    def most_common(self, n: int) -> list:
+        return self.counts.most_common(n)
 
 
-def analyze_books(filename):
+class DistinctCounter:
+    """
+    Approximate distinct count (HyperLogLog, 2**precision registers,
+    about 1.04 / sqrt(2**precision) relative error: 0.8% at precision 14).
+    Merging takes the register-wise maximum.
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+        self._pending: List[bytes] = []
+
+    def add(self, value: str) -> None:
+        self._pending.append(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest())
+        if len(self._pending) >= 65536:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        hashes = np.frombuffer(b"".join(self._pending), dtype="<u8")
+        self._pending = []
+        rest_bits = 64 - self.precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        # Rank = position of the leftmost 1 bit in `rest` (rest_bits + 1 if none);
+        # rest < 2**53, so the float conversion in frexp is exact
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (rest_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "DistinctCounter") -> None:
+        self._flush()
+        other._flush()
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        self._flush()
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small range correction: linear counting
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+    def __getstate__(self):
+        # Pool workers return their accumulators pickled; hash pending values first
+        self._flush()
+        return self.__dict__
+
+
+class BookStats:
+    """All statistics of analyze_books for one stretch of the input."""
+
+    def __init__(self):
+        self.lines = 0
+        self.total = 0
+        self.languages = Counter()
+        self.prefixes = Counter()
+        self.samples: List[dict] = []
+
+        self.year_count = 0
+        self.year_sum = 0
+        self.year_min = None
+        self.year_max = None
+        self.decades = Counter()
+
+        self.subjects = BoundedCounter(SUBJECT_CAPACITY)
+        self.distinct_subjects = DistinctCounter()
+        self.distinct_authors = DistinctCounter()
+
+        self.author_total = 0
+        self.author_max = 0
+        self.single_author = 0
+        self.multi_author = 0
+
+        self.has_isbn = 0
+        self.has_subjects = 0
+
+        self.num_rated = 0
+        self.rating_sum = 0.0
+        self.rating_min = None
+        self.rating_max = None
+        self.rating_buckets = Counter()
+        self.top_by_count = TopK(10)
+        self.top_by_avg = TopK(10)
+
+    def add(self, book: dict, position: int) -> None:
+        """Add one record; `position` orders records across chunks."""
+        self.total += 1
+        self.languages[book.get("language", "unknown")] += 1
+        self.prefixes[book.get("title_prefix", "?")] += 1
+        if len(self.samples) < 3:
+            self.samples.append(book)
+
+        year = book.get("first_publish_year")
+        if year is not None:
+            self.year_count += 1
+            self.year_sum += year
+            self.year_min = year if self.year_min is None else min(self.year_min, year)
+            self.year_max = year if self.year_max is None else max(self.year_max, year)
+            self.decades[(year // 10) * 10] += 1
+
+        subjects = book.get("subjects", [])
+        if subjects:
+            self.has_subjects += 1
+            self.subjects.update(subjects)
+            for subject in subjects:
+                self.distinct_subjects.add(subject)
+
+        authors = book.get("authors", [])
+        self.author_total += len(authors)
+        self.author_max = max(self.author_max, len(authors))
+        self.single_author += len(authors) == 1
+        self.multi_author += len(authors) > 1
+        for author in authors:
+            if isinstance(author, dict) and author.get("author_id"):
+                self.distinct_authors.add(author["author_id"])
+
+        if book.get("isbn_13"):
+            self.has_isbn += 1
+
+        rating_count = book.get("rating_count", 0)
+        if rating_count > 0:
+            avg_rating = book.get("avg_rating", 0.0)
+            self.num_rated += 1
+            self.rating_sum += avg_rating
+            self.rating_min = avg_rating if self.rating_min is None else min(self.rating_min, avg_rating)
+            self.rating_max = avg_rating if self.rating_max is None else max(self.rating_max, avg_rating)
+            for name, upper in RATING_COUNT_BUCKETS:
+                if upper is None or rating_count <= upper:
+                    self.rating_buckets[name] += 1
+                    break
+
+            summary = {
+                "title": book.get("title", ""),
+                "avg_rating": avg_rating,
+                "rating_count": rating_count,
+            }
+            self.top_by_count.add(rating_count, position, summary)
+            if rating_count >= 10:
+                self.top_by_avg.add(avg_rating, position, summary)
+
+    def merge(self, other: "BookStats") -> None:
+        """Add the stats of a later stretch of the input."""
+        self.lines += other.lines
+        self.total += other.total
+        self.languages.update(other.languages)
+        self.prefixes.update(other.prefixes)
+        self.samples.extend(other.samples[:3 - len(self.samples)])
+
+        self.year_count += other.year_count
+        self.year_sum += other.year_sum
+        for name, pick in (("year_min", min), ("year_max", max), ("rating_min", min), ("rating_max", max)):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            if theirs is not None:
+                setattr(self, name, theirs if mine is None else pick(mine, theirs))
+        self.decades.update(other.decades)
+
+        self.subjects.merge(other.subjects)
+        self.distinct_subjects.merge(other.distinct_subjects)
+        self.distinct_authors.merge(other.distinct_authors)
+
+        self.author_total += other.author_total
+        self.author_max = max(self.author_max, other.author_max)
+        self.single_author += other.single_author
+        self.multi_author += other.multi_author
+
+        self.has_isbn += other.has_isbn
+        self.has_subjects += other.has_subjects
+
+        self.num_rated += other.num_rated
+        self.rating_sum += other.rating_sum
+        self.rating_buckets.update(other.rating_buckets)
+        self.top_by_count.merge(other.top_by_count)
+        self.top_by_avg.merge(other.top_by_avg)
+
+
+class MalformedLine(ValueError):
+    """A JSONL line that does not parse; `line` is 1-based within its chunk."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(line, message)
+        self.line = line
+        self.message = message
+
+
+def _analyze_chunk(chunk: bytes, chunk_index: int) -> BookStats:
+    """Stats of a line-aligned JSONL chunk; a malformed line raises MalformedLine."""
+    stats = BookStats()
+    for index, line in enumerate(chunk_lines(chunk, errors="strict")):
+        stats.lines = index + 1
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            book = loads(line)
+        except JSONDecodeError as e:
+            raise MalformedLine(index + 1, str(e)) from None
+        stats.add(book, (chunk_index << 32) | index)
+    return stats
+
+
+def collect_stats(filename: str, workers: int = 1) -> BookStats:
+    """Stream a JSONL or columnar file once and return its merged stats."""
+    stats = BookStats()
+    if is_columnar(filename):
+        for position, book in enumerate(iter_books(filename, ANALYSIS_COLUMNS)):
+            stats.add(book, position)
+        return stats
+
+    # Chunks arrive in file order, so the lines merged so far locate an error
+    try:
+        for chunk_stats in map_chunks(_analyze_chunk, iter_line_chunks(filename), workers):
+            stats.merge(chunk_stats)
+    except MalformedLine as e:
+        raise ValueError(f"Malformed JSON on line {stats.lines + e.line:,} of {filename}: {e.message}") from None
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def analyze_books(filename, workers=1):
     """
     Analyze book data and generate statistics for:
       - language distribution
@@ -26,16 +344,11 @@ def analyze_books(filename):
     print(f"DATA ANALYSIS: {filename}")
     print("=" * 70)
 
-    # Read all books
+    # Read all books in one streaming pass
     print("\nReading file...")
-    books = []
-    with open(filename, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                books.append(json.loads(line))
-
-    total = len(books)
+    stats = collect_stats(filename, workers)
+
+    total = stats.total
     print(f"Total books: {total:,}")
 
     if total == 0:
@@ -44,14 +357,13 @@ def analyze_books(filename):
 
     # Language distribution
     print("\n--- Language Distribution ---")
-    languages = Counter(book.get("language", "unknown") for book in books)
-    for lang, count in languages.most_common(10):
+    for lang, count in stats.languages.most_common(10):
         percentage = (count / total) * 100
         print(f"  {lang:10s}: {count:>6,} ({percentage:>5.1f}%)")
 
     # Title prefix distribution
     print("\n--- Title Prefix Distribution (A-Z Sharding) ---")
-    prefixes = Counter(book.get("title_prefix", "?") for book in books)
+    prefixes = stats.prefixes
     for prefix in sorted(prefixes.keys()):
         count = prefixes[prefix]
         percentage = (count / total) * 100
@@ -60,67 +372,50 @@ def analyze_books(filename):
 
     # Year distribution
     print("\n--- Publication Year Statistics ---")
-    years = [
-        book.get("first_publish_year")
-        for book in books
-        if book.get("first_publish_year") is not None
-    ]
-
-    if years:
-        print(f"  Books with year:  {len(years):,} ({len(years)/total*100:.1f}%)")
-        print(f"  Earliest year:    {min(years)}")
-        print(f"  Latest year:      {max(years)}")
-        print(f"  Average year:     {sum(years)/len(years):.0f}")
+    if stats.year_count:
+        print(f"  Books with year:  {stats.year_count:,} ({stats.year_count/total*100:.1f}%)")
+        print(f"  Earliest year:    {stats.year_min}")
+        print(f"  Latest year:      {stats.year_max}")
+        print(f"  Average year:     {stats.year_sum/stats.year_count:.0f}")
 
         # Decade distribution
-        decades = Counter((year // 10) * 10 for year in years)
         print("\n  Top decades:")
-        for decade, count in decades.most_common(10):
+        for decade, count in stats.decades.most_common(10):
             print(f"    {decade}s: {count:,}")
     else:
         print("  No year information available")
 
     # Subject distribution
     print("\n--- Top 25 Subjects ---")
-    all_subjects = []
-    for book in books:
-        subjects = book.get("subjects", [])
-        if subjects:
-            all_subjects.extend(subjects)
-
-    subject_counter = Counter(all_subjects)
-    for subject, count in subject_counter.most_common(25):
+    for subject, count in stats.subjects.most_common(25):
         print(f"  {subject:40s}: {count:>5,}")
+    print(f"  Distinct subjects (approx.): {stats.distinct_subjects.estimate():,}")
 
     # Author statistics
     print("\n--- Author Statistics ---")
-    author_counts = [len(book.get("authors", [])) for book in books]
-    if author_counts:
-        avg_authors = sum(author_counts) / len(author_counts)
-        single_author = sum(1 for c in author_counts if c == 1)
-        multi_author = sum(1 for c in author_counts if c > 1)
-
-        print(f"  Avg authors per book: {avg_authors:.2f}")
-        print(f"  Max authors:          {max(author_counts)}")
-        print(
-            f"  Single author books:  {single_author:,} "
-            f"({single_author/total*100:.1f}%)"
-        )
-        print(
-            f"  Multi-author books:   {multi_author:,} "
-            f"({multi_author/total*100:.1f}%)"
-        )
+    avg_authors = stats.author_total / total
+    print(f"  Avg authors per book: {avg_authors:.2f}")
+    print(f"  Max authors:          {stats.author_max}")
+    print(
+        f"  Single author books:  {stats.single_author:,} "
+        f"({stats.single_author/total*100:.1f}%)"
+    )
+    print(
+        f"  Multi-author books:   {stats.multi_author:,} "
+        f"({stats.multi_author/total*100:.1f}%)"
+    )
+    print(f"  Distinct authors (approx.): {stats.distinct_authors.estimate():,}")
 
     # ISBN coverage
     print("\n--- ISBN-13 Coverage ---")
-    has_isbn = sum(1 for book in books if book.get("isbn_13"))
+    has_isbn = stats.has_isbn
     no_isbn = total - has_isbn
     print(f"  With ISBN-13:    {has_isbn:,} ({has_isbn/total*100:.1f}%)")
     print(f"  Without ISBN-13: {no_isbn:,} ({no_isbn/total*100:.1f}%)")
 
     # Subject coverage
     print("\n--- Subject Coverage ---")
-    has_subjects = sum(1 for book in books if book.get("subjects"))
+    has_subjects = stats.has_subjects
     print(f"  With subjects:    {has_subjects:,} ({has_subjects/total*100:.1f}%)")
     print(
         f"  Without subjects: {total - has_subjects:,} "
@@ -129,69 +424,43 @@ def analyze_books(filename):
 
     # Rating coverage & distribution
     print("\n--- Rating Coverage & Distribution ---")
-    rated_books = [b for b in books if b.get("rating_count", 0) > 0]
-    num_rated = len(rated_books)
+    num_rated = stats.num_rated
     print(f"  Books with ratings:    {num_rated:,} ({num_rated/total*100:.1f}%)")
 
     if num_rated > 0:
-        avg_ratings = [b.get("avg_rating", 0.0) for b in rated_books]
-        print(f"  Avg of avg_ratings:    {sum(avg_ratings)/len(avg_ratings):.3f}")
-        print(f"  Min avg_rating:        {min(avg_ratings):.3f}")
-        print(f"  Max avg_rating:        {max(avg_ratings):.3f}")
-
-        # rating_count buckets: 1-5, 6-20, 21-100, 100+
-        buckets = {
-            "1-5": 0,
-            "6-20": 0,
-            "21-100": 0,
-            "100+": 0,
-        }
-        for b in rated_books:
-            rc = b.get("rating_count", 0)
-            if rc <= 5:
-                buckets["1-5"] += 1
-            elif rc <= 20:
-                buckets["6-20"] += 1
-            elif rc <= 100:
-                buckets["21-100"] += 1
-            else:
-                buckets["100+"] += 1
+        print(f"  Avg of avg_ratings:    {stats.rating_sum/num_rated:.3f}")
+        print(f"  Min avg_rating:        {stats.rating_min:.3f}")
+        print(f"  Max avg_rating:        {stats.rating_max:.3f}")
 
         print("\n  Rating count buckets:")
-        for name, count in buckets.items():
-            pct = (count / num_rated) * 100 if num_rated > 0 else 0
+        for name, _ in RATING_COUNT_BUCKETS:
+            count = stats.rating_buckets[name]
+            pct = (count / num_rated) * 100
             print(f"    {name:6s}: {count:>6,} ({pct:>5.1f}%)")
 
         # Top 10 by rating_count
         print("\n  Top 10 by rating_count:")
-        top_by_count = sorted(
-            rated_books, key=lambda b: b.get("rating_count", 0), reverse=True
-        )[:10]
-        for b in top_by_count:
+        for b in stats.top_by_count.items():
             print(
-                f"    {b.get('rating_count', 0):>4} ratings | "
-                f"{b.get('avg_rating', 0.0):>4.2f} ★ | "
-                f"{b.get('title', '')[:60]}"
+                f"    {b['rating_count']:>4} ratings | "
+                f"{b['avg_rating']:>4.2f} ★ | "
+                f"{b['title'][:60]}"
             )
 
         # Top 10 by avg_rating (with a minimum count)
         print("\n  Top 10 by avg_rating (rating_count >= 10):")
-        filtered = [b for b in rated_books if b.get("rating_count", 0) >= 10]
-        top_by_avg = sorted(
-            filtered, key=lambda b: b.get("avg_rating", 0.0), reverse=True
-        )[:10]
-        for b in top_by_avg:
+        for b in stats.top_by_avg.items():
             print(
-                f"    {b.get('avg_rating', 0.0):>4.2f} ★ | "
-                f"{b.get('rating_count', 0):>4} ratings | "
-                f"{b.get('title', '')[:60]}"
+                f"    {b['avg_rating']:>4.2f} ★ | "
+                f"{b['rating_count']:>4} ratings | "
+                f"{b['title'][:60]}"
             )
     else:
         print("  No rating information available")
 
     # Sample books
     print("\n--- Sample Books (First 3) ---")
-    for i, book in enumerate(books[:3], 1):
+    for i, book in enumerate(stats.samples, 1):
         print(f"\nBook {i}:")
         print(f"  ID:      {book.get('book_id')}")
         print(f"  Title:   {book.get('title')}")
@@ -213,15 +482,19 @@ def analyze_books(filename):
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python analyze_data.py <file.jsonl>")
-        print("Example: python analyze_data.py books_english_50k.jsonl")
-        sys.exit(1)
-
-    filename = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Analyze a book JSONL (or columnar .npz) file.")
+    parser.add_argument("filename", help="e.g. books_english_50k.jsonl")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Analysis processes for JSONL files; 0 = one per CPU (default: 1)",
+    )
+    args = parser.parse_args()
+    filename = args.filename
 
     try:
-        analyze_books(filename)
+        analyze_books(filename, workers=args.workers or os.cpu_count() or 1)
     except FileNotFoundError:
         print(f"ERROR: File not found: {filename}")
         sys.exit(1)
@@ -234,4 +507,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,155 @@
+"""
+Compact author id -> name index for the Open Library authors dump.
+
+A plain dict with two string keys per author costs gigabytes for the full
+dump. AuthorIndex instead stores:
+
+  - ids:     sorted numeric OL ids ("OL34184A" -> 34184) as int64
+  - offsets: int64 start offset of each name (plus a final end offset)
+  - names:   every name, UTF-8 encoded, in one concatenated buffer
+
+Lookups are a binary search over `ids`. The index can be saved to disk and
+memory-mapped by later runs, so repeated extractions skip the authors dump.
+"""
+
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional, Tuple
+
+MAGIC = b"OLAIDX1\0"
+# magic, source size, source mtime_ns, author count, names length
+HEADER = struct.Struct("<8sqqqq")
+
+_AUTHOR_KEY_RE = re.compile(r"^(?:/authors/)?OL(\d+)A$")
+
+
+def parse_author_id(key) -> Optional[int]:
+    """Return the numeric part of "/authors/OL34184A" or "OL34184A", else None."""
+    if not isinstance(key, str):
+        return None
+    m = _AUTHOR_KEY_RE.match(key)
+    return int(m.group(1)) if m else None
+
+
+class AuthorIndex:
+    """Read-only author lookup supporting `index.get(key)` like a dict."""
+
+    def __init__(self, ids, offsets, names, source_stat: Tuple[int, int] = (0, 0)):
+        self._ids = ids
+        self._offsets = offsets
+        self._names = names
+        self._mmap = None
+        self._path: Optional[str] = None
+        self.source_stat = source_stat
+
+    def __reduce__(self):
+        # A mapped index pickles as its path, so spawned pool workers map the
+        # file again instead of receiving a copy of every name
+        if self._path is not None:
+            return (AuthorIndex.load, (self._path,))
+        return (AuthorIndex, (self._ids, self._offsets, bytes(self._names), self.source_stat))
+
+    @classmethod
+    def build(cls, pairs: Iterable[Tuple[int, str]], source_stat: Tuple[int, int] = (0, 0)) -> "AuthorIndex":
+        """Build from (numeric id, name) pairs. Later duplicates win, like a dict."""
+        raw_ids = array("q")
+        raw_offsets = array("q", [0])
+        raw_names = bytearray()
+        for author_id, name in pairs:
+            raw_ids.append(author_id)
+            raw_names += name.encode("utf-8")
+            raw_offsets.append(len(raw_names))
+
+        order = sorted(range(len(raw_ids)), key=raw_ids.__getitem__)
+
+        ids = array("q")
+        offsets = array("q", [0])
+        names = bytearray()
+        for pos, i in enumerate(order):
+            # Sort is stable: for duplicate ids keep only the last occurrence
+            if pos + 1 < len(order) and raw_ids[order[pos + 1]] == raw_ids[i]:
+                continue
+            ids.append(raw_ids[i])
+            names += raw_names[raw_offsets[i]:raw_offsets[i + 1]]
+            offsets.append(len(names))
+
+        return cls(ids, offsets, bytes(names), source_stat)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _find(self, key) -> int:
+        author_id = parse_author_id(key)
+        if author_id is None:
+            return -1
+        i = bisect_left(self._ids, author_id)
+        if i < len(self._ids) and self._ids[i] == author_id:
+            return i
+        return -1
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) >= 0
+
+    def get(self, key, default=None) -> Optional[str]:
+        i = self._find(key)
+        if i < 0:
+            return default
+        return str(self._names[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+    def save(self, path: str) -> None:
+        """Write the index to `path` atomically."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.source_stat[0], self.source_stat[1],
+                                len(self._ids), len(self._names)))
+            f.write(bytes(memoryview(self._ids).cast("B")))
+            f.write(bytes(memoryview(self._offsets).cast("B")))
+            f.write(self._names)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "AuthorIndex":
+        """Memory-map an index written by `save`. Pages are loaded on demand."""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, src_size, src_mtime, count, names_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            mm.close()
+            raise ValueError(f"{path} is not an author index")
+
+        view = memoryview(mm)
+        pos = HEADER.size
+        ids = view[pos:pos + count * 8].cast("q")
+        pos += count * 8
+        offsets = view[pos:pos + (count + 1) * 8].cast("q")
+        pos += (count + 1) * 8
+        names = view[pos:pos + names_len]
+
+        index = cls(ids, offsets, names, (src_size, src_mtime))
+        index._mmap = mm
+        index._path = path
+        return index
+
+
+def dump_stat(path: str) -> Tuple[int, int]:
+    """(size, mtime_ns) used to check that a saved index matches its dump."""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def load_if_current(index_path: str, dump_path: str) -> Optional[AuthorIndex]:
+    """Load a saved index if it exists and was built from the same dump file."""
+    if not os.path.exists(index_path):
+        return None
+    try:
+        index = AuthorIndex.load(index_path)
+    except (ValueError, struct.error):
+        return None
+    if index.source_stat != dump_stat(dump_path):
+        return None
+    return index
+
@@ -0,0 +1,324 @@
+"""
+Columnar (NumPy .npz) store for book datasets, written alongside JSONL.
+
+Every field of the book schema is stored as typed arrays inside one
+uncompressed .npz file. np.load reads members lazily, so a reader that asks
+for a few columns only touches those arrays:
+
+  str          <name>.data (uint8, UTF-8) + <name>.offsets (int64, n + 1)
+  str list     <name>.rows (int64 item offsets, n + 1) + a str column
+               <name>.items
+  authors      authors.rows + str columns authors.author_id and
+               authors.author_name
+  int / float  <name> (int64 / float64)
+
+Optional fields add a <name>.valid bool array; invalid rows read back as a
+missing key (description, cover_id) or None (first_publish_year), like the
+JSONL records. `_key_order` holds the key order of the written records
+(profiles order their keys differently), which records are rebuilt in.
+
+The writer appends blocks of BLOCK_ROWS rows to temporary files and packs
+them into the .npz on close, so memory does not grow with the dataset.
+
+Usage:
+
+    with ColumnWriter("books.npz") as writer:
+        for book in books:
+            writer.append(book)
+
+    for book in iter_books("books.npz", columns=["book_id", "rating_count"]):
+        ...
+
+`iter_books` also accepts a JSONL path, so downstream tools handle both.
+"""
+
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from dump_io import JSONDecodeError, loads
+
+COLUMNAR_SUFFIX = ".npz"
+
+# (field, kind, null handling): None = required, "omit" = missing key when
+# null, "none" = present as None when null. Records are rebuilt in the key
+# order the writer saw (stored in the file); this order is the fallback.
+SCHEMA = (
+    ("book_id", "str", None),
+    ("title", "str", None),
+    ("title_prefix", "str", None),
+    ("title_lower", "str", None),
+    ("authors", "authors", None),
+    ("isbn_13", "str_list", None),
+    ("first_publish_year", "int", "none"),
+    ("subjects", "str_list", None),
+    ("language", "str", None),
+    ("description", "str", "omit"),
+    ("avg_rating", "float", None),
+    ("rating_count", "int", None),
+    ("cover_id", "int", "omit"),
+)
+
+FIELDS = tuple(name for name, _, _ in SCHEMA)
+
+_KINDS = {name: kind for name, kind, _ in SCHEMA}
+
+_DEFAULTS = {"str": "", "int": 0, "float": 0.0}
+
+# Rows buffered per column before they are written out as one block.
+BLOCK_ROWS = 65536
+
+
+def is_columnar(path: str) -> bool:
+    return path.endswith(COLUMNAR_SUFFIX)
+
+
+def columnar_path(jsonl_path: str) -> str:
+    """books.jsonl -> books.npz (the columnar copy written alongside)."""
+    base = jsonl_path[:-len(".jsonl")] if jsonl_path.endswith(".jsonl") else jsonl_path
+    return base + COLUMNAR_SUFFIX
+
+
+def _merge_key_order(order: List[str], keys: Iterable[str]) -> None:
+    """Insert keys not yet in `order` after the key that precedes them in `keys`."""
+    previous = None
+    for key in keys:
+        if key not in order:
+            order.insert(order.index(previous) + 1 if previous is not None else 0, key)
+        previous = key
+
+
+class _Spool:
+    """One output array, appended block by block to a temporary file."""
+
+    def __init__(self, dtype, directory: str):
+        self.dtype = np.dtype(dtype)
+        self.file = tempfile.TemporaryFile(dir=directory)
+        self.length = 0
+
+    def write(self, values: np.ndarray) -> None:
+        self.file.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+        self.length += len(values)
+
+    def copy_to(self, zf: zipfile.ZipFile, name: str) -> None:
+        """Write the spooled values as the .npy member `name` of `zf`."""
+        header = {
+            "descr": np.lib.format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": (self.length,),
+        }
+        self.file.seek(0)
+        with zf.open(name + ".npy", "w", force_zip64=True) as member:
+            np.lib.format.write_array_header_1_0(member, header)
+            shutil.copyfileobj(self.file, member, 1 << 20)
+        self.file.close()
+
+
+class ColumnWriter:
+    """
+    Write book records as one columnar .npz, a block at a time. Blocks go to
+    per-array temporary files next to `path` that close() packs into the
+    .npz. The key order is merged across rows, so keys that only some rows
+    have keep their place.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._dir = os.path.dirname(os.path.abspath(path))
+        self._values: Dict[str, list] = {name: [] for name in FIELDS}
+        self._valid: Dict[str, list] = {name: [] for name, _, null in SCHEMA if null}
+        self._spools: Dict[str, _Spool] = {}
+        self._ends: Dict[str, int] = {}
+        self._key_order: List[str] = []
+        self._rows = 0
+
+    def __enter__(self) -> "ColumnWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def append(self, book: Dict[str, Any]) -> None:
+        keys = [key for key in book if key in _KINDS]
+        if any(key not in self._key_order for key in keys):
+            _merge_key_order(self._key_order, keys)
+        for name, kind, null in SCHEMA:
+            value = book.get(name)
+            if kind == "authors":
+                value = [
+                    (str(a.get("author_id") or ""), str(a.get("author_name") or ""))
+                    for a in (value or []) if isinstance(a, dict)
+                ]
+            elif kind == "str_list":
+                value = [str(v) for v in (value or [])]
+            elif value is None:
+                value = _DEFAULTS[kind]
+                if null:
+                    self._valid[name].append(False)
+                    self._values[name].append(value)
+                    continue
+            if null:
+                self._valid[name].append(True)
+            self._values[name].append(value)
+        self._rows += 1
+        if len(self._values["book_id"]) >= BLOCK_ROWS:
+            self._flush()
+
+    def _spool(self, name: str, dtype) -> _Spool:
+        if name not in self._spools:
+            self._spools[name] = _Spool(dtype, self._dir)
+        return self._spools[name]
+
+    def _write_offsets(self, name: str, lengths: List[int]) -> None:
+        """Append row end offsets, continuing from the previous block."""
+        if name not in self._spools:
+            self._spool(name, np.int64).write(np.zeros(1, dtype=np.int64))
+        ends = np.cumsum(np.array(lengths, dtype=np.int64)) + self._ends.get(name, 0)
+        if len(ends):
+            self._ends[name] = int(ends[-1])
+        self._spools[name].write(ends)
+
+    def _write_strings(self, prefix: str, values: List[str]) -> None:
+        encoded = [v.encode("utf-8") for v in values]
+        self._write_offsets(f"{prefix}.offsets", [len(e) for e in encoded])
+        self._spool(f"{prefix}.data", np.uint8).write(np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def _flush(self) -> None:
+        """Append the buffered rows to the column spools."""
+        for name, kind, null in SCHEMA:
+            values = self._values[name]
+            if kind == "str":
+                self._write_strings(name, [str(v) for v in values])
+            elif kind == "str_list":
+                self._write_offsets(f"{name}.rows", [len(row) for row in values])
+                self._write_strings(f"{name}.items", [item for row in values for item in row])
+            elif kind == "authors":
+                self._write_offsets(f"{name}.rows", [len(row) for row in values])
+                pairs = [pair for row in values for pair in row]
+                for i, field in enumerate(("author_id", "author_name")):
+                    self._write_strings(f"{name}.{field}", [p[i] for p in pairs])
+            elif kind == "int":
+                self._spool(name, np.int64).write(np.array(values, dtype=np.int64))
+            else:
+                self._spool(name, np.float64).write(np.array(values, dtype=np.float64))
+            if null:
+                self._spool(f"{name}.valid", bool).write(np.array(self._valid[name], dtype=bool))
+                self._valid[name] = []
+            self._values[name] = []
+
+    def close(self) -> None:
+        self._flush()
+        key_order = list(self._key_order)
+        _merge_key_order(key_order, FIELDS)
+        with zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for name, spool in self._spools.items():
+                spool.copy_to(zf, name)
+            with zf.open("_key_order.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array(member, np.array(key_order))
+        self._spools = {}
+
+
+class ColumnReader:
+    """Lazy access to the columns of a .npz written by ColumnWriter."""
+
+    def __init__(self, path: str):
+        self._npz = np.load(path)
+        self._len = len(self._npz["book_id.offsets"]) - 1
+        if "_key_order" in self._npz.files:
+            self.key_order = tuple(self._npz["_key_order"].tolist())
+        else:
+            self.key_order = FIELDS
+
+    def __enter__(self) -> "ColumnReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def close(self) -> None:
+        self._npz.close()
+
+    def _strings(self, prefix: str) -> List[str]:
+        data = self._npz[f"{prefix}.data"].tobytes()
+        offsets = self._npz[f"{prefix}.offsets"].tolist()
+        return [data[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+    def array(self, name: str) -> np.ndarray:
+        """Raw values of a numeric column (no null handling)."""
+        return self._npz[name]
+
+    def valid(self, name: str) -> Optional[np.ndarray]:
+        """Null mask of an optional column, or None for required columns."""
+        key = f"{name}.valid"
+        return self._npz[key] if key in self._npz.files else None
+
+    def column(self, name: str) -> List[Any]:
+        """Python values of one column, with nulls as None."""
+        kind = _KINDS[name]
+        if kind == "str":
+            values = self._strings(name)
+        elif kind == "str_list":
+            rows = self._npz[f"{name}.rows"].tolist()
+            items = self._strings(f"{name}.items")
+            values = [items[a:b] for a, b in zip(rows, rows[1:])]
+        elif kind == "authors":
+            rows = self._npz[f"{name}.rows"].tolist()
+            ids = self._strings(f"{name}.author_id")
+            names = self._strings(f"{name}.author_name")
+            values = [
+                [{"author_id": ids[i], "author_name": names[i]} for i in range(a, b)]
+                for a, b in zip(rows, rows[1:])
+            ]
+        else:
+            values = self._npz[name].tolist()
+
+        valid = self.valid(name)
+        if valid is not None:
+            values = [v if ok else None for v, ok in zip(values, valid.tolist())]
+        return values
+
+    def iter_records(self, columns: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Book dicts restricted to `columns` (all fields by default), in the written key order."""
+        wanted = set(columns) if columns is not None else set(FIELDS)
+        nulls = {name: null for name, _, null in SCHEMA}
+        selected = [(name, nulls[name]) for name in self.key_order if name in wanted]
+        data = [self.column(name) for name, _ in selected]
+        for row in zip(*data):
+            book = {}
+            for (name, null), value in zip(selected, row):
+                if value is None and null == "omit":
+                    continue
+                book[name] = value
+            yield book
+
+
+def iter_books(path: str, columns: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Book records from a columnar .npz (reading only `columns`) or a JSONL
+    file (all fields; malformed lines are skipped).
+    """
+    if is_columnar(path):
+        with ColumnReader(path) as reader:
+            yield from reader.iter_records(columns)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield loads(line)
+            except JSONDecodeError:
+                continue
@@ -0,0 +1,233 @@
+"""
+Build the content-based item-item neighbor table used by the recommendation
+service (app/content.py) from a books JSONL (or columnar .npz) output.
+
+Each book becomes a sparse TF-IDF vector over hashed features:
+
+  subjects      one feature per subject ("s:fiction"), tf = 1
+  description   one feature per word of 3+ letters ("d:dragon"),
+                tf = 1 + log(count)
+
+Features are hashed into 2**20 buckets, weighted by
+idf = log((N + 1) / (df + 1)) + 1 and rows are L2-normalized, so the dot
+product of two rows is their cosine similarity. Features found in a single
+book cannot link two books and features in more than --max-df of all books
+link nearly all of them; both are dropped.
+
+Neighbors are computed in row batches (X[batch] @ X.T) in a process pool;
+only the top --neighbors of each row are kept. The output is an
+uncompressed NumPy .npz with:
+
+    work_ids   str      book_id per row
+    neighbors  int32    (rows, N) neighbor rows, best first, -1 = none
+    scores     float32  (rows, N) cosine similarity of each neighbor
+
+Example:
+
+    python3 build_content_index.py \
+        --books books_english_top50k_with_ratings.jsonl \
+        --out   content_neighbors.npz --workers 0
+"""
+
+import argparse
+import os
+import re
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from book_columns import iter_books
+from dump_io import map_chunks
+
+HASH_BITS = 20
+
+_WORD_RE = re.compile(r"[a-z]{3,}")
+
+# A few very common English words; the idf weighting handles the rest
+STOP_WORDS = frozenset(
+    "the and for are but not you all any can her was one our out has have had his how its "
+    "may new now old see two who did get him she too use with that this from they will "
+    "would there their what which when were been into than then them these some more "
+    "also about after other such only most over very".split()
+)
+
+# Row batch size of one similarity product
+BATCH_ROWS = 256
+
+# Feature matrix of the current process, set by _init_worker (in every pool
+# worker, whatever the start method, or in-process when running serially).
+_worker_matrix: Optional[sparse.csr_matrix] = None
+
+
+def _hash(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) & ((1 << HASH_BITS) - 1)
+
+
+def book_features(book: dict) -> Tuple[List[int], List[float]]:
+    """(hashed feature ids, term frequencies) of one book."""
+    counts = {}
+    for subject in book.get("subjects") or []:
+        counts[_hash("s:" + str(subject).strip().lower())] = 1.0
+    words = {}
+    for word in _WORD_RE.findall(str(book.get("description") or "").lower()):
+        if word not in STOP_WORDS:
+            words[word] = words.get(word, 0) + 1
+    for word, count in words.items():
+        h = _hash("d:" + word)
+        counts[h] = counts.get(h, 0.0) + 1.0 + float(np.log(count))
+    return list(counts), list(counts.values())
+
+
+def build_features(books_path: str, max_df: float) -> Tuple[List[str], sparse.csr_matrix]:
+    """(work ids, L2-normalized TF-IDF matrix) of every book in the file."""
+    work_ids: List[str] = []
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for book in iter_books(books_path, columns=["book_id", "subjects", "description"]):
+        work_id = book.get("book_id")
+        if not work_id:
+            continue
+        features, tfs = book_features(book)
+        work_ids.append(work_id)
+        indices.extend(features)
+        data.extend(tfs)
+        indptr.append(len(indices))
+
+    n = len(work_ids)
+    matrix = sparse.csr_matrix(
+        (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(n, 1 << HASH_BITS),
+    )
+    matrix.sum_duplicates()
+
+    df = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = (np.log((n + 1) / (df + 1)) + 1).astype(np.float32)
+    idf[(df <= 1) | (df > max_df * n)] = 0.0
+    matrix = sparse.csr_matrix(matrix.multiply(idf[None, :]))
+    matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix = sparse.csr_matrix(matrix.multiply((1.0 / norms)[:, None]), dtype=np.float32)
+    return work_ids, matrix
+
+
+def _init_worker(matrix: Optional[sparse.csr_matrix]) -> None:
+    global _worker_matrix
+    _worker_matrix = matrix
+
+
+def _neighbor_batch(rows: Tuple[int, int], batch_index: int, top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top `top_n` neighbors (rows, scores) of matrix rows [start, stop)."""
+    start, stop = rows
+    matrix = _worker_matrix
+    sims = (matrix[start:stop] @ matrix.T).tocsr()
+    neighbors = np.full((stop - start, top_n), -1, dtype=np.int32)
+    scores = np.zeros((stop - start, top_n), dtype=np.float32)
+    for i in range(stop - start):
+        cols = sims.indices[sims.indptr[i]:sims.indptr[i + 1]]
+        vals = sims.data[sims.indptr[i]:sims.indptr[i + 1]]
+        keep = (cols != start + i) & (vals > 0)
+        cols, vals = cols[keep], vals[keep]
+        if len(cols) > top_n:
+            part = np.argpartition(-vals, top_n)[:top_n]
+            cols, vals = cols[part], vals[part]
+        # Best first; ties by row for a deterministic table
+        order = np.lexsort((cols, -vals))
+        neighbors[i, :len(order)] = cols[order]
+        scores[i, :len(order)] = vals[order]
+    return neighbors, scores
+
+
+def build_content_index(books_path: str, out_path: str, top_n: int = 50,
+                        max_df: float = 0.5, workers: int = 1) -> None:
+    print("=" * 70)
+    print("BUILDING CONTENT NEIGHBOR TABLE")
+    print("=" * 70)
+    print(f"Books:     {books_path}")
+    print(f"Output:    {out_path}")
+    print(f"Neighbors: {top_n}")
+    print(f"Workers:   {workers}")
+    print()
+
+    start = time.perf_counter()
+    work_ids, matrix = build_features(books_path, max_df)
+    print(f"Features: {len(work_ids):,} books, {matrix.nnz:,} nonzero weights "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    batches = [(a, min(a + BATCH_ROWS, len(work_ids))) for a in range(0, len(work_ids), BATCH_ROWS)]
+    neighbors = np.full((len(work_ids), top_n), -1, dtype=np.int32)
+    scores = np.zeros((len(work_ids), top_n), dtype=np.float32)
+    try:
+        for (a, b), (batch_neighbors, batch_scores) in zip(
+            batches, map_chunks(_neighbor_batch, batches, workers, top_n,
+                                initializer=_init_worker, initargs=(matrix,))
+        ):
+            neighbors[a:b] = batch_neighbors
+            scores[a:b] = batch_scores
+            if (b // BATCH_ROWS) % 40 == 0:
+                print(f"  Neighbors for {b:,} / {len(work_ids):,} books ...")
+    finally:
+        _init_worker(None)
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, work_ids=np.array(work_ids, dtype=str), neighbors=neighbors, scores=scores)
+    os.replace(tmp_path, out_path)
+
+    with_neighbors = int(np.count_nonzero(neighbors[:, 0] >= 0))
+    print()
+    print(f"Books with neighbors: {with_neighbors:,} / {len(work_ids):,}")
+    print(f"Wrote {out_path} in {time.perf_counter() - start:.1f}s")
+    print("=" * 70)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the content-based item-item neighbor table for the recommender."
+    )
+    parser.add_argument(
+        "--books",
+        required=True,
+        help="Books JSONL or columnar .npz (e.g., books_english_top50k_with_ratings.jsonl)",
+    )
+    parser.add_argument(
+        "--out",
+        required=True,
+        help="Output neighbor table (.npz), e.g. content_neighbors.npz",
+    )
+    parser.add_argument(
+        "--neighbors",
+        type=int,
+        default=50,
+        help="Neighbors kept per book (default: 50)",
+    )
+    parser.add_argument(
+        "--max-df",
+        type=float,
+        default=0.5,
+        help="Drop features found in more than this fraction of books (default: 0.5)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes computing neighbor batches; 0 = one per CPU (default: 1)",
+    )
+    args = parser.parse_args()
+
+    build_content_index(
+        args.books,
+        args.out,
+        top_n=args.neighbors,
+        max_df=args.max_df,
+        workers=args.workers or os.cpu_count() or 1,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Chunk-level checkpoints for long dump scans.
+
+A scan over line-aligned chunks (see dump_io.map_chunks) periodically saves
+the index of the next chunk to process together with its partial results.
+A rerun with the same inputs and parameters skips the finished chunks and
+continues from there; a checkpoint written for different inputs is ignored.
+
+Results are merged in chunk order, so with a process pool a crash only
+redoes the chunks that were in flight (at most `workers * 2`). Gzip streams
+cannot be entered mid-way, so skipped raw chunks are still decompressed but
+not parsed; with the preprocessed cache (dump_cache) they are not read at
+all.
+
+Results that grow with the input (rather than with the number of distinct
+keys) go to an AppendLog next to the checkpoint, so a save writes only the
+log's byte offset instead of re-pickling everything gathered so far.
+"""
+
+import os
+import pickle
+import time
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+from author_index import dump_stat
+from dump_io import CHUNK_BYTES
+
+CHECKPOINT_VERSION = 2
+
+# Default seconds between checkpoint writes.
+CHECKPOINT_SECONDS = 60.0
+
+
+def scan_key(paths, **params) -> dict:
+    """Identity of a scan: input files (size, mtime) plus its parameters."""
+    return {
+        "version": CHECKPOINT_VERSION,
+        "chunk_bytes": CHUNK_BYTES,
+        "inputs": [(os.path.abspath(p), dump_stat(p)) for p in paths],
+        "params": params,
+    }
+
+
+class Checkpoint:
+    """
+    Saves (next chunk index, state) for one scan at `path`, at most every
+    `interval` seconds. With no `path` every method is a no-op, so callers
+    do not need to special-case runs without checkpointing.
+    """
+
+    def __init__(self, path: Optional[str], key: dict, interval: float = CHECKPOINT_SECONDS):
+        self.path = path
+        self.key = key
+        self.interval = interval
+        self._last_save = time.monotonic()
+
+    def load(self) -> Tuple[int, Any]:
+        """(next chunk index, state) of a matching checkpoint, else (0, None)."""
+        if not self.path or not os.path.exists(self.path):
+            return 0, None
+        try:
+            with open(self.path, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return 0, None
+        if saved.get("key") != self.key:
+            print(f"Ignoring checkpoint {self.path}: written for other inputs or options")
+            return 0, None
+        print(f"Resuming from checkpoint {self.path} at chunk {saved['next_chunk']:,}")
+        return saved["next_chunk"], saved["state"]
+
+    def due(self) -> bool:
+        return bool(self.path) and time.monotonic() - self._last_save >= self.interval
+
+    def save(self, next_chunk: int, state: Any) -> None:
+        """Write the checkpoint atomically."""
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"key": self.key, "next_chunk": next_chunk, "state": state}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+    def clear(self) -> None:
+        """Remove the checkpoint once the scan has finished."""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class AppendLog:
+    """
+    Append-only file of fixed-size `dtype` rows at `path`, for scan results
+    that grow with the input. A checkpoint stores `offset()`; on resume
+    `open(offset)` drops rows appended after that save. With no `path` rows
+    are kept in memory, like Checkpoint's no-op mode.
+    """
+
+    def __init__(self, path: Optional[str], dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._file = None
+        self._rows = []
+
+    def open(self, offset: int = 0) -> bool:
+        """Start writing at `offset`; False if the file has fewer bytes than that."""
+        if not self.path:
+            return offset == 0
+        if offset and (not os.path.exists(self.path) or os.path.getsize(self.path) < offset):
+            return False
+        self._file = open(self.path, "r+b" if offset else "wb")
+        self._file.truncate(offset)
+        self._file.seek(offset)
+        return True
+
+    def append(self, rows: np.ndarray) -> None:
+        if self._file is None:
+            self._rows.append(rows)
+        else:
+            rows.tofile(self._file)
+
+    def offset(self) -> int:
+        """Byte offset after the last appended row, with the rows flushed."""
+        if self._file is None:
+            return 0
+        self._file.flush()
+        return self._file.tell()
+
+    def read(self) -> np.ndarray:
+        """Every row appended so far, including rows restored by open()."""
+        if self._file is None:
+            return np.concatenate(self._rows) if self._rows else np.zeros(0, dtype=self.dtype)
+        self._file.flush()
+        return np.fromfile(self.path, dtype=self.dtype)
+
+    def clear(self) -> None:
+        """Close and remove the log once the scan has finished."""
+        self._rows = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self.path)
@@ -0,0 +1,261 @@
+"""
+Persistent preprocessed cache of Open Library dumps.
+
+The first run with `--cache-dir` converts a raw dump into a directory of
+chunk files; later runs read those instead of decompressing and re-parsing
+the gzip dump. Chunks keep the input order and the same line-aligned
+boundaries as dump_io.iter_line_chunks, so results do not depend on whether
+the cache was used.
+
+Layout:
+
+    <cache_dir>/<dump name>-<fingerprint>-<kind>/
+        manifest.json     source info, chunk list, line/record counts
+        00000.bin ...     one marshal file per chunk
+
+Kinds:
+
+  works    list of slim work dicts (only the fields the extractors read),
+           restricted to /type/work lines that parse as JSON.
+  ratings  three packed columns per chunk: numeric work id (int64),
+           numeric edition id (int64, -1 if missing) and rating (float64).
+           The rating range filter is applied when aggregating, not here.
+
+The fingerprint hashes the dump's size, mtime and its first and last MiB, so
+a replaced dump gets a new cache directory. Authors are cached as a compact
+AuthorIndex file (see author_index.py) next to the chunk directories.
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import re
+import shutil
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dump_io import JSONDecodeError, chunk_lines, iter_line_chunks, loads, map_chunks
+
+CACHE_VERSION = 1
+
+WORK_FIELDS = (
+    "key", "title", "full_title", "languages", "authors", "edition_count",
+    "ratings_count", "subjects", "covers", "description", "first_publish_date",
+    "isbn_13",
+)
+
+_WORK_KEY_RE = re.compile(r"^/works/OL(\d+)W$")
+_EDITION_KEY_RE = re.compile(r"^/books/OL(\d+)M$")
+
+_SAMPLE_BYTES = 1024 * 1024
+
+
+def dump_fingerprint(path: str) -> str:
+    """Short hash of size, mtime and the first/last MiB of a dump file."""
+    st = os.stat(path)
+    h = hashlib.sha256(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        h.update(f.read(_SAMPLE_BYTES))
+        if st.st_size > _SAMPLE_BYTES:
+            f.seek(max(_SAMPLE_BYTES, st.st_size - _SAMPLE_BYTES))
+            h.update(f.read(_SAMPLE_BYTES))
+    return h.hexdigest()[:16]
+
+
+def _entry_dir(dump_path: str, kind: str, cache_dir: str) -> str:
+    name = os.path.basename(dump_path).split(".")[0]
+    return os.path.join(cache_dir, f"{name}-{dump_fingerprint(dump_path)}-{kind}")
+
+
+def author_index_path(authors_path: str, cache_dir: str) -> str:
+    """Where the AuthorIndex for an authors dump lives inside `cache_dir`."""
+    os.makedirs(cache_dir, exist_ok=True)
+    return _entry_dir(authors_path, "authors", cache_dir) + ".idx"
+
+
+# ---------------------------------------------------------------------------
+# Line parsers (shared with the raw-dump code paths)
+# ---------------------------------------------------------------------------
+
+def parse_work_json(line: str) -> Optional[dict]:
+    """Return the JSON of a /type/work dump line, or None for other lines."""
+    line = line.rstrip("\n")
+    if not line:
+        return None
+
+    parts = line.split("\t")
+    if len(parts) < 2:
+        return None
+
+    if "/type/work" not in parts[0].strip():
+        return None
+
+    try:
+        work = loads(parts[-1])
+    except JSONDecodeError:
+        return None
+    return work if isinstance(work, dict) else None
+
+
+def parse_rating_line(line: str) -> Optional[Tuple[int, int, float]]:
+    """
+    Parse "/works/OL1W<TAB>/books/OL2M<TAB>5<TAB>date" into
+    (work number, edition number or -1, rating). Range is not checked.
+    """
+    parts = line.strip().split("\t")
+    if len(parts) < 3:
+        return None
+
+    m = _WORK_KEY_RE.match(parts[0].strip())
+    if not m:
+        return None
+
+    try:
+        rating = float(parts[2].strip())
+    except ValueError:
+        return None
+
+    e = _EDITION_KEY_RE.match(parts[1].strip())
+    return int(m.group(1)), int(e.group(1)) if e else -1, rating
+
+
+# ---------------------------------------------------------------------------
+# Chunk converters: raw line-aligned bytes -> (line count, cached payload)
+# ---------------------------------------------------------------------------
+
+def _convert_works(chunk: bytes, chunk_index: int) -> Tuple[int, Any]:
+    lines = 0
+    works = []
+    for line in chunk_lines(chunk):
+        lines += 1
+        work = parse_work_json(line)
+        if work is not None:
+            works.append({k: work[k] for k in WORK_FIELDS if k in work})
+    return lines, works
+
+
+def _convert_ratings(chunk: bytes, chunk_index: int) -> Tuple[int, Any]:
+    lines = 0
+    work_ids = array("q")
+    edition_ids = array("q")
+    ratings = array("d")
+    for line in chunk_lines(chunk):
+        lines += 1
+        parsed = parse_rating_line(line)
+        if parsed is None:
+            continue
+        work_ids.append(parsed[0])
+        edition_ids.append(parsed[1])
+        ratings.append(parsed[2])
+    return lines, (work_ids.tobytes(), edition_ids.tobytes(), ratings.tobytes())
+
+
+CONVERTERS = {
+    "works": _convert_works,
+    "ratings": _convert_ratings,
+}
+
+
+def _read_manifest(entry_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(entry_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != CACHE_VERSION or manifest.get("marshal_version") != marshal.version:
+        return None
+    return manifest
+
+
+def ensure_cached(dump_path: str, kind: str, cache_dir: str, workers: int = 1) -> Dict[str, Any]:
+    """
+    Return the manifest for `dump_path` in `cache_dir`, building the cache
+    first if needed. The manifest's "chunks" lists absolute chunk paths.
+    """
+    entry_dir = _entry_dir(dump_path, kind, cache_dir)
+    manifest = _read_manifest(entry_dir)
+    if manifest is None:
+        manifest = _build(dump_path, kind, entry_dir, workers)
+    manifest["chunks"] = [os.path.join(entry_dir, c["file"]) for c in manifest["chunk_info"]]
+    return manifest
+
+
+def _build(dump_path: str, kind: str, entry_dir: str, workers: int) -> Dict[str, Any]:
+    print(f"Preprocessing {dump_path} ({kind}) into {entry_dir} ...")
+    tmp_dir = entry_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    chunk_info: List[Dict[str, Any]] = []
+    total_lines = 0
+    for lines, payload in map_chunks(CONVERTERS[kind], iter_line_chunks(dump_path), workers):
+        file_name = f"{len(chunk_info):05d}.bin"
+        with open(os.path.join(tmp_dir, file_name), "wb") as f:
+            marshal.dump(payload, f)
+        records = len(payload) if kind == "works" else len(payload[2]) // 8
+        chunk_info.append({"file": file_name, "lines": lines, "records": records})
+        total_lines += lines
+        if len(chunk_info) % 10 == 0:
+            print(f"  Preprocessed {len(chunk_info):,} chunks ({total_lines:,} lines)")
+
+    manifest = {
+        "version": CACHE_VERSION,
+        "marshal_version": marshal.version,
+        "kind": kind,
+        "source": os.path.abspath(dump_path),
+        "lines": total_lines,
+        "records": sum(c["records"] for c in chunk_info),
+        "chunk_info": chunk_info,
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Publish atomically so an interrupted build is never mistaken for a cache
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+    print(f"  Done: {len(chunk_info):,} chunks, {manifest['records']:,} records\n")
+    return manifest
+
+
+def load_chunk(path: str) -> Any:
+    with open(path, "rb") as f:
+        return marshal.load(f)
+
+
+def load_ratings_chunk(path: str) -> Tuple[array, array, array]:
+    """(work ids, edition ids, ratings) arrays of a cached ratings chunk."""
+    work_bytes, edition_bytes, rating_bytes = load_chunk(path)
+    work_ids, edition_ids, ratings = array("q"), array("q"), array("d")
+    work_ids.frombytes(work_bytes)
+    edition_ids.frombytes(edition_bytes)
+    ratings.frombytes(rating_bytes)
+    return work_ids, edition_ids, ratings
+
+
+def iter_dump_chunks(dump_path: str, kind: str, cache_dir: Optional[str] = None, workers: int = 1) -> Iterator[Any]:
+    """
+    Chunks to feed to dump_io.map_chunks: cache chunk paths (str) when
+    `cache_dir` is given, otherwise raw line-aligned bytes.
+    """
+    if cache_dir:
+        return iter(ensure_cached(dump_path, kind, cache_dir, workers)["chunks"])
+    return iter_line_chunks(dump_path)
+
+
+def iter_chunk_works(chunk: Any) -> Iterator[Tuple[int, dict]]:
+    """(position within chunk, work) pairs from a raw or cached works chunk."""
+    if isinstance(chunk, str):
+        yield from enumerate(load_chunk(chunk))
+        return
+    for line_index, line in enumerate(chunk_lines(chunk)):
+        work = parse_work_json(line)
+        if work is not None:
+            yield line_index, work
+
+
+def iter_works(dump_path: str, cache_dir: Optional[str] = None) -> Iterator[dict]:
+    """Every /type/work record of a dump, in order, from the cache if given."""
+    for chunk in iter_dump_chunks(dump_path, "works", cache_dir):
+        for _, work in iter_chunk_works(chunk):
+            yield work
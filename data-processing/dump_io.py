@@ -0,0 +1,226 @@
+"""
+Shared readers for Open Library dumps: fast decompression, line iteration,
+line-aligned chunking, JSON decoding and ordered chunk processing in a
+process pool.
+
+Gzip files are decompressed by an external tool when one is installed
+(igzip, then pigz), otherwise in-process with zlib using large reads. Set
+DUMP_DECOMPRESSOR to "igzip", "pigz" or "zlib" to force a choice. Data is
+always read as binary blocks and split on newlines; text decoding happens
+once per chunk instead of per line.
+
+`loads` uses orjson when it is installed and falls back to the stdlib json
+module otherwise (and for the few inputs orjson rejects, such as integers
+beyond 64 bits), so results do not depend on which parser is available.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, BinaryIO, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+# Decompressed bytes processed per chunk (one task per chunk in parallel mode).
+CHUNK_BYTES = 16 * 1024 * 1024
+
+# Compressed bytes read per zlib call, and pipe buffer for external tools.
+READ_BYTES = 4 * 1024 * 1024
+
+# External decompressors in order of preference; each accepts "-dc <path>".
+DECOMPRESSORS = ("igzip", "pigz")
+
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """Decode a JSON document (str or bytes), using orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def _decompressor() -> str:
+    choice = os.environ.get("DUMP_DECOMPRESSOR", "auto")
+    if choice == "zlib":
+        return "zlib"
+    if choice != "auto":
+        if not shutil.which(choice):
+            raise RuntimeError(f"DUMP_DECOMPRESSOR={choice} is not installed")
+        return choice
+    for tool in DECOMPRESSORS:
+        if shutil.which(tool):
+            return tool
+    return "zlib"
+
+
+class _ZlibReader:
+    """Minimal binary reader over a (possibly multi-member) gzip file."""
+
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        self._d = zlib.decompressobj(wbits=31)
+        self._buf = b""
+        self._eof = False
+        self._path = path
+        # Whether the current gzip member has started but not ended
+        self._in_member = False
+        self._members = 0
+
+    def read(self, size: int) -> bytes:
+        out = [self._buf]
+        have = len(self._buf)
+        while have < size and not self._eof:
+            data = self._d.unconsumed_tail or self._f.read(READ_BYTES)
+            if not data:
+                if self._in_member:
+                    raise RuntimeError(f"{self._path} is truncated")
+                self._eof = True
+                out.append(self._d.flush())
+                break
+            if not self._in_member and self._members:
+                # Zero padding after a member is skipped, like the gzip module does
+                data = data.lstrip(b"\0")
+                if not data:
+                    continue
+            block = self._d.decompress(data, size - have)
+            self._in_member = True
+            if self._d.eof:
+                # Next gzip member (concatenated .gz files are valid)
+                rest = self._d.unused_data
+                self._d = zlib.decompressobj(wbits=31)
+                self._in_member = False
+                self._members += 1
+                if rest:
+                    self._f.seek(-len(rest), os.SEEK_CUR)
+            out.append(block)
+            have += len(block)
+        data = b"".join(out)
+        self._buf = data[size:]
+        return data[:size]
+
+    def close(self) -> None:
+        self._f.close()
+
+
+@contextmanager
+def open_binary(path: str) -> Iterator[BinaryIO]:
+    """Open a plain or gzip file for reading decompressed binary data."""
+    if not path.endswith(".gz"):
+        with open(path, "rb", buffering=READ_BYTES) as f:
+            yield f
+        return
+
+    tool = _decompressor()
+    if tool == "zlib":
+        reader = _ZlibReader(path)
+        try:
+            yield reader
+        finally:
+            reader.close()
+        return
+
+    proc = subprocess.Popen([tool, "-dc", path], stdout=subprocess.PIPE, bufsize=READ_BYTES)
+    drained = False
+    try:
+        yield proc.stdout
+        # Left without an error: either read to the end or stopped early
+        drained = proc.stdout.read(1) == b""
+    finally:
+        proc.stdout.close()
+        if drained:
+            # Truncated or corrupt input only shows in the exit code
+            if proc.wait() != 0:
+                raise RuntimeError(f"{tool} failed on {path} (exit code {proc.returncode})")
+        else:
+            # Stopped early: terminating the tool is not an error
+            proc.terminate()
+            proc.wait()
+
+
+def iter_line_chunks(path: str, chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Yield the (decompressed) contents of a plain or gzip file in blocks of
+    roughly `chunk_bytes`, always split on line boundaries.
+    """
+    with open_binary(path) as f:
+        tail = b""
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b"\n") + 1
+            if cut == 0:
+                # A single line longer than the block; keep reading
+                tail = block
+                continue
+            tail = block[cut:]
+            yield block[:cut]
+        if tail:
+            yield tail
+
+
+def chunk_lines(chunk: bytes, errors: str = "ignore") -> Iterator[str]:
+    """
+    Decode a line-aligned chunk and yield its lines without newlines.
+    Invalid UTF-8 is dropped unless `errors` says otherwise ("strict").
+    """
+    text = chunk.decode("utf-8", errors=errors)
+    if text.endswith("\n"):
+        text = text[:-1]
+    return iter(text.split("\n"))
+
+
+def open_maybe_gzip(path: str) -> Iterable[str]:
+    """Open a plain text or gzip-compressed file and yield lines."""
+    for chunk in iter_line_chunks(path):
+        lines = chunk.decode("utf-8", errors="ignore").split("\n")
+        last = lines.pop()
+        for line in lines:
+            yield line + "\n"
+        if last:
+            yield last
+
+
+def map_chunks(func, chunks: Iterable[Any], workers: int, *args, start: int = 0,
+               initializer=None, initargs: tuple = ()) -> Iterator[Any]:
+    """
+    Yield func(chunk, chunk_index, *args) for each chunk, in input order.
+    With `workers` > 1 chunks run in a process pool with a bounded number in
+    flight to cap memory use. The first `start` chunks are skipped (used to
+    resume from a checkpoint); chunk indexes stay absolute.
+
+    `initializer(*initargs)` sets up per-process state (such as a large
+    lookup table) once in every worker, or in this process when running
+    serially. Forked workers inherit initargs without copying; under spawn
+    or forkserver they are pickled once per worker.
+    """
+    chunks = islice(enumerate(chunks), start, None)
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for chunk_index, chunk in chunks:
+            yield func(chunk, chunk_index, *args)
+        return
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        for chunk_index, chunk in chunks:
+            pending.append(pool.submit(func, chunk, chunk_index, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,865 @@
+"""
+Extract English Open Library works into one or more JSONL datasets from a
+single pass over the works and authors dumps.
+
+Each output is a filter profile plus a path and a limit. All outputs share
+the author index, the dump scan and the basic filters (English, title, key,
+authors, A–Z prefix); each profile then applies its own stricter filters and
+keeps its own top-N heap by popularity.
+
+Built-in profiles:
+
+  clean   all authors resolved to names, description and subjects required
+  loose   subjects required; description optional, author names may fall
+          back to author ids
+
+Usage:
+
+    python3 extract_works.py \
+        --input   ol_dump_works_2025-09-30.txt.gz \
+        --authors ol_dump_authors_2025-09-30.txt.gz \
+        --output  clean:books_english_50k.jsonl:50000 \
+        --output  loose:books_english_loose_150k.jsonl:150000 \
+        --workers 0 --cache-dir dump_cache/
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import Counter
+
+import dump_cache
+from book_columns import ColumnWriter, columnar_path
+from checkpoint import CHECKPOINT_SECONDS, Checkpoint, scan_key
+from author_index import AuthorIndex, dump_stat, load_if_current, parse_author_id
+from dump_io import JSONDecodeError, loads, map_chunks, open_maybe_gzip
+
+# Key order of output records; optional keys are left out when absent
+RECORD_KEYS = (
+    "book_id", "title", "title_prefix", "title_lower", "authors", "isbn_13",
+    "first_publish_year", "subjects", "language", "description",
+    "avg_rating", "rating_count", "cover_id",
+)
+
+# The original loose extractor wrote the ratings before the description
+LOOSE_RECORD_KEYS = (
+    "book_id", "title", "title_prefix", "title_lower", "authors", "isbn_13",
+    "first_publish_year", "subjects", "language", "avg_rating", "rating_count",
+    "description", "cover_id",
+)
+
+# Filter profiles. Add an entry here to define a new dataset flavour.
+#
+#   title_fallback      use full_title when a work has no title
+#   keep_zero_cover_id  write cover_id 0 (otherwise only nonzero ids)
+#   record_keys         key order of the written records
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "clean": {
+        "description": "English only, A-Z titles, clean authors/desc/subjects",
+        "require_author_names": True,
+        "require_description": True,
+        "require_subjects": True,
+        "title_fallback": True,
+        "keep_zero_cover_id": True,
+        "record_keys": RECORD_KEYS,
+    },
+    "loose": {
+        "description": "English only, A-Z titles, subjects required, desc optional",
+        "require_author_names": False,
+        "require_description": False,
+        "require_subjects": True,
+        "title_fallback": False,
+        "keep_zero_cover_id": False,
+        "record_keys": LOOSE_RECORD_KEYS,
+    },
+}
+
+
+def extract_title_prefix(title: str) -> str:
+    """
+    Extract a single A–Z prefix character from a title.
+
+    Used as a simple sharding key.
+    """
+    if not title:
+        return "0"
+
+    for ch in title.strip():
+        if ch.isalpha() and "A" <= ch.upper() <= "Z":
+            return ch.upper()
+
+    return "0"
+
+
+def extract_year(first_publish_date) -> Optional[int]:
+    """Extract a four-digit year from a date-like string."""
+    if not isinstance(first_publish_date, str):
+        return None
+
+    m = re.search(r"\d{4}", first_publish_date)
+    if not m:
+        return None
+
+    try:
+        year = int(m.group(0))
+        if 1000 <= year <= 2025:
+            return year
+    except ValueError:
+        pass
+
+    return None
+
+
+def load_author_map(
+    authors_dump_path: str,
+    max_authors: int = 2_000_000,
+    only_ids: Optional[Set[int]] = None,
+) -> AuthorIndex:
+    """
+    Build a compact author index (see author_index.AuthorIndex) from the
+    authors dump. It resolves both key forms:
+
+      "/authors/OL34184A" -> "Some Author Name"
+      "OL34184A"          -> "Some Author Name"
+
+    If `only_ids` is given, only authors with those numeric ids are kept.
+    """
+    print("=" * 70)
+    print(f"Loading authors from {authors_dump_path} ...")
+    if only_ids is not None:
+        print(f"  Restricting to {len(only_ids):,} referenced authors")
+
+    def iter_pairs():
+        count = 0
+        for line_num, line in enumerate(open_maybe_gzip(authors_dump_path), start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            parts = line.split("\t")
+            if len(parts) < 2:
+                continue
+
+            # Cheap pre-check on the key column before parsing JSON
+            if only_ids is not None and parse_author_id(parts[1]) not in only_ids:
+                continue
+
+            json_str = parts[-1]
+            try:
+                author = loads(json_str)
+            except JSONDecodeError:
+                continue
+
+            key = author.get("key")   # e.g. "/authors/OL10000507A"
+            name = author.get("name")
+            if not key or not name or not isinstance(name, str):
+                continue
+
+            author_id = parse_author_id(key)
+            if author_id is None:
+                continue
+            if only_ids is not None and author_id not in only_ids:
+                continue
+
+            yield author_id, name
+            count += 1
+
+            if count >= max_authors:
+                print(f"  Loaded {count:,} authors (limit reached)")
+                break
+
+            if count > 0 and count % 100_000 == 0:
+                print(f"  Loaded {count:,} authors...")
+
+    author_map = AuthorIndex.build(iter_pairs(), dump_stat(authors_dump_path))
+    print(f"Author index ready with {len(author_map):,} authors.\n")
+    return author_map
+
+
+def extract_authors(work_json: dict, author_map: AuthorIndex) -> List[dict]:
+    """
+    Normalize the authors field of a work to a list of:
+
+        {"author_id": "...", "author_name": "..."}
+
+    If a name cannot be resolved from the author dump, the id is used as fallback.
+    """
+    authors: List[dict] = []
+    raw_authors = work_json.get("authors") or []
+
+    for a in raw_authors:
+        author_key: Optional[str] = None
+
+        if isinstance(a, str):
+            author_key = a
+        elif isinstance(a, dict):
+            if "key" in a and not author_key:
+                author_key = a["key"]
+            if "author" in a and isinstance(a["author"], dict):
+                inner = a["author"]
+                if "key" in inner and not author_key:
+                    author_key = inner["key"]
+
+        if not author_key:
+            continue
+
+        if isinstance(author_key, str) and author_key.startswith("/authors/"):
+            author_id = author_key.split("/")[-1]
+            full_key = author_key
+        else:
+            author_id = str(author_key)
+            full_key = author_key
+
+        author_name = author_map.get(full_key) or author_map.get(author_id) or author_id
+
+        authors.append({
+            "author_id": author_id,
+            "author_name": author_name,
+        })
+
+    return authors
+
+
+def extract_language(work_json: dict) -> str:
+    """
+    Extract a normalized language code from a work.
+
+    Returns:
+      - "en" for English
+      - another code (e.g. "fre") if present
+      - "unknown" if missing or malformed
+    """
+    langs = work_json.get("languages") or []
+    if not langs:
+        return "unknown"
+
+    first = langs[0] if isinstance(langs, list) else {}
+    if not isinstance(first, dict):
+        return "unknown"
+
+    key = first.get("key", "")
+    code = key.split("/")[-1] if key else ""
+
+    if code in ["eng", "en"]:
+        return "en"
+
+    return code or "unknown"
+
+
+def is_english_book(work_json: dict) -> bool:
+    """
+    Decide whether a work should be treated as English.
+
+    Primary signal:
+      - language == "en"
+
+    Fallback:
+      - language == "unknown" and title starts with A–Z
+    """
+    lang = extract_language(work_json)
+    if lang == "en":
+        return True
+
+    title = work_json.get("title", "")
+    if title:
+        first_char = title[0]
+        if "A" <= first_char.upper() <= "Z" and lang == "unknown":
+            return True
+
+    return False
+
+
+def get_popularity_score(work_json: dict) -> int:
+    """
+    Compute a simple popularity score for a work.
+
+    Higher score indicates a more prominent work.
+    """
+    score = 0
+
+    edition_count = work_json.get("edition_count", 0)
+    if isinstance(edition_count, int):
+        score += edition_count * 10
+
+    ratings = work_json.get("ratings_count", 0)
+    if isinstance(ratings, int):
+        score += ratings * 5
+
+    subjects = work_json.get("subjects") or []
+    score += len(subjects)
+
+    if work_json.get("covers"):
+        score += 20
+
+    return score
+
+
+def extract_description(work_json: dict) -> Optional[str]:
+    """
+    Extract a plain-text description from a work.
+
+    The field may be:
+      - a string
+      - a dict with a "value" field
+    """
+    desc = work_json.get("description")
+    if isinstance(desc, dict):
+        return desc.get("value")
+    if isinstance(desc, str):
+        return desc
+    return None
+
+
+def extract_cover_id(work_json: dict) -> Optional[int]:
+    """Extract the first cover id from a work, if present."""
+    covers = work_json.get("covers") or []
+    if isinstance(covers, list) and covers:
+        first = covers[0]
+        if isinstance(first, int):
+            return first
+    return None
+
+
+def basic_fields(work: dict) -> Optional[Tuple[str, str, str, bool]]:
+    """
+    Apply the basic filters that do not need author names (English, title,
+    key, A–Z prefix) to a parsed work.
+
+    Returns (key, title, title_prefix, title_from_full_title) or None if
+    filtered out.
+    """
+    if not is_english_book(work):
+        return None
+
+    title = work.get("title")
+    title_from_full_title = not title
+    if title_from_full_title:
+        title = work.get("full_title")
+    if not title or not isinstance(title, str):
+        return None
+
+    key = work.get("key")
+    if not key:
+        return None
+
+    title_prefix = extract_title_prefix(title)
+    if title_prefix not in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+        return None
+
+    return key, title, title_prefix, title_from_full_title
+
+
+def parse_candidate(work: dict, author_map: AuthorIndex) -> Optional[Dict[str, Any]]:
+    """
+    Apply the basic filters (English, title, key, authors, A–Z prefix) to a
+    parsed work.
+
+    Returns a scored candidate or None if the work is filtered out.
+    """
+    fields = basic_fields(work)
+    if fields is None:
+        return None
+    key, title, title_prefix, title_from_full_title = fields
+
+    authors = extract_authors(work, author_map)
+    if not authors:
+        return None
+
+    return {
+        "work": work,
+        "key": key,
+        "title": title,
+        "title_from_full_title": title_from_full_title,
+        "authors": authors,
+        "title_prefix": title_prefix,
+        "popularity": get_popularity_score(work),
+    }
+
+
+def build_record(item: Dict[str, Any], profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Apply a profile's stricter filters to a basic candidate and build the
+    final JSONL record, or return None if the candidate is rejected.
+    """
+    work = item["work"]
+    authors = item["authors"]
+    if item["title_from_full_title"] and not profile["title_fallback"]:
+        return None
+
+    # Require all authors to have a resolved name
+    if profile["require_author_names"]:
+        all_real_authors = all(
+            a.get("author_name") and a["author_name"] != a["author_id"]
+            for a in authors
+        )
+        if not all_real_authors:
+            return None
+
+    description = extract_description(work)
+    if profile["require_description"] and not description:
+        return None
+
+    subjects = [
+        s for s in (work.get("subjects") or [])
+        if isinstance(s, str)
+    ][:10]
+    if profile["require_subjects"] and not subjects:
+        return None
+
+    raw_key = item["key"]
+    if isinstance(raw_key, str) and raw_key.startswith("/works/"):
+        book_id = raw_key.split("/")[-1]
+    else:
+        book_id = raw_key
+
+    cover_id = extract_cover_id(work)
+
+    simplified: Dict[str, Any] = {
+        "book_id": book_id,
+        "title": item["title"],
+        "title_prefix": item["title_prefix"],
+        "title_lower": item["title"].lower(),
+        "authors": authors,
+        "isbn_13": work.get("isbn_13") or [],
+        "first_publish_year": extract_year(work.get("first_publish_date")),
+        "subjects": subjects,
+        "language": "en",
+    }
+
+    if description:
+        simplified["description"] = description
+
+    simplified["avg_rating"] = 0.0
+    simplified["rating_count"] = 0
+
+    if cover_id is not None and (cover_id or profile["keep_zero_cover_id"]):
+        simplified["cover_id"] = cover_id
+
+    return {k: simplified[k] for k in profile["record_keys"] if k in simplified}
+
+
+def push_bounded(heap: List[tuple], entry: tuple, limit: int) -> None:
+    """Push onto a min-heap holding at most `limit` of the largest entries."""
+    if len(heap) < limit:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heappushpop(heap, entry)
+
+
+def parse_output_spec(spec: str) -> Tuple[str, str, int]:
+    """Parse "PROFILE:PATH[:LIMIT]" into (profile, path, limit)."""
+    profile, sep, rest = spec.partition(":")
+    if not sep or profile not in PROFILES:
+        raise ValueError(
+            f"invalid output '{spec}': expected PROFILE:PATH[:LIMIT] "
+            f"with PROFILE one of {', '.join(PROFILES)}"
+        )
+    path, limit = rest, 50000
+    head, sep, tail = rest.rpartition(":")
+    if sep and tail.isdigit():
+        path, limit = head, int(tail)
+    return profile, path, limit
+
+
+# Author map of the current process, set by _init_worker (in every pool
+# worker, whatever the start method, or in-process when running serially).
+_worker_author_map: Optional[AuthorIndex] = None
+
+
+def _init_worker(author_map: AuthorIndex) -> None:
+    global _worker_author_map
+    _worker_author_map = author_map
+
+
+def _may_pass_any(work: dict, profiles: List[str]) -> bool:
+    """Whether a work could pass some profile, ignoring author-name checks."""
+    has_description = bool(extract_description(work))
+    has_subjects = any(isinstance(s, str) for s in (work.get("subjects") or []))
+    for name in profiles:
+        profile = PROFILES[name]
+        if profile["require_description"] and not has_description:
+            continue
+        if profile["require_subjects"] and not has_subjects:
+            continue
+        return True
+    return False
+
+
+def _chunk_author_ids(chunk: Any, chunk_index: int, profiles: List[str]) -> Set[int]:
+    """
+    Numeric ids of authors referenced by works in the chunk that could pass
+    one of the profiles (everything except author-name resolution).
+    """
+    ids: Set[int] = set()
+    for _, work in dump_cache.iter_chunk_works(chunk):
+        if basic_fields(work) is None or not _may_pass_any(work, profiles):
+            continue
+        for a in extract_authors(work, {}):
+            author_id = parse_author_id(a["author_id"])
+            if author_id is not None:
+                ids.add(author_id)
+    return ids
+
+
+def referenced_author_ids(
+    input_path: str,
+    profiles: List[str],
+    workers: int = 1,
+    cache_dir: Optional[str] = None,
+) -> Set[int]:
+    """First pass of two-pass mode: authors referenced by candidate works."""
+    print("Pass 0: Collecting authors referenced by candidate works...")
+    ids: Set[int] = set()
+    chunks = dump_cache.iter_dump_chunks(input_path, "works", cache_dir, workers)
+    for chunk_ids in map_chunks(_chunk_author_ids, chunks, workers, profiles):
+        ids |= chunk_ids
+    print(f"  Found {len(ids):,} referenced authors\n")
+    return ids
+
+
+def resolve_author_map(
+    authors_path: str,
+    input_path: str,
+    profiles: List[str],
+    author_index_path: Optional[str] = None,
+    two_pass: bool = False,
+    workers: int = 1,
+    cache_dir: Optional[str] = None,
+) -> AuthorIndex:
+    """
+    Get the author index, cheapest source first:
+
+      1. A saved index at `author_index_path` built from the same authors dump.
+      2. With `two_pass`, only authors referenced by candidate works
+         (not persisted, since it depends on the filters).
+      3. The full authors dump, saved to `author_index_path` if given.
+    """
+    if author_index_path:
+        author_map = load_if_current(author_index_path, authors_path)
+        if author_map is not None:
+            print(f"Using saved author index {author_index_path} ({len(author_map):,} authors)\n")
+            return author_map
+
+    if two_pass:
+        only_ids = referenced_author_ids(input_path, profiles, workers, cache_dir)
+        return load_author_map(authors_path, only_ids=only_ids)
+
+    author_map = load_author_map(authors_path)
+    if author_index_path:
+        author_map.save(author_index_path)
+        print(f"Saved author index to {author_index_path}\n")
+    return author_map
+
+
+def _select_chunk(
+    chunk: Any,
+    chunk_index: int,
+    outputs: List[Tuple[str, int]],
+) -> Tuple[int, int, List[List[tuple]]]:
+    """
+    Apply the basic filters once and each output's profile filters to one
+    chunk (raw bytes or a cached chunk path), keeping every output's `limit`
+    most popular records.
+
+    Heap entries are slim: (popularity, -position, title_prefix, json_line).
+    The negated input position makes ties go to the earlier work, matching a
+    stable sort of the whole dump. Returns (works, basic_count, heaps) with
+    one heap per output.
+    """
+    heaps: List[List[tuple]] = [[] for _ in outputs]
+    works = 0
+    basic_count = 0
+    for index_in_chunk, work in dump_cache.iter_chunk_works(chunk):
+        works += 1
+        item = parse_candidate(work, _worker_author_map)
+        if item is None:
+            continue
+        basic_count += 1
+
+        position = (chunk_index << 32) | index_in_chunk
+        for heap, (profile, limit) in zip(heaps, outputs):
+            # Skip building the record if it cannot make this heap
+            if len(heap) >= limit and (item["popularity"], -position) < heap[0][:2]:
+                continue
+            record = build_record(item, PROFILES[profile])
+            if record is None:
+                continue
+            entry = (
+                item["popularity"],
+                -position,
+                item["title_prefix"],
+                json.dumps(record, ensure_ascii=False),
+            )
+            push_bounded(heap, entry, limit)
+    return works, basic_count, heaps
+
+
+def select_top_works(
+    input_path: str,
+    author_map: AuthorIndex,
+    outputs: List[Tuple[str, int]],
+    workers: int = 1,
+    cache_dir: Optional[str] = None,
+    checkpoint: Optional[Checkpoint] = None,
+) -> List[List[tuple]]:
+    """
+    Stream the whole works dump once and return, for each (profile, limit)
+    output, its `limit` most popular records, best first. Memory stays
+    O(sum of limits) regardless of dump size.
+
+    With `workers` > 1, chunks are processed in a process pool and each
+    chunk's local top-`limit` is merged into the global heaps. With
+    `cache_dir`, chunks come from the preprocessed cache (see dump_cache).
+    With `checkpoint`, the heaps are saved periodically and a rerun resumes
+    after the last saved chunk.
+    """
+    heaps: List[List[tuple]] = [[] for _ in outputs]
+    total_works = 0
+    total_basic = 0
+
+    start = 0
+    if checkpoint is not None:
+        start, state = checkpoint.load()
+        if state is not None:
+            heaps, total_works, total_basic = state
+
+    chunks = dump_cache.iter_dump_chunks(input_path, "works", cache_dir, workers)
+    results = map_chunks(_select_chunk, chunks, workers, outputs, start=start,
+                         initializer=_init_worker, initargs=(author_map,))
+    for chunk_index, (works, basic_count, chunk_heaps) in enumerate(results, start):
+        total_works += works
+        total_basic += basic_count
+        for heap, chunk_heap, (_, limit) in zip(heaps, chunk_heaps, outputs):
+            for entry in chunk_heap:
+                push_bounded(heap, entry, limit)
+        kept = ", ".join(f"{profile} {len(heap):,}" for heap, (profile, _) in zip(heaps, outputs))
+        print(f"  Scanned {total_works:,} works, {total_basic:,} basic candidates, kept: {kept}")
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save(chunk_index + 1, (heaps, total_works, total_basic))
+
+    print(f"\nScan complete: {total_basic:,} English books passed basic filters")
+    return [sorted(heap, reverse=True) for heap in heaps]
+
+
+def write_output(
+    profile: str,
+    output_path: str,
+    limit: int,
+    selected: List[tuple],
+    columnar: bool = False,
+) -> None:
+    """
+    Write one profile's selected books and print its statistics. With
+    `columnar`, a typed column store is written next to the JSONL file
+    (see book_columns).
+    """
+    print(f"\nWriting {profile} books to {output_path}...")
+    count_written = 0
+    written_prefixes: List[str] = []
+    writer = ColumnWriter(columnar_path(output_path)) if columnar else None
+
+    with open(output_path, "w", encoding="utf-8") as out_f:
+        for _, _, title_prefix, json_line in selected:
+            out_f.write(json_line + "\n")
+            if writer is not None:
+                writer.append(loads(json_line))
+            count_written += 1
+            written_prefixes.append(title_prefix)
+
+            if count_written % 5_000 == 0:
+                print(f"  Written {profile} books: {count_written:,}")
+
+    if writer is not None:
+        writer.close()
+        print(f"  Columnar copy: {writer.path}")
+
+    print(f"\nCOMPLETE: {count_written:,} {profile} books written to {output_path}")
+    if count_written < limit:
+        print(f"WARNING: Only {count_written:,} books passed {profile} filters (target was {limit:,}).")
+
+    print("\n" + "=" * 70)
+    print(f"STATISTICS ({profile.upper()} BOOKS)")
+    print("=" * 70)
+
+    if written_prefixes:
+        prefix_dist = Counter(written_prefixes)
+        print("\nTitle Prefix Distribution:")
+        for prefix in sorted(prefix_dist.keys()):
+            count = prefix_dist[prefix]
+            percentage = (count / len(written_prefixes)) * 100
+            bar = "█" * int(percentage / 2)
+            print(f"  {prefix}: {count:>5,} ({percentage:>5.1f}%) {bar}")
+    else:
+        print(f"No {profile} books written; prefix distribution not available.")
+
+
+def extract_works(
+    input_path: str,
+    authors_path: str,
+    outputs: List[Tuple[str, str, int]],
+    workers: int = 1,
+    author_index_path: Optional[str] = None,
+    two_pass: bool = False,
+    cache_dir: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_interval: float = CHECKPOINT_SECONDS,
+    columnar: bool = False,
+) -> None:
+    """
+    Main pipeline:
+
+      1. Load author name mapping.
+      2. Stream the full works dump once, applying the shared basic filters
+         and each output's profile filters, and keep every output's `limit`
+         most popular books in its own bounded heap.
+      3. Write each output, most popular first, in the final JSONL schema.
+
+    `outputs` is a list of (profile, output_path, limit).
+
+    With `workers` > 1, step 2 parses line-aligned chunks in a process pool.
+    Authors come from a saved index when available (`author_index_path`), or
+    with `two_pass` only referenced authors are loaded (see resolve_author_map).
+    With `cache_dir`, both dumps are read from the preprocessed cache, which
+    is built on first use (see dump_cache). With `checkpoint_path`, step 2
+    saves its progress every `checkpoint_interval` seconds and a rerun with
+    the same inputs and outputs resumes from there (see checkpoint). With
+    `columnar`, each output also gets a typed column store next to it
+    (see book_columns).
+    """
+    profiles = [profile for profile, _, _ in outputs]
+
+    print("=" * 70)
+    print("OPEN LIBRARY WORKS EXTRACTOR")
+    print("=" * 70)
+    print(f"Input works:   {input_path}")
+    print(f"Input authors: {authors_path}")
+    for profile, output_path, limit in outputs:
+        print(f"Output:        {output_path} ({profile}, up to {limit:,} books)")
+        print(f"  Filter:      {PROFILES[profile]['description']}")
+    print("Sort:          By popularity (edition count, ratings)")
+    print(f"Workers:       {workers}")
+    print()
+
+    if cache_dir and not author_index_path:
+        author_index_path = dump_cache.author_index_path(authors_path, cache_dir)
+    author_map = resolve_author_map(
+        authors_path, input_path, profiles, author_index_path, two_pass, workers, cache_dir
+    )
+
+    # Pass 1: filter and select top books per output by popularity
+    print("Pass 1: Selecting top English books by popularity for each output...")
+    selection_outputs = [(profile, limit) for profile, _, limit in outputs]
+    checkpoint = Checkpoint(
+        checkpoint_path,
+        scan_key([input_path, authors_path], outputs=selection_outputs, cached=bool(cache_dir)),
+        checkpoint_interval,
+    )
+    selections = select_top_works(
+        input_path,
+        author_map,
+        selection_outputs,
+        workers,
+        cache_dir,
+        checkpoint,
+    )
+
+    # Pass 2: write each output
+    for (profile, output_path, limit), selected in zip(outputs, selections):
+        write_output(profile, output_path, limit, selected, columnar)
+    checkpoint.clear()
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options shared by extract_works.py and the single-profile wrappers."""
+    parser.add_argument(
+        "--input",
+        required=True,
+        help="Input works dump file (e.g., ol_dump_works_2025-09-30.txt.gz)",
+    )
+    parser.add_argument(
+        "--authors",
+        required=True,
+        help="Authors dump file (e.g., ol_dump_authors_latest.txt.gz)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Parser processes for the works dump; 0 = one per CPU (default: 1)",
+    )
+    parser.add_argument(
+        "--author-index",
+        help="Compact author index file; reused if built from the same authors dump, "
+             "otherwise built and saved here",
+    )
+    parser.add_argument(
+        "--two-pass",
+        action="store_true",
+        help="Scan works first and load only referenced authors (lower memory, extra pass)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for the preprocessed dump cache; built on first use, "
+             "reused while the dumps are unchanged",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Checkpoint file; progress is saved here periodically and a rerun with "
+             "the same inputs resumes from it",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=CHECKPOINT_SECONDS,
+        help=f"Seconds between checkpoint writes (default: {CHECKPOINT_SECONDS:g})",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Also write each output as a typed column store (.npz next to the .jsonl)",
+    )
+
+
+def run_from_args(args: argparse.Namespace, outputs: List[Tuple[str, str, int]]) -> None:
+    extract_works(
+        args.input,
+        args.authors,
+        outputs,
+        workers=args.workers or os.cpu_count() or 1,
+        author_index_path=args.author_index,
+        two_pass=args.two_pass,
+        cache_dir=args.cache_dir,
+        checkpoint_path=args.checkpoint,
+        checkpoint_interval=args.checkpoint_interval,
+        columnar=args.columnar,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Extract English works from an Open Library dump into one or "
+                    "more filtered JSONL datasets in a single pass."
+    )
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--output",
+        action="append",
+        required=True,
+        metavar="PROFILE:PATH[:LIMIT]",
+        help=f"Output dataset; repeatable. PROFILE is one of: {', '.join(PROFILES)}. "
+             "LIMIT defaults to 50000.",
+    )
+
+    args = parser.parse_args()
+    try:
+        outputs = [parse_output_spec(spec) for spec in args.output]
+    except ValueError as e:
+        parser.error(str(e))
+    run_from_args(args, outputs)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,29 +9,120 @@ Example:
         --books-in  books_english_150k.jsonl \
         --books-out books_english_top50k_with_ratings.jsonl \
         --limit     50000
+
+With --triplets-out, the same ratings scan also writes a compact rating
+triplet file for bootstrapping the recommender without DynamoDB (see
+app/recommender.load_rating_triplets). The Open Library dump has no user
+ids, so each edition (/books/OL...M) stands in for a user; ratings without
+an edition are left out. The file is an uncompressed NumPy .npz with:
+
+    user_codes  int32   dense edition code per rating
+    work_codes  int32   dense work code per rating
+    ratings     float32 rating value
+    user_nums   int64   numeric edition id per code ("OL{n}M")
+    work_nums   int64   numeric work id per code ("OL{n}W")
 """
 
 import argparse
-import gzip
+import heapq
 import json
-from typing import Iterable, Dict, Tuple, List
-from collections import defaultdict
+import os
+import re
+from typing import Dict, Optional, Tuple, List
 
+import numpy as np
 
-def open_maybe_gzip(path: str) -> Iterable[str]:
-    """Open a plain text or gzip-compressed file and yield lines."""
-    if path.endswith(".gz"):
-        f = gzip.open(path, "rt", encoding="utf-8", errors="ignore")
-    else:
-        f = open(path, "r", encoding="utf-8", errors="ignore")
-    try:
-        for line in f:
-            yield line
-    finally:
-        f.close()
+import dump_cache
+from book_columns import ColumnWriter, columnar_path
+from checkpoint import CHECKPOINT_SECONDS, AppendLog, Checkpoint, scan_key
+from dump_io import JSONDecodeError, iter_line_chunks, loads, map_chunks
+
+
+# work number, edition number (may be empty) and rating of a
+# "/works/OL1W<TAB>/books/OL2M<TAB>rating..." line
+_RATING_LINE_RE = re.compile(
+    rb"^/works/OL(\d+)W[ ]*\t(?:/books/OL(\d+)M)?[^\t\n]*\t[ ]*(\d+(?:\.\d*)?)[ \r]*(?:\t|$)",
+    re.MULTILINE,
+)
+
+
+# On-disk row of the triplet side file kept while checkpointing
+TRIPLET_DTYPE = np.dtype([("edition", "<i8"), ("work", "<i8"), ("rating", "<f8")])
 
 
-def load_ratings(ratings_path: str) -> Tuple[Dict[str, float], Dict[str, int]]:
+def _group_sums(work_nums: np.ndarray, ratings: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(unique work numbers, rating sums, rating counts) via bincount."""
+    keys, codes = np.unique(work_nums, return_inverse=True)
+    sums = np.bincount(codes, weights=ratings, minlength=len(keys))
+    counts = np.bincount(codes, minlength=len(keys))
+    return keys, sums, counts
+
+
+def _aggregate_chunk(chunk, chunk_index: int, triplets: bool = False) -> Tuple:
+    """
+    Per-work partial aggregates of one ratings chunk (raw line-aligned bytes
+    or a cached chunk path). Returns (lines, used, keys, sums, counts), plus
+    the valid (edition, work, rating) columns of rows with an edition when
+    `triplets` is set.
+    """
+    if isinstance(chunk, str):
+        work_bytes, edition_bytes, rating_bytes = dump_cache.load_chunk(chunk)
+        work_nums = np.frombuffer(work_bytes, dtype=np.int64)
+        edition_nums = np.frombuffer(edition_bytes, dtype=np.int64)
+        ratings = np.frombuffer(rating_bytes, dtype=np.float64)
+        lines = -1  # counted by the cache manifest
+    else:
+        matches = _RATING_LINE_RE.findall(chunk)
+        work_nums = np.array([m[0] for m in matches], dtype="S").astype(np.int64)
+        ratings = np.array([m[2] for m in matches], dtype="S").astype(np.float64)
+        if triplets:
+            edition_nums = np.array([m[1] or b"-1" for m in matches], dtype="S").astype(np.int64)
+        lines = chunk.count(b"\n") + (0 if chunk.endswith(b"\n") else 1)
+
+    # Discard obviously invalid ratings
+    valid = (ratings >= 0.5) & (ratings <= 5.0)
+    result = (lines, int(valid.sum())) + _group_sums(work_nums[valid], ratings[valid])
+    if triplets:
+        keep = valid & (edition_nums >= 0)
+        result += (edition_nums[keep], work_nums[keep], ratings[keep])
+    return result
+
+
+def _merge_partials(keys: List[np.ndarray], sums: List[np.ndarray], counts: List[np.ndarray]):
+    """Merge per-chunk (keys, sums, counts) aggregates into one set of arrays."""
+    if not keys:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=np.int64)
+    merged_keys, codes = np.unique(np.concatenate(keys), return_inverse=True)
+    merged_sums = np.bincount(codes, weights=np.concatenate(sums), minlength=len(merged_keys))
+    merged_counts = np.bincount(codes, weights=np.concatenate(counts), minlength=len(merged_keys))
+    return merged_keys, merged_sums, merged_counts.astype(np.int64)
+
+
+def write_triplets(path: str, edition_nums: np.ndarray, work_nums: np.ndarray, ratings: np.ndarray) -> None:
+    """Write (edition, work, rating) columns as dense-coded triplets (see module docstring)."""
+    user_nums, user_codes = np.unique(edition_nums, return_inverse=True)
+    item_nums, work_codes = np.unique(work_nums, return_inverse=True)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            user_codes=user_codes.astype(np.int32),
+            work_codes=work_codes.astype(np.int32),
+            ratings=ratings.astype(np.float32),
+            user_nums=user_nums.astype(np.int64),
+            work_nums=item_nums.astype(np.int64),
+        )
+    print(f"Wrote {len(ratings):,} rating triplets ({len(user_nums):,} editions x "
+          f"{len(item_nums):,} works) to {path}\n")
+
+
+def load_ratings(
+        ratings_path: str,
+        cache_dir: Optional[str] = None,
+        workers: int = 1,
+        triplets_out: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: float = CHECKPOINT_SECONDS,
+) -> Tuple[Dict[str, float], Dict[str, int]]:
     """
     Aggregate ratings per work from the rating dump.
 
@@ -42,52 +133,139 @@ def load_ratings(ratings_path: str) -> Tuple[Dict[str, float], Dict[str, int]]:
     Returns:
       - sum_ratings[work_id]   : sum of all ratings for that work
       - count_ratings[work_id] : number of rating entries for that work
-    """
-    sum_ratings: Dict[str, float] = defaultdict(float)
-    count_ratings: Dict[str, int] = defaultdict(int)
 
+    The dump is read in line-aligned chunks. Each chunk is parsed with one
+    regex scan into work number / rating arrays and reduced with bincount
+    group sums; partial aggregates are merged the same way at the end. With
+    `workers` > 1 chunks are aggregated in a process pool. With `cache_dir`,
+    chunks come from the preprocessed columnar cache (see dump_cache), which
+    is built on first use. With `triplets_out`, rating triplets from the same
+    scan are written there (see write_triplets).
+
+    With `checkpoint_path`, the merged partial aggregates are saved every
+    `checkpoint_interval` seconds and a rerun resumes after the last saved
+    chunk (see checkpoint). Triplets are appended to `<checkpoint>.triplets`
+    as they arrive and the checkpoint stores only its length.
+    """
     print("=" * 70)
     print(f"Loading ratings from {ratings_path} ...")
 
-    line_count = 0
-    used_count = 0
+    checkpoint = Checkpoint(
+        checkpoint_path,
+        scan_key([ratings_path], cached=bool(cache_dir), triplets=triplets_out is not None),
+        checkpoint_interval,
+    )
+    # Triplets grow with the dump, so they are appended to a side file and
+    # the checkpoint only records how many bytes of it are covered
+    triplet_log = AppendLog(
+        checkpoint_path + ".triplets" if checkpoint_path and triplets_out else None,
+        TRIPLET_DTYPE,
+    )
+    start, state = checkpoint.load()
+    if state is not None:
+        line_count, used_count, partial_keys, partial_sums, partial_counts, triplet_offset = state
+    if state is None or not triplet_log.open(triplet_offset):
+        if state is not None:
+            print(f"Ignoring checkpoint {checkpoint_path}: triplet file is missing or short")
+        triplet_log.open()
+        start = line_count = used_count = 0
+        partial_keys: List[np.ndarray] = []
+        partial_sums: List[np.ndarray] = []
+        partial_counts: List[np.ndarray] = []
+
+    if cache_dir:
+        manifest = dump_cache.ensure_cached(ratings_path, "ratings", cache_dir, workers)
+        chunks = iter(manifest["chunks"])
+    else:
+        chunks = iter_line_chunks(ratings_path)
+
+    results = map_chunks(_aggregate_chunk, chunks, workers, triplets_out is not None, start=start)
+    for chunk_index, (lines, used, keys, sums, counts, *columns) in enumerate(results, start):
+        if columns:
+            rows = np.empty(len(columns[0]), dtype=TRIPLET_DTYPE)
+            rows["edition"], rows["work"], rows["rating"] = columns
+            triplet_log.append(rows)
+        line_count += lines
+        used_count += used
+        partial_keys.append(keys)
+        partial_sums.append(sums)
+        partial_counts.append(counts)
+        print(f"  Aggregated {used_count:,} ratings...")
+
+        if checkpoint.due():
+            # Compact before saving so checkpoints stay O(unique works)
+            partial_keys, partial_sums, partial_counts = (
+                [a] for a in _merge_partials(partial_keys, partial_sums, partial_counts)
+            )
+            checkpoint.save(chunk_index + 1, (
+                line_count, used_count, partial_keys, partial_sums, partial_counts,
+                triplet_log.offset(),
+            ))
+
+    if cache_dir:
+        line_count = manifest["lines"]
+
+    keys, sums, counts = _merge_partials(partial_keys, partial_sums, partial_counts)
+    work_ids = [f"OL{n}W" for n in keys.tolist()]
+    sum_ratings: Dict[str, float] = dict(zip(work_ids, sums.tolist()))
+    count_ratings: Dict[str, int] = dict(zip(work_ids, counts.tolist()))
 
-    for line in open_maybe_gzip(ratings_path):
-        line_count += 1
-        line = line.strip()
-        if not line:
-            continue
+    print(f"Done. Read {line_count:,} lines, used {used_count:,} ratings.")
+    print(f"Unique works with ratings: {len(sum_ratings):,}\n")
 
-        parts = line.split("\t")
-        if len(parts) < 3:
-            continue
+    if triplets_out:
+        rows = triplet_log.read()
+        write_triplets(triplets_out, rows["edition"], rows["work"], rows["rating"])
 
-        work_col = parts[0].strip()
-        if not work_col.startswith("/works/"):
-            continue
+    triplet_log.clear()
+    checkpoint.clear()
+    return sum_ratings, count_ratings
 
-        work_id = work_col.split("/")[-1]  # "/works/OL1629179W" -> "OL1629179W"
-        rating_str = parts[2].strip()
 
-        try:
-            rating = float(rating_str)
-        except ValueError:
-            continue
+def apply_ratings(book: dict, sum_ratings: Dict[str, float], count_ratings: Dict[str, int]) -> bool:
+    """
+    Set rating_count / avg_rating on `book` from the rating aggregates.
+    Returns True if the book has ratings in the dump.
+    """
+    book_id = book.get("book_id") or book.get("key")
+    if book_id in count_ratings:
+        c = count_ratings[book_id]
+        s = sum_ratings[book_id]
+        avg = s / c if c > 0 else 0.0
 
-        # Discard obviously invalid ratings
-        if rating < 0.5 or rating > 5.0:
-            continue
+        book["rating_count"] = c
+        book["avg_rating"] = round(avg, 3)
+        return True
 
-        sum_ratings[work_id] += rating
-        count_ratings[work_id] += 1
-        used_count += 1
+    # Ensure rating fields exist, even if there are no ratings
+    book.setdefault("rating_count", 0)
+    book.setdefault("avg_rating", 0.0)
+    return False
 
-        if used_count % 100_000 == 0:
-            print(f"  Aggregated {used_count:,} ratings...")
 
-    print(f"Done. Read {line_count:,} lines, used {used_count:,} ratings.")
-    print(f"Unique works with ratings: {len(sum_ratings):,}\n")
-    return sum_ratings, count_ratings
+def sort_key(b: dict):
+    """Sort key: has_rating, rating_count, avg_rating (all descending)."""
+    rc = b.get("rating_count", 0)
+    ar = b.get("avg_rating", 0.0)
+    has_rating = 1 if rc > 0 else 0
+    return (has_rating, rc, ar)
+
+
+def parse_book(line: bytes) -> Optional[dict]:
+    """Parse one books JSONL line; None for blank, malformed or id-less lines."""
+    line = line.strip()
+    if not line:
+        return None
+
+    try:
+        book = loads(line)
+    except JSONDecodeError:
+        return None
+
+    if not (book.get("book_id") or book.get("key")):
+        # Skip malformed records without an id
+        return None
+    return book
 
 
 def update_and_select_top_books(
@@ -96,15 +274,24 @@ def update_and_select_top_books(
         sum_ratings: Dict[str, float],
         count_ratings: Dict[str, int],
         limit: int,
+        columnar: bool = False,
 ) -> None:
     """
-    Load all books from `books_in`, attach rating_count / avg_rating from the
-    rating aggregates, sort by rating popularity, and write the top-N books.
+    Attach rating_count / avg_rating from the rating aggregates to the books
+    in `books_in`, and write the top-N books by rating popularity.
 
     Sort criteria (descending):
       1) has_rating   (rating_count > 0)
       2) rating_count
       3) avg_rating
+
+    Books are streamed: the first pass keeps only a bounded heap of
+    (sort key, -line number, file offset) entries, and the second pass seeks
+    to the selected offsets to write the records. Ties keep input order, as
+    with a stable sort, and memory is O(limit) rather than O(books).
+
+    With `columnar`, the selected books are also written as a typed column
+    store next to `books_out` (see book_columns).
     """
     print("=" * 70)
     print("Updating books with ratings and selecting TOP books...")
@@ -113,70 +300,60 @@ def update_and_select_top_books(
     print(f"Top-N limit:   {limit}")
     print()
 
-    books: List[dict] = []
+    heap: List[tuple] = []
     in_count = 0
+    loaded_count = 0
     updated_count = 0
 
-    # Load all books into memory and enrich with ratings
-    with open(books_in, "r", encoding="utf-8") as f_in:
+    # Pass 1: score every book, keeping only the top-N offsets
+    with open(books_in, "rb") as f_in:
+        offset = 0
         for line in f_in:
+            line_offset = offset
+            offset += len(line)
             in_count += 1
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                book = json.loads(line)
-            except json.JSONDecodeError:
-                continue
 
-            book_id = book.get("book_id") or book.get("key")
-            if not book_id:
-                # Skip malformed records without an id
+            book = parse_book(line)
+            if book is None:
                 continue
 
-            if book_id in count_ratings:
-                c = count_ratings[book_id]
-                s = sum_ratings[book_id]
-                avg = s / c if c > 0 else 0.0
-
-                book["rating_count"] = c
-                book["avg_rating"] = round(avg, 3)
+            if apply_ratings(book, sum_ratings, count_ratings):
                 updated_count += 1
-            else:
-                # Ensure rating fields exist, even if there are no ratings
-                book.setdefault("rating_count", 0)
-                book.setdefault("avg_rating", 0.0)
+            loaded_count += 1
 
-            books.append(book)
+            entry = (sort_key(book), -in_count, line_offset)
+            if limit <= 0 or len(heap) < limit:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heappushpop(heap, entry)
 
-    print(f"Done reading books. Total books loaded: {len(books):,}")
+    print(f"Done reading books. Total books scanned: {loaded_count:,}")
     print(f"Books with non-zero ratings: {updated_count:,}\n")
 
-    if not books:
+    if not heap:
         print("No books loaded. Nothing to write.")
         return
 
-    # Sort key: has_rating, rating_count, avg_rating (all descending)
-    def sort_key(b: dict):
-        rc = b.get("rating_count", 0)
-        ar = b.get("avg_rating", 0.0)
-        has_rating = 1 if rc > 0 else 0
-        return (has_rating, rc, ar)
-
-    print("Sorting books by rating_count and avg_rating ...")
-    books_sorted = sorted(books, key=sort_key, reverse=True)
-
-    # Keep only the top-N records
-    top_n = books_sorted[:limit] if limit > 0 else books_sorted
-    print(f"Selected top {len(top_n):,} books (limit = {limit:,}).")
-
-    # Write JSONL output
-    with open(books_out, "w", encoding="utf-8") as f_out:
-        for b in top_n:
-            f_out.write(json.dumps(b, ensure_ascii=False) + "\n")
-
-    print(f"\nDone. Wrote {len(top_n):,} books to {books_out}.")
+    print("Sorting selected books by rating_count and avg_rating ...")
+    selected = sorted(heap, reverse=True)
+    print(f"Selected top {len(selected):,} books (limit = {limit:,}).")
+
+    # Pass 2: write the selected records, re-reading each from its offset
+    writer = ColumnWriter(columnar_path(books_out)) if columnar else None
+    with open(books_in, "rb") as f_in, open(books_out, "w", encoding="utf-8") as f_out:
+        for _, _, line_offset in selected:
+            f_in.seek(line_offset)
+            book = parse_book(f_in.readline())
+            apply_ratings(book, sum_ratings, count_ratings)
+            f_out.write(json.dumps(book, ensure_ascii=False) + "\n")
+            if writer is not None:
+                writer.append(book)
+
+    if writer is not None:
+        writer.close()
+        print(f"Columnar copy: {writer.path}")
+
+    print(f"\nDone. Wrote {len(selected):,} books to {books_out}.")
     print("=" * 70)
 
 
@@ -206,16 +383,53 @@ def main() -> None:
         default=50000,
         help="Number of top books to keep (default: 50000)",
     )
+    parser.add_argument(
+        "--cache-dir",
+        help="Preprocessed dump cache directory (built on first use, reused while "
+             "the rating dump is unchanged)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes aggregating rating chunks; 0 = one per CPU (default: 1)",
+    )
+    parser.add_argument(
+        "--triplets-out",
+        help="Also write (edition, work, rating) triplets for the recommender "
+             "to this .npz file",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Also write the output as a typed column store (.npz next to the .jsonl)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Checkpoint file for the ratings scan; progress is saved here "
+             "periodically and a rerun with the same dump resumes from it",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=CHECKPOINT_SECONDS,
+        help=f"Seconds between checkpoint writes (default: {CHECKPOINT_SECONDS:g})",
+    )
 
     args = parser.parse_args()
 
-    sum_ratings, count_ratings = load_ratings(args.ratings)
+    workers = args.workers or os.cpu_count() or 1
+    sum_ratings, count_ratings = load_ratings(
+        args.ratings, args.cache_dir, workers, args.triplets_out,
+        args.checkpoint, args.checkpoint_interval,
+    )
     update_and_select_top_books(
         args.books_in,
         args.books_out,
         sum_ratings,
         count_ratings,
         args.limit,
+        args.columnar,
     )
 
 
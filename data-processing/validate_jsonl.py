@@ -1,18 +1,202 @@
 """
 Validate JSONL book data file for required fields and data quality.
 
+Every record is checked in a single streaming pass, so memory stays flat
+however large the file is. With --workers > 1 the file is split into
+line-aligned chunks that are validated in a process pool and merged.
+
 Usage:
     python3 validate_jsonl.py books_english_50k.jsonl
+    python3 validate_jsonl.py books_english_top2m.jsonl --workers 0
+    python3 validate_jsonl.py books_english_50k.npz    # columnar copy (--columnar)
 """
 
-import json
+import argparse
+import os
 import sys
 from collections import Counter
 
+from book_columns import is_columnar, iter_books
+from dump_io import JSONDecodeError, chunk_lines, iter_line_chunks, loads, map_chunks
+
+# NOTE: key -> book_id; authors items now contain author_id/author_name
+REQUIRED_FIELDS = ["book_id", "title", "title_prefix", "title_lower", "authors", "language"]
+
+OPTIONAL_FIELDS = [
+    "isbn_13",
+    "first_publish_year",
+    "subjects",
+    "description",
+    "cover_id",
+    "avg_rating",
+    "rating_count",
+]
 
-def validate_books(filename):
+# Examples of each problem kept for the report
+MAX_SAMPLES = 10
+
+
+class ValidationStats:
+    """
+    Counts for one stretch of the file. Stats of consecutive chunks are
+    combined with `merge`, which shifts their line numbers, so examples stay
+    the first MAX_SAMPLES of the whole file.
     """
-    Validate JSONL file for book data.
+
+    def __init__(self):
+        self.lines = 0
+        self.total = 0
+        self.parse_errors = 0
+        self.missing_count = Counter()
+        self.type_errors = Counter()
+        self.optional_count = Counter()
+        self.prefix_counter = Counter()
+        # (line, message) pairs
+        self.parse_samples = []
+        self.missing_samples = []
+        self.type_samples = []
+
+    def _sample(self, samples: list, line: int, message: str) -> None:
+        if len(samples) < MAX_SAMPLES:
+            samples.append((line, message))
+
+    def parse_error(self, line: int, error: Exception) -> None:
+        self.parse_errors += 1
+        self._sample(self.parse_samples, line, str(error))
+
+    def check(self, book, line: int) -> None:
+        """Check one record (found on `line`) and add it to the counts."""
+        if not isinstance(book, dict):
+            self.parse_error(line, ValueError("record is not a JSON object"))
+            return
+        self.total += 1
+
+        for field in REQUIRED_FIELDS:
+            if field not in book or book[field] in (None, "", []):
+                self.missing_count[field] += 1
+                self._sample(self.missing_samples, line,
+                             f"missing '{field}' in '{book.get('title', 'Unknown')}'")
+
+        for problem in _type_problems(book):
+            self.type_errors[problem] += 1
+            self._sample(self.type_samples, line, problem)
+
+        for field in OPTIONAL_FIELDS:
+            if book.get(field):
+                self.optional_count[field] += 1
+
+        prefix = book.get("title_prefix", "?")
+        self.prefix_counter[prefix if isinstance(prefix, str) else "?"] += 1
+
+    def merge(self, other: "ValidationStats") -> None:
+        """Append the stats of the chunk that follows this one."""
+        for mine, theirs in (
+            (self.parse_samples, other.parse_samples),
+            (self.missing_samples, other.missing_samples),
+            (self.type_samples, other.type_samples),
+        ):
+            for line, message in theirs[:MAX_SAMPLES - len(mine)]:
+                mine.append((line + self.lines, message))
+        self.lines += other.lines
+        self.total += other.total
+        self.parse_errors += other.parse_errors
+        self.missing_count.update(other.missing_count)
+        self.type_errors.update(other.type_errors)
+        self.optional_count.update(other.optional_count)
+        self.prefix_counter.update(other.prefix_counter)
+
+
+def _type_problems(book: dict):
+    """Yield a short description of each wrongly typed field of a record."""
+    # authors: should be a list of objects with author_id / author_name
+    authors = book.get("authors")
+    if "authors" in book:
+        if not isinstance(authors, list):
+            yield "'authors' should be a list"
+        else:
+            for author in authors:
+                if not isinstance(author, dict):
+                    yield "'authors' items should be objects"
+                    break
+                # Check for author_id / author_name fields (soft check)
+                if "author_id" not in author:
+                    yield "author object missing 'author_id' field"
+                    break
+                if "author_name" not in author:
+                    yield "author object missing 'author_name' field"
+                    break
+
+    # title_prefix should be a single character (A-Z or similar)
+    if "title_prefix" in book:
+        prefix = book["title_prefix"]
+        if not isinstance(prefix, str) or len(prefix) != 1:
+            yield "'title_prefix' should be a single character"
+
+    # avg_rating / rating_count should be numeric if present (bool is an int subclass)
+    avg_rating = book.get("avg_rating")
+    if "avg_rating" in book and (isinstance(avg_rating, bool) or not isinstance(avg_rating, (int, float))):
+        yield "'avg_rating' should be numeric"
+    rating_count = book.get("rating_count")
+    if "rating_count" in book and (isinstance(rating_count, bool) or not isinstance(rating_count, int)):
+        yield "'rating_count' should be int"
+
+
+def _strict_lines(chunk: bytes):
+    """
+    Lines of a chunk decoded as strict UTF-8; a line that is not valid
+    UTF-8 comes back as the UnicodeDecodeError, so no bytes are dropped.
+    """
+    try:
+        return list(chunk_lines(chunk, errors="strict"))
+    except UnicodeDecodeError:
+        pass
+    lines = []
+    for raw in chunk[:-1].split(b"\n") if chunk.endswith(b"\n") else chunk.split(b"\n"):
+        try:
+            lines.append(raw.decode("utf-8"))
+        except UnicodeDecodeError as e:
+            lines.append(e)
+    return lines
+
+
+def _validate_chunk(chunk: bytes, chunk_index: int) -> ValidationStats:
+    """Validate a line-aligned JSONL chunk; line numbers are chunk-relative."""
+    stats = ValidationStats()
+    for line_num, line in enumerate(_strict_lines(chunk), 1):
+        stats.lines = line_num
+        if isinstance(line, UnicodeDecodeError):
+            stats.parse_error(line_num, line)
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            book = loads(line)
+        except JSONDecodeError as e:
+            stats.parse_error(line_num, e)
+            continue
+        stats.check(book, line_num)
+    return stats
+
+
+def scan_books(filename: str, workers: int = 1) -> ValidationStats:
+    """Validate every record of a JSONL or columnar file in one pass."""
+    stats = ValidationStats()
+    if is_columnar(filename):
+        # Typed columns cannot hold malformed lines; check records in order
+        for row, book in enumerate(iter_books(filename), 1):
+            stats.lines = row
+            stats.check(book, row)
+        return stats
+
+    for chunk_stats in map_chunks(_validate_chunk, iter_line_chunks(filename), workers):
+        stats.merge(chunk_stats)
+    return stats
+
+
+def validate_books(filename, workers=1):
+    """
+    Validate JSONL file for book data, checking every record in one pass.
 
     Current schema (per line):
 
@@ -58,147 +242,68 @@ def validate_books(filename):
     print(f"VALIDATING: {filename}")
     print("=" * 70)
 
-    books = []
-    parse_errors = 0
-
-    # Step 1: Read JSONL file
-    print("\n[1/5] Reading JSONL file...")
-    with open(filename, "r", encoding="utf-8") as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                book = json.loads(line)
-                books.append(book)
-            except json.JSONDecodeError as e:
-                print(f"ERROR: Line {line_num}: {e}")
-                parse_errors += 1
-                if parse_errors > 10:
-                    print("ERROR: Too many parse errors. Stopping.")
-                    return False
-
-    total = len(books)
-    print(f"SUCCESS: Loaded {total:,} books")
+    # Step 1: Scan the file once, checking every record
+    print(f"\n[1/5] Scanning records ({workers} worker{'s' if workers != 1 else ''})...")
+    stats = scan_books(filename, workers)
+    total = stats.total
+    parse_errors = stats.parse_errors
+
+    for line, message in stats.parse_samples:
+        print(f"ERROR: Line {line}: {message}")
+    print(f"SUCCESS: Checked {total:,} books ({stats.lines:,} lines)")
 
     if parse_errors > 0:
-        print(f"WARNING: {parse_errors} lines had parse errors")
+        print(f"WARNING: {parse_errors:,} lines had parse errors")
+    if total == 0:
+        print("ERROR: No books found")
+        return False
 
     # Step 2: Check required fields
     print("\n[2/5] Checking required fields...")
 
-    # NOTE: key -> book_id; authors items now contain author_id/author_name
-    required = ["book_id", "title", "title_prefix", "title_lower", "authors", "language"]
-
-    missing_count = {field: 0 for field in required}
-    sample_errors = []
-
-    for i, book in enumerate(books):
-        for field in required:
-            if field not in book or book[field] in (None, "", []):
-                missing_count[field] += 1
-                if len(sample_errors) < 10:
-                    sample_errors.append(
-                        {
-                            "line": i + 1,
-                            "field": field,
-                            "title": book.get("title", "Unknown"),
-                        }
-                    )
-
-    total_missing = sum(missing_count.values())
+    total_missing = sum(stats.missing_count.values())
 
     if total_missing == 0:
         print("SUCCESS: All required fields present")
     else:
-        print(f"WARNING: {total_missing} missing required fields:")
-        for field, count in missing_count.items():
+        print(f"WARNING: {total_missing:,} missing required fields:")
+        for field in REQUIRED_FIELDS:
+            count = stats.missing_count[field]
             if count > 0:
                 percentage = (count / total) * 100
                 print(f"  - {field}: {count:,} ({percentage:.1f}%)")
 
-        if sample_errors:
-            print("\n  Sample errors:")
-            for err in sample_errors:
-                print(
-                    f"    Line {err['line']}: missing '{err['field']}' in '{err['title']}'"
-                )
-
-    # Step 3: Check field types (sample)
-    print("\n[3/5] Checking field types (sample)...")
-
-    type_errors = 0
-    sample_size = min(1000, total)
-
-    for i, book in enumerate(books[:sample_size]):
-        # authors: should be a list of objects with author_id / author_name
-        if "authors" in book:
-            if not isinstance(book["authors"], list):
-                print(f"WARNING: Line {i+1}: 'authors' should be a list")
-                type_errors += 1
-            elif len(book["authors"]) > 0:
-                first_author = book["authors"][0]
-                if not isinstance(first_author, dict):
-                    print(f"WARNING: Line {i+1}: 'authors' items should be objects")
-                    type_errors += 1
-                else:
-                    # Check for author_id / author_name fields (soft check)
-                    if "author_id" not in first_author:
-                        print(
-                            f"WARNING: Line {i+1}: author object missing 'author_id' field"
-                        )
-                        type_errors += 1
-                    if "author_name" not in first_author:
-                        print(
-                            f"WARNING: Line {i+1}: author object missing 'author_name' field"
-                        )
-                        type_errors += 1
-
-        # title_prefix should be a single character (A-Z or similar)
-        if "title_prefix" in book:
-            prefix = book["title_prefix"]
-            if not isinstance(prefix, str) or len(prefix) != 1:
-                print(
-                    f"WARNING: Line {i+1}: 'title_prefix' should be single character, got '{prefix}'"
-                )
-                type_errors += 1
-
-        # avg_rating / rating_count should be numeric if present
-        if "avg_rating" in book and not isinstance(book["avg_rating"], (int, float)):
-            print(f"WARNING: Line {i+1}: 'avg_rating' should be numeric")
-            type_errors += 1
-        if "rating_count" in book and not isinstance(book["rating_count"], int):
-            print(f"WARNING: Line {i+1}: 'rating_count' should be int")
-            type_errors += 1
+        print("\n  Sample errors:")
+        for line, message in stats.missing_samples:
+            print(f"    Line {line}: {message}")
+
+    # Step 3: Check field types
+    print("\n[3/5] Checking field types (all records)...")
+
+    type_errors = sum(stats.type_errors.values())
 
     if type_errors == 0:
-        print("SUCCESS: All field types look correct in sample")
+        print("SUCCESS: All field types look correct")
     else:
-        print(f"WARNING: {type_errors} type errors found in sample")
+        print(f"WARNING: {type_errors:,} type errors found:")
+        for problem, count in stats.type_errors.most_common():
+            print(f"  - {problem}: {count:,}")
+        print("\n  Sample errors:")
+        for line, message in stats.type_samples:
+            print(f"    Line {line}: {message}")
 
     # Step 4: Check optional fields coverage
     print("\n[4/5] Checking optional field coverage...")
 
-    optional = [
-        "isbn_13",
-        "first_publish_year",
-        "subjects",
-        "description",
-        "cover_id",
-        "avg_rating",
-        "rating_count",
-    ]
-
-    for field in optional:
-        count = sum(1 for book in books if field in book and book[field])
+    for field in OPTIONAL_FIELDS:
+        count = stats.optional_count[field]
         percentage = (count / total) * 100
         print(f"  - {field:16s}: {count:>6,} ({percentage:>5.1f}%)")
 
     # Step 5: Analyze title_prefix distribution
     print("\n[5/5] Analyzing title_prefix distribution...")
 
-    prefix_counter = Counter(book.get("title_prefix", "?") for book in books)
+    prefix_counter = stats.prefix_counter
 
     expected = set("ABCDEFGHIJKLMNOPQRSTUVWXYZ0")
     found = set(prefix_counter.keys())
@@ -235,7 +340,7 @@ def validate_books(filename):
     print(f"Total books:          {total:,}")
     print(f"Parse errors:         {parse_errors}")
     print(f"Missing fields:       {total_missing}")
-    print(f"Type errors (sample): {type_errors}")
+    print(f"Type errors:          {type_errors}")
     print(f"A-Z prefix books:     {az_count:,} ({az_percentage:.1f}%)")
 
     # Determine pass/fail (simple heuristic)
@@ -252,13 +357,19 @@ def validate_books(filename):
 
 
 def main():
-    if len(sys.argv) > 1:
-        filename = sys.argv[1]
-    else:
-        filename = "books_english_50k.jsonl"
+    parser = argparse.ArgumentParser(description="Validate a book JSONL (or columnar .npz) file.")
+    parser.add_argument("filename", nargs="?", default="books_english_50k.jsonl")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Validator processes for JSONL files; 0 = one per CPU (default: 1)",
+    )
+    args = parser.parse_args()
+    filename = args.filename
 
     try:
-        success = validate_books(filename)
+        success = validate_books(filename, workers=args.workers or os.cpu_count() or 1)
         sys.exit(0 if success else 1)
     except FileNotFoundError:
         print(f"ERROR: File not found: {filename}")
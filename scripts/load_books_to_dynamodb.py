@@ -6,18 +6,41 @@ Usage example:
   python3 load_books_to_dynamodb.py \
     --file ../Data_process/books_english_top50k_with_ratings.jsonl \
     --table Books \
-    --region us-east-1
+    --region us-east-1 \
+    --workers 8
+
+Against dynamodb-local (docker-compose.yml maps it to port 8001):
+
+  python3 load_books_to_dynamodb.py --file books.jsonl --table Books \
+    --region us-west-2 --endpoint-url http://localhost:8001 --report load.json
+
+A long load can record its progress and be continued after an interruption
+or failed items (only uncommitted records are written again):
+
+  python3 load_books_to_dynamodb.py --file books.jsonl --table Books \
+    --progress books.progress.json --resume
+
+The columnar copy written with --columnar (books_....npz) can be loaded
+instead of the JSONL file.
 
 Make sure your AWS credentials & region are configured (env vars or ~/.aws).
 """
 
 import argparse
+import hashlib
 import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import zlib
 from decimal import Decimal
-from typing import Iterator
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 
 
 def iter_jsonl(path: str) -> Iterator[dict]:
@@ -38,9 +61,442 @@ def iter_jsonl(path: str) -> Iterator[dict]:
                 continue
 
 
-def load_books(file_path: str, table_name: str, region: str | None = None):
+def iter_columnar(path: str) -> Iterator[dict]:
+    """
+    Stream books from a columnar .npz written by the data-processing scripts
+    (see data-processing/book_columns.py), with floats as Decimal.
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data-processing"))
+    from book_columns import iter_books
+
+    for book in iter_books(path):
+        book["avg_rating"] = Decimal(str(book["avg_rating"]))
+        yield book
+
+
+def iter_books(path: str) -> Iterator[dict]:
+    return iter_columnar(path) if path.endswith(".npz") else iter_jsonl(path)
+
+
+# Error codes that mean "slow down" rather than "this item is bad"
+THROTTLE_ERRORS = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+BATCH_SIZE = 25          # BatchWriteItem limit
+MAX_RETRIES = 8          # per batch, for throttling and unprocessed items
+MAX_BACKOFF_SECONDS = 5.0
+
+
+class RateController:
+    """
+    Items-per-second limit shared by all writer threads, adjusted AIMD-style:
+    it grows by `increase` items/s for every second of successful writes and
+    halves (at most once a second) when DynamoDB throttles or returns
+    unprocessed items.
+    """
+
+    def __init__(self, initial_rate: float, max_rate: float = 0.0,
+                 increase: float = 100.0, min_rate: float = BATCH_SIZE):
+        self.rate = initial_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.min_rate = min_rate
+        self.throttle_events = 0
+        self._tokens = 0.0
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int) -> None:
+        """Block until `n` items may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                burst = max(self.rate, n)
+                self._tokens = min(burst, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                wait = (n - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def success(self, n: int) -> None:
+        with self._lock:
+            self.rate += self.increase * n / self.rate
+            if self.max_rate:
+                self.rate = min(self.rate, self.max_rate)
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.throttle_events += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= 1.0:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._last_decrease = now
+
+
+class LoadStats:
+    """Thread-safe counters for the throughput report."""
+
+    def __init__(self, workers: int):
+        self.written = [0] * workers
+        self.committed: List[str] = []
+        self.failed: List[str] = []
+        self.errors: List[str] = []
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def add(self, worker: int, requests: int = 0, retries: int = 0,
+            committed: Iterable[str] = (), failed: Iterable[str] = (),
+            errors: Iterable[str] = ()) -> None:
+        committed = list(committed)
+        with self._lock:
+            self.written[worker] += len(committed)
+            self.committed.extend(committed)
+            self.requests += requests
+            self.retries += retries
+            self.failed.extend(failed)
+            self.errors.extend(errors)
+
+
+def _backoff(attempt: int) -> None:
+    time.sleep(min(MAX_BACKOFF_SECONDS, 0.05 * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+
+def _retry_after_error(error: Exception, attempt: int, rate: RateController,
+                       stats: LoadStats, worker: int) -> bool:
+    """
+    Back off and return True if a failed request should be retried:
+    throttling (which also lowers the shared rate) and transient botocore
+    errors such as connection resets, up to MAX_RETRIES.
+    """
+    if attempt >= MAX_RETRIES:
+        return False
+    if isinstance(error, ClientError):
+        if error.response.get("Error", {}).get("Code", "") not in THROTTLE_ERRORS:
+            return False
+        rate.throttled()
+    stats.add(worker, requests=1, retries=1)
+    _backoff(attempt + 1)
+    return True
+
+
+def write_batch(client, table_name: str, items: List[dict], rate: RateController,
+                stats: LoadStats, worker: int) -> Tuple[List[str], List[str]]:
+    """
+    Send one BatchWriteItem and retry its unprocessed items with backoff.
+    Items still unprocessed after MAX_RETRIES, or rejected by DynamoDB, are
+    recorded as failed. Returns (committed book_ids, failed book_ids).
+    """
+    requests = [{"PutRequest": {"Item": item}} for item in items]
+    committed: List[str] = []
+    attempt = 0
+    while requests:
+        rate.acquire(len(requests))
+        try:
+            response = client.batch_write_item(RequestItems={table_name: requests})
+        except (ClientError, BotoCoreError) as e:
+            if _retry_after_error(e, attempt, rate, stats, worker):
+                attempt += 1
+                continue
+            print(f"[ERROR] Batch of {len(requests)} items failed: {e}")
+            failed = [r["PutRequest"]["Item"]["book_id"] for r in requests]
+            stats.add(worker, requests=1, failed=failed)
+            return committed, failed
+
+        unprocessed = response.get("UnprocessedItems", {}).get(table_name, [])
+        unprocessed_ids = {r["PutRequest"]["Item"]["book_id"] for r in unprocessed}
+        sent = [r["PutRequest"]["Item"]["book_id"] for r in requests
+                if r["PutRequest"]["Item"]["book_id"] not in unprocessed_ids]
+        stats.add(worker, requests=1, committed=sent)
+        committed.extend(sent)
+        if sent:
+            rate.success(len(sent))
+        if not unprocessed:
+            break
+
+        rate.throttled()
+        if attempt >= MAX_RETRIES:
+            failed = sorted(unprocessed_ids)
+            stats.add(worker, failed=failed)
+            return committed, failed
+        stats.add(worker, retries=1)
+        attempt += 1
+        _backoff(attempt)
+        requests = unprocessed
+    return committed, []
+
+
+def update_ratings(client, table_name: str, book: dict, rate: RateController,
+                   stats: LoadStats, worker: int) -> bool:
+    """
+    UpdateItem only avg_rating / rating_count of an existing item; True if
+    committed. If the item is gone (deleted, or the table was recreated
+    since the manifest was written) the whole book is put instead, rather
+    than creating an item holding only the rating fields.
+    """
+    attempt = 0
+    while True:
+        rate.acquire(1)
+        try:
+            client.update_item(
+                TableName=table_name,
+                Key={"book_id": book["book_id"]},
+                UpdateExpression="SET avg_rating = :avg, rating_count = :count",
+                ConditionExpression="attribute_exists(book_id)",
+                ExpressionAttributeValues={
+                    ":avg": book["avg_rating"],
+                    ":count": book["rating_count"],
+                },
+            )
+        except (ClientError, BotoCoreError) as e:
+            code = e.response.get("Error", {}).get("Code") if isinstance(e, ClientError) else None
+            if code == "ConditionalCheckFailedException":
+                stats.add(worker, requests=1)
+                committed, _ = write_batch(client, table_name, [book], rate, stats, worker)
+                return bool(committed)
+            if _retry_after_error(e, attempt, rate, stats, worker):
+                attempt += 1
+                continue
+            print(f"[ERROR] Rating update of {book['book_id']} failed: {e}")
+            stats.add(worker, requests=1, failed=[book["book_id"]])
+            return False
+        stats.add(worker, requests=1, committed=[book["book_id"]])
+        rate.success(1)
+        return True
+
+
+def writer_loop(region: Optional[str], endpoint_url: Optional[str], table_name: str,
+                work: queue.Queue, rate: RateController, stats: LoadStats,
+                progress: "LoadProgress", worker: int) -> None:
+    """
+    Drain one shard's queue of ("put" | "update", record number, book)
+    operations: puts are grouped into BatchWriteItem calls, rating updates
+    use UpdateItem. Outcomes are reported to `progress` by record number.
+    None ends the shard.
+
+    An unexpected error stops the writer: it is recorded in stats.errors and
+    the rest of the shard, pending batch included, is drained as failed, so
+    the reader never blocks on the bounded queue and --resume retries it.
+    """
+    client = None
+    error: Optional[Exception] = None
+    batch: Dict[str, dict] = {}
+    seqs: Dict[str, List[int]] = {}
+    while True:
+        op = work.get()
+        update = None
+        if op is not None:
+            kind, seq, book = op
+            if kind == "update" and error is None:
+                update = (seq, book)
+            else:
+                # BatchWriteItem rejects duplicate keys in one request; last
+                # wins, and its outcome settles the earlier records too
+                batch[book["book_id"]] = book
+                seqs.setdefault(book["book_id"], []).append(seq)
+        try:
+            if error is None:
+                if client is None:
+                    # boto3 sessions are not thread-safe: one session per writer.
+                    # Resource clients serialize plain Python values.
+                    session = boto3.session.Session(region_name=region) if region else boto3.session.Session()
+                    client = session.resource("dynamodb", endpoint_url=endpoint_url).meta.client
+                if update is not None:
+                    seq, book = update
+                    ok = update_ratings(client, table_name, book, rate, stats, worker)
+                    progress.mark([seq], {} if ok else {seq: book["book_id"]})
+                    update = None
+                if batch and (op is None or len(batch) >= BATCH_SIZE):
+                    committed, failed = write_batch(client, table_name, list(batch.values()), rate, stats, worker)
+                    progress.mark(
+                        [seq for book_id in committed for seq in seqs[book_id]],
+                        {seq: book_id for book_id in failed for seq in seqs[book_id]},
+                    )
+                    batch = {}
+                    seqs = {}
+        except Exception as e:
+            print(f"[ERROR] Writer {worker} stopped, failing the rest of its shard: {e!r}")
+            stats.add(worker, errors=[repr(e)])
+            error = e
+        if error is not None and (batch or update):
+            failed = {seq: book_id for book_id in batch for seq in seqs[book_id]}
+            if update is not None:
+                failed[update[0]] = update[1]["book_id"]
+            progress.mark([], failed)
+            stats.add(worker, failed=sorted(set(failed.values())))
+            batch = {}
+            seqs = {}
+        if op is None:
+            return
+
+
+# ---------------------------------------------------------------------------
+# Progress manifest: which input records are committed, for --resume
+# ---------------------------------------------------------------------------
+
+PROGRESS_VERSION = 1
+PROGRESS_SECONDS = 5.0
+
+
+class LoadProgress:
     """
-    Load books from JSONL file into DynamoDB using BatchWrite (25 items per request).
+    Tracks input records (numbered in file order) as they are committed or
+    fail, and persists them so a restarted load can skip committed records.
+
+    With parallel writers records complete out of order, so the file holds a
+    watermark (every record below it is settled), the records settled above
+    it, and every failed record with its book_id. Failed records are retried
+    on resume. With no `path` this only keeps the in-memory accounting.
+    """
+
+    def __init__(self, path: Optional[str], source: dict):
+        self.path = path
+        self.source = source
+        self.watermark = 0
+        self.ahead: Set[int] = set()
+        self.failed: Dict[int, str] = {}
+        self._skip_below = 0
+        self._skip_ahead: Set[int] = set()
+        self.retrying: Set[int] = set()
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+
+    def resume(self) -> bool:
+        """Load the saved progress; False if there is none for this source."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("version") != PROGRESS_VERSION or saved.get("source") != self.source:
+            raise SystemExit(f"[ERROR] {self.path} was written for another file or table; "
+                             "remove it or run without --resume")
+        self.watermark = self._skip_below = saved["watermark"]
+        self.ahead = set(saved["ahead"])
+        # Failed records are settled for the watermark but retried now. They
+        # stay in `failed` (and in every save) until mark() settles them again.
+        self.failed = {int(seq): book_id for seq, book_id in saved["failed"].items()}
+        self.retrying = set(self.failed)
+        self._skip_ahead = self.ahead - self.retrying
+        return True
+
+    def is_committed(self, seq: int) -> bool:
+        """Whether a previous run already committed record `seq`."""
+        if seq in self.retrying:
+            return False
+        return seq < self._skip_below or seq in self._skip_ahead
+
+    def mark(self, done: Iterable[int], failed: Dict[int, str]) -> None:
+        with self._lock:
+            for seq in done:
+                self.failed.pop(seq, None)
+            self.failed.update(failed)
+            # Retried records below the watermark are already settled for it
+            self.ahead.update(seq for seq in done if seq >= self.watermark)
+            self.ahead.update(seq for seq in failed if seq >= self.watermark)
+            while self.watermark in self.ahead:
+                self.ahead.remove(self.watermark)
+                self.watermark += 1
+
+    def due(self) -> bool:
+        return bool(self.path) and time.monotonic() - self._last_save >= PROGRESS_SECONDS
+
+    def snapshot(self) -> dict:
+        """The state save() writes, taken under the lock."""
+        with self._lock:
+            return {
+                "version": PROGRESS_VERSION,
+                "source": self.source,
+                "watermark": self.watermark,
+                "ahead": sorted(self.ahead),
+                "failed": {str(seq): book_id for seq, book_id in sorted(self.failed.items())},
+            }
+
+    def save(self, state: Optional[dict] = None) -> None:
+        """Write `state` (default: a fresh snapshot) atomically."""
+        if not self.path:
+            return
+        if state is None:
+            state = self.snapshot()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+
+# ---------------------------------------------------------------------------
+# Diff manifest: what the previous load wrote, per book_id
+# ---------------------------------------------------------------------------
+
+MANIFEST_VERSION = 1
+RATING_FIELDS = ("avg_rating", "rating_count")
+
+
+def book_fingerprint(book: dict) -> List:
+    """[content hash without rating fields, avg_rating, rating_count]."""
+    content = {k: v for k, v in book.items() if k not in RATING_FIELDS}
+    blob = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+    return [digest, str(book["avg_rating"]), int(book["rating_count"])]
+
+
+def load_manifest(path: str, table_name: str) -> Dict[str, list]:
+    """Fingerprints of the last load into `table_name`, or {} if none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("table") != table_name:
+        print(f"[WARN] Ignoring manifest {path}: written for another table or version")
+        return {}
+    return manifest["books"]
+
+
+def save_manifest(path: str, table_name: str, books: Dict[str, list]) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "table": table_name, "books": books}, f)
+    os.replace(tmp_path, path)
+
+
+def load_books(
+    file_path: str,
+    table_name: str,
+    region: str | None = None,
+    workers: int = 4,
+    endpoint_url: str | None = None,
+    initial_rate: float = 500.0,
+    max_rate: float = 0.0,
+    report_path: str | None = None,
+    diff_manifest: str | None = None,
+    progress_path: str | None = None,
+    resume: bool = False,
+) -> dict:
+    """
+    Load books from a JSONL (or columnar .npz) file into DynamoDB.
+
+    Books are sharded by book_id across `workers` writer threads, each
+    sending its own BatchWriteItem requests (25 items). All writers share an
+    adaptive rate limit (see RateController) that backs off on throttling
+    and unprocessed items. Returns the throughput report, which is also
+    printed and optionally written to `report_path` as JSON.
+
+    With `diff_manifest`, each book is fingerprinted (content hash plus its
+    rating fields) and compared with the manifest of the previous load:
+    unchanged books are skipped, rating-only changes use UpdateItem and new
+    or otherwise changed books are written in full. Only items that were
+    actually committed are recorded in the updated manifest.
+
+    With `progress_path`, the numbers of committed input records are saved
+    every few seconds (see LoadProgress). `resume` skips the records a
+    previous run committed and retries the ones that failed. Ctrl-C stops
+    reading, finishes the queued writes and saves progress before reporting.
     """
     print("=" * 70)
     print("LOADING BOOKS INTO DYNAMODB")
@@ -49,19 +505,76 @@ def load_books(file_path: str, table_name: str, region: str | None = None):
     print(f"DynamoDB    : {table_name}")
     if region:
         print(f"Region      : {region}")
+    if endpoint_url:
+        print(f"Endpoint    : {endpoint_url}")
+    print(f"Writers     : {workers}")
+    if diff_manifest:
+        print(f"Manifest    : {diff_manifest}")
+    if progress_path:
+        print(f"Progress    : {progress_path}{' (resume)' if resume else ''}")
     print()
 
-    # Create DynamoDB resource
-    if region:
-        dynamodb = boto3.resource("dynamodb", region_name=region)
-    else:
-        dynamodb = boto3.resource("dynamodb")
+    st = os.stat(file_path)
+    progress = LoadProgress(progress_path, {
+        "file": os.path.abspath(file_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "table": table_name,
+    })
+    if resume and progress.resume():
+        print(f"Resuming after record {progress.watermark:,} "
+              f"({len(progress.ahead):,} later records done, {len(progress.retrying):,} to retry)\n")
+
+    manifest = load_manifest(diff_manifest, table_name) if diff_manifest else {}
+    manifest_applied = 0
 
-    table = dynamodb.Table(table_name)
+    def save_progress():
+        # Writers add to stats.committed before marking progress, so a
+        # committed list copied after the progress snapshot covers every
+        # record the snapshot marks done. The manifest is written first;
+        # entries it has beyond the snapshot are rechecked on resume.
+        nonlocal manifest_applied
+        state = progress.snapshot()
+        if diff_manifest:
+            committed = stats.committed[:]
+            for book_id in committed[manifest_applied:]:
+                manifest[book_id] = pending[book_id]
+            manifest_applied = len(committed)
+            save_manifest(diff_manifest, table_name, manifest)
+        progress.save(state)
+    pending: Dict[str, list] = {}
+    changes = {"new": 0, "changed": 0, "rating_only": 0, "unchanged": 0}
 
+    rate = RateController(initial_rate, max_rate)
+    stats = LoadStats(workers)
+    queues = [queue.Queue(maxsize=BATCH_SIZE * 8) for _ in range(workers)]
+    threads = [
+        threading.Thread(
+            target=writer_loop,
+            args=(region, endpoint_url, table_name, queues[w], rate, stats, progress, w),
+            daemon=True,
+        )
+        for w in range(workers)
+    ]
+    for t in threads:
+        t.start()
+
+    start = time.perf_counter()
     total = 0
-    with table.batch_writer(overwrite_by_pkeys=["book_id"]) as batch:
-        for book in iter_jsonl(file_path):
+    skipped = 0
+    resumed = 0
+    records = 0
+    interrupted = False
+    try:
+        for seq, book in enumerate(iter_books(file_path)):
+            if stats.errors:
+                # A writer died: stop reading, the rest is left for --resume
+                break
+            records = seq + 1
+            if progress.is_committed(seq):
+                resumed += 1
+                continue
+
             # Basic sanity check
             book_id = book.get("book_id")
             if not book_id:
@@ -69,6 +582,8 @@ def load_books(file_path: str, table_name: str, region: str | None = None):
                 book_id = book.get("key")
                 if not book_id:
                     print("[WARN] Skip item without book_id/key")
+                    skipped += 1
+                    progress.mark([seq], {})
                     continue
                 book["book_id"] = book_id
 
@@ -76,20 +591,102 @@ def load_books(file_path: str, table_name: str, region: str | None = None):
             book.setdefault("rating_count", 0)
             book.setdefault("avg_rating", Decimal("0"))
 
-            try:
-                batch.put_item(Item=book)
-                total += 1
-            except ClientError as e:
-                print(f"[ERROR] Failed to write book_id={book_id}: {e}")
-                continue
+            op = "put"
+            if diff_manifest:
+                fingerprint = book_fingerprint(book)
+                previous = manifest.get(book_id)
+                if previous is None:
+                    changes["new"] += 1
+                elif previous[0] != fingerprint[0]:
+                    changes["changed"] += 1
+                elif previous[1:] != fingerprint[1:]:
+                    changes["rating_only"] += 1
+                    op = "update"
+                else:
+                    changes["unchanged"] += 1
+                    total += 1
+                    progress.mark([seq], {})
+                    continue
+                pending[book_id] = fingerprint
+
+            # Stable shard per book_id, so repeated ids stay ordered
+            queues[zlib.crc32(book_id.encode("utf-8")) % workers].put((op, seq, book))
+            total += 1
 
             if total % 1000 == 0:
-                print(f"  Written {total:,} items ...")
+                elapsed = time.perf_counter() - start
+                print(f"  Queued {total:,} items, written {sum(stats.written):,} "
+                      f"({sum(stats.written) / elapsed:,.0f} items/s, limit {rate.rate:,.0f}/s) ...")
+            if progress.due():
+                save_progress()
+    except KeyboardInterrupt:
+        print("\n[WARN] Interrupted: finishing queued writes, then saving progress ...")
+        interrupted = True
+    finally:
+        for q in queues:
+            q.put(None)
+        for t in threads:
+            t.join()
+        save_progress()
+
+    elapsed = time.perf_counter() - start
+    written = sum(stats.written)
+    report = {
+        "source": file_path,
+        "table": table_name,
+        "workers": workers,
+        "items_read": total,
+        "items_skipped": skipped,
+        "items_written": written,
+        "items_failed": len(stats.failed),
+        "items_resumed": resumed,
+        "records_seen": records,
+        "interrupted": interrupted,
+        "writer_errors": stats.errors,
+        # Every record before this one is committed, failed or skipped
+        "resume_from_record": progress.watermark,
+        "unprocessed_records": {str(seq): book_id for seq, book_id in sorted(progress.failed.items())},
+        "requests": stats.requests,
+        "retries": stats.retries,
+        "throttle_events": rate.throttle_events,
+        "final_rate_limit": round(rate.rate, 1),
+        "seconds": round(elapsed, 3),
+        "items_per_second": round(written / elapsed, 1) if elapsed > 0 else 0.0,
+        "items_per_worker": stats.written,
+        "failed_book_ids": stats.failed[:100],
+    }
+    if diff_manifest:
+        report["changes"] = changes
+    stopped = interrupted or bool(stats.errors)
+    if progress_path and not stopped and not progress.failed and os.path.exists(progress_path):
+        # Everything committed: a later --resume would have nothing to do
+        os.remove(progress_path)
 
     print()
-    print(f"COMPLETE: {total:,} items written to DynamoDB table '{table_name}'")
+    print(f"{'STOPPED' if stopped else 'COMPLETE'}: {written:,} items written to DynamoDB table '{table_name}' "
+          f"in {elapsed:.1f}s ({report['items_per_second']:,.0f} items/s)")
+    print(f"Requests: {stats.requests:,}, retries: {stats.retries:,}, "
+          f"throttle events: {rate.throttle_events:,}")
+    if diff_manifest:
+        print(f"Diff: {changes['new']:,} new, {changes['changed']:,} changed, "
+              f"{changes['rating_only']:,} rating-only, {changes['unchanged']:,} unchanged")
+    if resumed:
+        print(f"Resumed: {resumed:,} records committed by a previous run were skipped")
+    if stats.failed:
+        print(f"[ERROR] {len(stats.failed):,} items failed, e.g. {', '.join(stats.failed[:5])}")
+    if stats.errors:
+        print(f"[ERROR] {len(stats.errors):,} writers stopped on an unexpected error: {stats.errors[0]}")
+    if progress_path and (stopped or progress.failed):
+        print(f"Progress saved to {progress_path}: {len(progress.failed):,} failed records "
+              f"and everything from record {progress.watermark:,} on are retried with --resume")
     print("=" * 70)
 
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    return report
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -98,7 +695,7 @@ def main():
     parser.add_argument(
         "--file",
         required=True,
-        help="Input JSONL file, e.g. books_english_top50k_with_ratings.jsonl",
+        help="Input JSONL or columnar .npz file, e.g. books_english_top50k_with_ratings.jsonl",
     )
     parser.add_argument(
         "--table",
@@ -110,10 +707,66 @@ def main():
         required=False,
         help="AWS region, e.g. us-east-1 (optional if already configured)",
     )
+    parser.add_argument(
+        "--endpoint-url",
+        help="DynamoDB endpoint, e.g. http://localhost:8001 for dynamodb-local",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Parallel writer threads, each with its own BatchWriteItem pipeline (default: 4)",
+    )
+    parser.add_argument(
+        "--initial-rate",
+        type=float,
+        default=500.0,
+        help="Starting write rate in items/s; adapts to throttling (default: 500)",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=0.0,
+        help="Upper bound on the write rate in items/s (default: no bound)",
+    )
+    parser.add_argument(
+        "--report",
+        help="Optional JSON throughput report path",
+    )
+    parser.add_argument(
+        "--diff-manifest",
+        help="Diff mode: only write books that are new or changed since the load "
+             "recorded in this manifest (created on first use)",
+    )
+    parser.add_argument(
+        "--progress",
+        help="Record committed input records in this file so an interrupted or "
+             "partly failed load can be continued with --resume",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip records committed by the run recorded in --progress and retry its failures",
+    )
 
     args = parser.parse_args()
-    load_books(args.file, args.table, args.region)
+    if args.resume and not args.progress:
+        parser.error("--resume requires --progress")
+    report = load_books(
+        args.file,
+        args.table,
+        args.region,
+        workers=max(1, args.workers),
+        endpoint_url=args.endpoint_url,
+        initial_rate=args.initial_rate,
+        max_rate=args.max_rate,
+        report_path=args.report,
+        diff_manifest=args.diff_manifest,
+        progress_path=args.progress,
+        resume=args.resume,
+    )
+    sys.exit(1 if report["items_failed"] or report["interrupted"] or report["writer_errors"] else 0)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,73 @@
+import importlib.util
+import os
+
+_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scripts", "load_books_to_dynamodb.py")
+_spec = importlib.util.spec_from_file_location("load_books_to_dynamodb", _SCRIPT)
+loader = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(loader)
+
+SOURCE = {"file": "books.jsonl", "table": "Books"}
+
+
+def test_failed_record_above_watermark_is_retried_on_resume(tmp_path):
+    path = str(tmp_path / "progress.json")
+    progress = loader.LoadProgress(path, SOURCE)
+    progress.mark([1, 2, 4, 5], {3: "OL3W"})
+    progress.save()
+
+    resumed = loader.LoadProgress(path, SOURCE)
+    assert resumed.resume()
+    assert not resumed.is_committed(0)
+    assert [seq for seq in range(1, 6) if not resumed.is_committed(seq)] == [3]
+
+    # The retry fails again: it must still be reported, not dropped
+    resumed.mark([0], {3: "OL3W"})
+    assert resumed.failed == {3: "OL3W"}
+    assert resumed.watermark == 6
+
+
+def test_retried_records_below_watermark_leave_ahead_empty(tmp_path):
+    path = str(tmp_path / "progress.json")
+    progress = loader.LoadProgress(path, SOURCE)
+    progress.mark([0, 2], {1: "OL1W"})
+    progress.save()
+
+    resumed = loader.LoadProgress(path, SOURCE)
+    assert resumed.resume()
+    assert resumed.watermark == 3
+    assert not resumed.is_committed(1)
+    resumed.mark([1], {})
+    assert resumed.failed == {}
+    assert resumed.ahead == set()
+
+
+def test_failed_records_survive_a_save_before_they_are_retried(tmp_path):
+    path = str(tmp_path / "progress.json")
+    progress = loader.LoadProgress(path, SOURCE)
+    progress.mark([0, 1, 2, 3, 5, 6, 7, 8, 9], {4: "OL4W"})
+    progress.save()
+
+    # Interrupted again before reaching record 4
+    resumed = loader.LoadProgress(path, SOURCE)
+    assert resumed.resume()
+    resumed.save()
+
+    again = loader.LoadProgress(path, SOURCE)
+    assert again.resume()
+    assert again.failed == {4: "OL4W"}
+    assert [seq for seq in range(10) if not again.is_committed(seq)] == [4]
+    again.mark([4], {})
+    assert again.failed == {}
+
+
+def test_save_writes_the_snapshot_it_is_given(tmp_path):
+    path = str(tmp_path / "progress.json")
+    progress = loader.LoadProgress(path, SOURCE)
+    progress.mark([0, 1], {})
+    state = progress.snapshot()
+    progress.mark([2], {})
+    progress.save(state)
+
+    resumed = loader.LoadProgress(path, SOURCE)
+    assert resumed.resume()
+    assert [seq for seq in range(3) if resumed.is_committed(seq)] == [0, 1]